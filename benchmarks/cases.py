@@ -0,0 +1,518 @@
+"""Benchmark cases for the bot's hot paths, timed against a synthetic typegg.db."""
+
+import asyncio
+import json
+import os
+import statistics
+import zlib
+from functools import cached_property
+
+import numpy as np
+
+CASES = {}
+
+
+def case(name: str):
+    """
+    Register a benchmark case. The decorated function receives the shared fixture,
+    performs any setup, and returns a zero argument callable which is the part being timed.
+    """
+
+    def decorator(func):
+        CASES[name] = func
+        return func
+
+    return decorator
+
+
+class Fixture:
+    """Lazily loaded inputs shared between cases, so setup cost is paid once per run."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+
+    def run(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def close(self):
+        self.loop.close()
+
+    @cached_property
+    def theme(self):
+        from utils.colors import DEFAULT_THEME
+        return DEFAULT_THEME
+
+    @cached_property
+    def user_ids(self):
+        """User IDs ordered by race count, most active first."""
+        from database.typegg import db
+        rows = db.fetch("""
+            SELECT userId, COUNT(*) AS races FROM races
+            GROUP BY userId
+            ORDER BY races DESC
+        """)
+        return [row["userId"] for row in rows]
+
+    @cached_property
+    def user_id(self):
+        return self.user_ids[0]
+
+    @cached_property
+    def opponent_id(self):
+        return self.user_ids[1] if len(self.user_ids) > 1 else self.user_ids[0]
+
+    @cached_property
+    def quotes(self):
+        from database.typegg.quotes import get_quotes
+        return get_quotes()
+
+    @cached_property
+    def race_list(self):
+        from database.typegg.races import get_races
+        return self.run(get_races(
+            user_id=self.user_id,
+            columns=["quoteId", "wpm", "pp", "timestamp", "timestampMs"],
+            include_dnf=False,
+            order_by="timestampMs",
+        ))
+
+    @cached_property
+    def quote_bests(self):
+        from database.typegg.users import get_quote_bests
+        return get_quote_bests(self.user_id, columns=["quoteId", "wpm", "pp", "accuracy"])
+
+    @cached_property
+    def keystroke_samples(self):
+        """Up to 50 stored keystroke blobs of each format, decompressed and parsed."""
+        from database.typegg import db
+        rows = db.fetch("SELECT keystrokeData, compressed FROM keystrokes.keystroke_data LIMIT 500")
+        compact, legacy = [], []
+
+        for row in rows:
+            keystroke_data = row["keystrokeData"]
+            if row["compressed"]:
+                keystroke_data = zlib.decompress(keystroke_data)
+            keystroke_data = json.loads(keystroke_data)
+            samples = legacy if isinstance(keystroke_data, dict) else compact
+            if len(samples) < 50:
+                samples.append(keystroke_data)
+
+        return compact, legacy
+
+    @cached_property
+    def decoded_samples(self):
+        from utils.keystroke_codec import decode_keystroke_data
+        compact, legacy = self.keystroke_samples
+        return [decode_keystroke_data(raw) for raw in compact + legacy]
+
+    @cached_property
+    def decoded_arrays(self):
+        from utils.keystroke_codec import decode_keystroke_arrays
+        compact, legacy = self.keystroke_samples
+        return [decode_keystroke_arrays(raw) for raw in compact + legacy]
+
+    @cached_property
+    def processed_samples(self):
+        from utils.keystrokes import process_keystroke_arrays
+        return [process_keystroke_arrays(decoded) for decoded in self.decoded_arrays]
+
+
+# Database
+
+@case("db.get_races")
+def get_races_case(fixture: Fixture):
+    from database.typegg.races import get_races
+    return lambda: fixture.run(get_races(user_id=fixture.user_id))
+
+
+@case("db.get_races.date_range")
+def get_races_date_range_case(fixture: Fixture):
+    from database.typegg.races import get_races
+    middle = fixture.race_list[len(fixture.race_list) // 2]["timestamp"]
+    end = fixture.race_list[-1]["timestamp"]
+    return lambda: fixture.run(get_races(user_id=fixture.user_id, start_date=middle, end_date=end))
+
+
+@case("db.get_races.keystrokes")
+def get_races_keystrokes_case(fixture: Fixture):
+    from database.typegg.races import get_races
+    quote_id = statistics.mode(race["quoteId"] for race in fixture.race_list)
+    return lambda: fixture.run(get_races(user_id=fixture.user_id, quote_id=quote_id, get_keystrokes=True))
+
+
+@case("db.get_quote_bests")
+def get_quote_bests_case(fixture: Fixture):
+    from database.typegg.users import get_quote_bests
+    return lambda: get_quote_bests(fixture.user_id)
+
+
+@case("db.search_quotes")
+def search_quotes_case(fixture: Fixture):
+    from database.typegg.quote_search import search_quotes
+    words = fixture.quotes[next(iter(fixture.quotes))]["text"].split()
+    query = " ".join(words[:3])[:-1]
+    return lambda: search_quotes(query)
+
+
+@case("db.get_encounter_stats")
+def get_encounter_stats_case(fixture: Fixture):
+    from database.typegg.match_results import get_encounter_stats
+    from utils.flags import Flags
+    return lambda: get_encounter_stats(fixture.user_id, Flags())
+
+
+@case("db.update_quote_leaderboards")
+def update_quote_leaderboards_case(fixture: Fixture):
+    from database.typegg.quote_leaderboards import update_quote_leaderboards
+    quote_ids = list(fixture.quotes)[:500]
+    return lambda: update_quote_leaderboards(quote_ids)
+
+
+@case("db.writes.sequential")
+def writes_sequential_case(fixture: Fixture):
+    from database.typegg import db
+    query = "UPDATE users SET lastAccessed = ? WHERE userId = ?"
+    return lambda: [db.run(query, [i, fixture.user_ids[i % len(fixture.user_ids)]]) for i in range(100)]
+
+
+@case("db.writes.concurrent")
+def writes_concurrent_case(fixture: Fixture):
+    from database.typegg import db
+    query = "UPDATE users SET lastAccessed = ? WHERE userId = ?"
+
+    async def write_all():
+        await asyncio.gather(*[
+            db.run_async(query, [i, fixture.user_ids[i % len(fixture.user_ids)]]) for i in range(100)
+        ])
+
+    return lambda: fixture.run(write_all())
+
+
+# Commands
+
+@case("commands.parse_flags")
+def parse_flags_case(fixture: Fixture):
+    from bot_setup import parse_flags
+    quote_id = next(iter(fixture.quotes))
+    contents = [
+        f"-racetime {fixture.user_id} {quote_id} -pp -raw 2024-01-01",
+        f"-stats {fixture.user_id} -solo -ranked 100",
+        f"-best {fixture.user_id} {quote_id}-missing unknown words here",
+    ]
+    return lambda: [parse_flags(content) for content in contents * 100]
+
+
+# Keystrokes
+
+@case("keystrokes.decode.compact")
+def decode_compact_case(fixture: Fixture):
+    from utils.keystroke_codec import decode_keystroke_data
+    compact, _ = fixture.keystroke_samples
+    return lambda: [decode_keystroke_data(raw) for raw in compact]
+
+
+@case("keystrokes.decode.arrays")
+def decode_arrays_case(fixture: Fixture):
+    from utils.keystroke_codec import decode_keystroke_arrays
+    compact, _ = fixture.keystroke_samples
+    return lambda: [decode_keystroke_arrays(raw) for raw in compact]
+
+
+@case("keystrokes.decode.legacy")
+def decode_legacy_case(fixture: Fixture):
+    from utils.keystroke_codec import decode_keystroke_data
+    _, legacy = fixture.keystroke_samples
+    return lambda: [decode_keystroke_data(raw) for raw in legacy]
+
+
+@case("keystrokes.process")
+def process_case(fixture: Fixture):
+    from utils.keystrokes import process_keystroke_data
+    decoded_samples = fixture.decoded_samples
+    return lambda: [process_keystroke_data(decoded) for decoded in decoded_samples]
+
+
+@case("keystrokes.process.arrays")
+def process_arrays_case(fixture: Fixture):
+    from utils.keystrokes import process_keystroke_arrays
+    decoded_arrays = fixture.decoded_arrays
+    return lambda: [process_keystroke_arrays(decoded) for decoded in decoded_arrays]
+
+
+@case("keystrokes.cached")
+def cached_case(fixture: Fixture):
+    from utils.keystrokes import get_keystroke_data
+    compact, legacy = fixture.keystroke_samples
+    samples = list(enumerate(compact + legacy))
+    return lambda: [get_keystroke_data(raw, race_id=f"sample-{i}") for i, raw in samples]
+
+
+@case("keystrokes.job_chunk")
+def job_chunk_case(fixture: Fixture):
+    from database.typegg.keystroke_jobs import get_user_chunks
+    from utils.keystroke_jobs import JOBS, process_chunk
+    _, rows = next(get_user_chunks(fixture.user_id, 0, 200))
+    return lambda: [process_chunk(job, rows) for job in JOBS.values()]
+
+
+# Statistics
+
+@case("stats.best_averages")
+def best_averages_case(fixture: Fixture):
+    from commands.summary.bestaverages import get_best_averages
+    values = [race["wpm"] for race in fixture.race_list]
+    return lambda: get_best_averages(values, 100)
+
+
+@case("stats.longest_average")
+def longest_average_case(fixture: Fixture):
+    from commands.summary.longestaverage import get_longest_average
+    values = [race["wpm"] for race in fixture.race_list]
+    threshold = statistics.median(values)
+    return lambda: get_longest_average(values, threshold)
+
+
+@case("stats.total_pp_over_time")
+def total_pp_over_time_case(fixture: Fixture):
+    from commands.graphs.linegraph import get_total_pp_over_time
+    race_list = fixture.race_list
+    return lambda: get_total_pp_over_time(race_list)
+
+
+@case("stats.sum_of_best")
+def sum_of_best_case(fixture: Fixture):
+    from commands.graphs.sumofbest import get_sum_of_best_segments
+    from database.typegg import db
+    from database.typegg.quotes import get_quote
+    from utils.strings import get_segments
+    quote_id = db.fetch_one("""
+        SELECT quoteId FROM races WHERE userId = ?
+        GROUP BY quoteId ORDER BY COUNT(*) DESC
+    """, [fixture.user_id])["quoteId"]
+    text_segments = get_segments(get_quote(quote_id)["text"])
+    get_sum_of_best_segments(fixture.user_id, quote_id, text_segments)
+    return lambda: get_sum_of_best_segments(fixture.user_id, quote_id, text_segments)
+
+
+@case("stats.timings")
+def timings_case(fixture: Fixture):
+    from database.typegg.timings import get_ranked_timings, update_timings
+    asyncio.run(update_timings(fixture.user_id))
+
+    def rank():
+        for kind in ["bigram", "word"]:
+            get_ranked_timings(fixture.user_id, kind, 10, slowest=True)
+            get_ranked_timings(fixture.user_id, kind, 10, slowest=False)
+
+    return rank
+
+
+@case("stats.race_summary")
+def race_summary_case(fixture: Fixture):
+    from commands.summary.races import summarize_rollups
+    from utils.flags import Flags
+    profile = {"userId": fixture.user_id, "username": fixture.user_id}
+    return lambda: summarize_rollups(profile, None, None, Flags())
+
+
+@case("stats.quote_best_comparison")
+def quote_best_comparison_case(fixture: Fixture):
+    from commands.graphs.comparegraph import get_quote_best_arrays
+    from database.typegg.quotes import get_quote_catalog
+    from utils.flags import Flags
+    from utils.stats import bucket_counts, max_positive_run
+    catalog = get_quote_catalog()
+
+    def compare():
+        wpm1 = get_quote_best_arrays(catalog, fixture.user_id, "wpm", Flags())
+        wpm2 = get_quote_best_arrays(catalog, fixture.opponent_id, "wpm", Flags())
+        won = wpm1 > wpm2
+        gains1 = bucket_counts(catalog.difficulty[won], 0.5)
+        gains2 = bucket_counts(catalog.difficulty[wpm2 > wpm1], 0.5)
+        buckets = sorted(gains1.keys() | gains2.keys())
+        return max_positive_run(np.array([gains1.get(b, 0) - gains2.get(b, 0) for b in buckets]))
+
+    return compare
+
+
+# Graphs
+
+def rendered(file_name: str):
+    os.remove(file_name)
+
+
+@case("graphs.race")
+def race_graph_case(fixture: Fixture):
+    from graphs import race
+    result = fixture.processed_samples[0]
+    return lambda: rendered(race.render(
+        result.keystrokeWpm, result.keystrokeRawWpm, result.typos, "user", "Race Graph", fixture.theme,
+    ))
+
+
+@case("graphs.match")
+def match_graph_case(fixture: Fixture):
+    from graphs import match
+    race_data = [
+        {"username": f"user{i}", "keystroke_wpm": result.keystrokeWpm}
+        for i, result in enumerate(fixture.processed_samples[:5])
+    ]
+    return lambda: rendered(match.render(race_data, "Match Graph", fixture.theme))
+
+
+@case("graphs.segments")
+def segments_graph_case(fixture: Fixture):
+    from commands.graphs.segments import build_segments
+    from graphs import segments
+    from utils.strings import get_segments
+    decoded, result = fixture.decoded_samples[0], fixture.processed_samples[0]
+    segment_list = build_segments(get_segments(decoded.text), result.wpmCharacterTimes, result.rawCharacterTimes)
+    return lambda: rendered(segments.render(segment_list, "Segments Graph", "Segment", fixture.theme))
+
+
+@case("graphs.line")
+def line_graph_case(fixture: Fixture):
+    from commands.graphs.linegraph import get_total_pp_over_time
+    from graphs import line
+    x_values = [race["timestampMs"] / 1000 for race in fixture.race_list]
+    y_values = get_total_pp_over_time(fixture.race_list)
+    return lambda: rendered(line.render(
+        "user", [{"username": "user", "x_values": x_values[:], "y_values": y_values[:]}],
+        "Total pp", "pp", fixture.theme,
+    ))
+
+
+@case("graphs.improvement")
+def improvement_graph_case(fixture: Fixture):
+    from graphs import improvement
+    values = [race["wpm"] for race in fixture.race_list]
+    timestamps = [race["timestampMs"] / 1000 for race in fixture.race_list]
+    return lambda: rendered(improvement.render_over_time(values, "WPM", fixture.theme, timestamps, 50))
+
+
+@case("graphs.histogram")
+def histogram_graph_case(fixture: Fixture):
+    from commands.graphs.histogram import metrics
+    from graphs import histogram
+    values = [race["wpm"] for race in fixture.quote_bests]
+    half = len(values) // 2
+    return lambda: rendered(histogram.render(
+        "user", metrics["wpm"] | {"name": "wpm"}, values[:half], values[half:], fixture.theme,
+    ))
+
+
+@case("graphs.best")
+def best_graph_case(fixture: Fixture):
+    from graphs import best
+    quote_bests = fixture.quote_bests[:250]
+    profiles = [{
+        "username": "user",
+        "values": [race["pp"] for race in quote_bests],
+        "difficulties": [fixture.quotes[race["quoteId"]]["difficulty"] for race in quote_bests],
+    }]
+    return lambda: rendered(best.render("user", profiles, 250, "pp", fixture.theme))
+
+
+@case("graphs.pplength")
+def pplength_graph_case(fixture: Fixture):
+    from graphs import pplength
+    return lambda: rendered(pplength.render("pp vs. Length", fixture.quotes, fixture.quote_bests, fixture.theme))
+
+
+@case("graphs.encounters")
+def encounters_graph_case(fixture: Fixture):
+    from database.typegg.match_results import get_opponent_encounters
+    from graphs import encounters
+    from utils.flags import Flags
+    data = get_opponent_encounters(fixture.user_id, fixture.opponent_id, Flags())
+    difficulties = [fixture.quotes[row["quoteId"]]["difficulty"] for row in data]
+    return lambda: rendered(encounters.render(data, difficulties, "Encounters", fixture.theme))
+
+
+@case("graphs.quotestrength")
+def quotestrength_graph_case(fixture: Fixture):
+    from graphs import quotestrength
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-1, 1, (2, 250))
+    users = [{"username": "user", "x": 0.2, "y": -0.1}]
+    return lambda: rendered(quotestrength.render(users, fixture.theme, (points[0], points[1])))
+
+
+@case("graphs.compare_bar")
+def compare_bar_graph_case(fixture: Fixture):
+    from commands.graphs.comparegraph import get_quote_best_arrays
+    from database.typegg.quotes import get_quote_catalog
+    from graphs import compare_bar
+    from utils.flags import Flags
+    from utils.stats import bucket_counts
+    catalog = get_quote_catalog()
+    wpm1 = get_quote_best_arrays(catalog, fixture.user_id, "wpm", Flags())
+    wpm2 = get_quote_best_arrays(catalog, fixture.opponent_id, "wpm", Flags())
+    in1, in2 = ~np.isnan(wpm1), ~np.isnan(wpm2)
+    both, unique = in1 & in2, in1 ^ in2
+    gains1 = bucket_counts(catalog.difficulty[both & (wpm1 > wpm2)], 0.5)
+    gains2 = bucket_counts(catalog.difficulty[both & (wpm1 <= wpm2)], 0.5)
+    defaults = bucket_counts(catalog.difficulty[unique], 0.5, weights=np.where(in1[unique], -1, 1))
+    return lambda: rendered(compare_bar.render("user1", gains1, "user2", gains2, defaults, fixture.theme))
+
+
+@case("graphs.compare_histogram")
+def compare_histogram_graph_case(fixture: Fixture):
+    from commands.graphs.comparegraph import get_quote_best_arrays
+    from database.typegg.quotes import get_quote_catalog
+    from graphs import compare_histogram
+    from utils.flags import Flags
+    catalog = get_quote_catalog()
+    wpm1 = get_quote_best_arrays(catalog, fixture.user_id, "wpm", Flags())
+    wpm2 = get_quote_best_arrays(catalog, fixture.opponent_id, "wpm", Flags())
+    differences = (wpm1 - wpm2)[~np.isnan(wpm1) & ~np.isnan(wpm2)]
+    gains1, gains2 = differences[differences > 0], -differences[differences < 0]
+    return lambda: rendered(compare_histogram.render("user1", gains1, "user2", gains2, "wpm", fixture.theme))
+
+
+@case("graphs.daily")
+def daily_graph_case(fixture: Fixture):
+    from graphs import daily
+    score_list = [
+        {"username": f"user{i}", "keystroke_wpm": result.keystrokeWpm}
+        for i, result in enumerate(fixture.processed_samples[:10])
+    ]
+    return lambda: rendered(daily.render(score_list, "Daily Quote", fixture.theme))
+
+
+@case("graphs.endurance")
+def endurance_graph_case(fixture: Fixture):
+    from database.typegg.users import get_running_maximum_by_length
+    from graphs.endurance import UserEnduranceData, render
+    data = []
+    for user_id in [fixture.user_id, fixture.opponent_id]:
+        bests = get_running_maximum_by_length(user_id)
+        data.append(UserEnduranceData(user_id, [r["wpm"] for r in bests], [r["length"] for r in bests]))
+    return lambda: rendered(render(fixture.user_id, data, fixture.theme))
+
+
+@case("graphs.keystrokes")
+def keystrokes_graph_case(fixture: Fixture):
+    from commands.graphs.keystrokes import get_keypresses
+    from graphs import keystrokes
+    from utils.keyboard_layouts import get_keymap
+    keymap, keyboard_layout = get_keymap("qwerty")
+    keypresses = get_keypresses(fixture.user_id)
+    return lambda: rendered(keystrokes.render("user", keyboard_layout, keypresses, keymap, fixture.theme))
+
+
+@case("graphs.length")
+def length_graph_case(fixture: Fixture):
+    from database.typegg.users import get_best_by_length
+    from graphs import length
+    data = []
+    for user_id in [fixture.user_id, fixture.opponent_id]:
+        rows = get_best_by_length(user_id, "wpm")
+        data.append(length.UserLengthData(user_id, [r["value"] for r in rows], [r["length"] for r in rows]))
+    return lambda: rendered(length.render(fixture.user_id, data, "wpm", fixture.theme))
+
+
+@case("graphs.sample")
+def sample_graph_case(fixture: Fixture):
+    from graphs import sample
+    return lambda: rendered(sample.render(fixture.theme))
@@ -0,0 +1,185 @@
+"""
+Golden corpus check for the array-backed keystroke processor.
+
+Runs every keystroke blob in the synthetic database, plus a seeded corpus of simulated
+editing sessions (typos, backspaces, selections, replacements, fat fingers and IME input),
+through both process_keystroke_data and process_keystroke_arrays, in solo and multiplayer
+mode, and reports any output that is not exactly equal:
+
+    python benchmarks/golden.py
+    python benchmarks/golden.py --sessions 20000 --seed 3
+"""
+
+import argparse
+import json
+import random
+import sys
+import zlib
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARK_DIR.parent / "src"))
+sys.path.insert(0, str(BENCHMARK_DIR))
+
+from run import move_legacy_keystrokes, prepare_database  # noqa: E402
+from synthetic import Scale, WORDS, PUNCTUATION  # noqa: E402
+
+ACCENTS = ["é", "ß", "ñ"]
+
+
+def make_session_text(rng: random.Random):
+    text = ""
+    for _ in range(rng.randint(1, 12)):
+        word = rng.choice(WORDS)
+        if rng.random() < 0.05:
+            word += rng.choice(ACCENTS)
+        if rng.random() < 0.15:
+            word += rng.choice(PUNCTUATION)
+        if text:
+            text += "\n" if rng.random() < 0.05 else " "
+        text += word
+
+    return text
+
+
+def make_session(rng: random.Random, text: str):
+    """Encode a simulated editing session of the text in the compact codec format."""
+    tokens = []
+
+    def delta(fast: bool = False):
+        if rng.random() < 0.03:
+            return "0"
+        return str(rng.randint(1, 40) if fast else rng.randint(40, 300))
+
+    position = 0  # Cursor position within the current word, which is cleared once it completes
+    for index, char in enumerate(text):
+        key = "⏎" if char == "\n" else char  # Newlines are recorded as ⏎
+        roll = rng.random()
+        if roll < 0.04:
+            # Fat finger: wrong key then the right key in quick succession, both erased and retyped
+            tokens.append(f"{delta()}+{rng.choice('asdfjkl;')}|")
+            tokens.append(f"{delta(fast=True)}+{key}|")
+            tokens.append(f"{delta()}<|")
+            tokens.append(f"{delta()}{rng.choice(['', 'X'])}<|")
+        elif roll < 0.08:
+            # Typo noticed a few characters late and corrected with backspaces
+            tokens.append(f"{delta()}+{rng.choice('qwertyuiop')}|")
+            extra = rng.randint(0, 2)
+            for _ in range(extra):
+                tokens.append(f"{delta()}+{rng.choice('zxcv ')}|")
+            for _ in range(extra + 1):
+                tokens.append(f"{delta()}{rng.choice(['', 'X'])}<|")
+        elif roll < 0.09:
+            # Redundant replace of an already typed character
+            tokens.append(f"{delta()}~{rng.randint(-1, position)}|")
+        elif roll < 0.1 and position:
+            # Selected everything typed so far in the word, deleted it and typed it again
+            tokens.append(f"{delta()}M-0,{position}|")
+            for retyped in text[index - position:index]:
+                tokens.append(f"{delta()}+{retyped}|")
+
+        roll = rng.random()
+        if roll < 0.03:
+            # Typed over a wrong character
+            tokens.append(f"{delta()}+{rng.choice('nm')}|")
+            tokens.append(f"{delta()}={position},{position + 1},{key}|")
+        elif roll < 0.04:
+            tokens.append(f"{delta()}^{key}:{rng.choice('kn')},{key}:{rng.randint(1, 50)},{rng.randint(1, 50)}|")
+        elif roll < 0.05:
+            tokens.append(f"{delta()}>{position},{key}|")
+        else:
+            tokens.append(f"{delta()}+{key}|")
+
+        position = 0 if char in " \n" else position + 1
+
+    session = "".join(tokens)
+    if rng.random() < 0.02:
+        session = session[:rng.randint(0, len(session))]
+
+    return [rng.choice([1, 2]), text, rng.choice([0, 1]), session]
+
+
+def load_database_samples():
+    from database.typegg import db
+
+    samples = []
+    for row in db.fetch("SELECT keystrokeData, compressed FROM keystrokes.keystroke_data"):
+        keystroke_data = row["keystrokeData"]
+        if row["compressed"]:
+            keystroke_data = zlib.decompress(keystroke_data)
+        samples.append(json.loads(keystroke_data))
+
+    return samples
+
+
+def run_processor(process, keystroke_data, is_multiplayer, reaction_time):
+    try:
+        return process(keystroke_data, is_multiplayer, reaction_time)
+    except Exception as e:
+        return type(e).__name__
+
+
+def compare(expected, actual):
+    """Returns the names of the fields that differ between the two results."""
+    if isinstance(expected, str) or isinstance(actual, str):
+        return [] if expected == actual else ["error"]
+
+    differences = []
+    for name in ["rawCharacterTimes", "wpmCharacterTimes", "keystrokeWpm", "keystrokeRawWpm"]:
+        if getattr(expected, name) != getattr(actual, name).tolist():
+            differences.append(name)
+    for name in ["raw_wpm", "wpm", "accuracy"]:
+        if getattr(expected, name) != getattr(actual, name):
+            differences.append(name)
+    if expected.typos != actual.typos:
+        differences.append("typos")
+
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the keystroke processors on a golden corpus.")
+    parser.add_argument("--sessions", type=int, default=5_000, help="Simulated editing sessions")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--skip-database", action="store_true", help="Only check simulated sessions")
+    args = parser.parse_args()
+
+    corpus = []
+    if not args.skip_database:
+        prepare_database(Scale(), regenerate=False)
+        move_legacy_keystrokes()
+        corpus += load_database_samples()
+
+    from utils.keystroke_codec import decode_keystroke_data, decode_keystroke_arrays
+    from utils.keystrokes import process_keystroke_data, process_keystroke_arrays
+
+    rng = random.Random(args.seed)
+    corpus += [make_session(rng, make_session_text(rng)) for _ in range(args.sessions)]
+
+    def process_objects(raw, is_multiplayer, reaction_time):
+        return process_keystroke_data(decode_keystroke_data(raw), is_multiplayer, reaction_time)
+
+    def process_arrays(raw, is_multiplayer, reaction_time):
+        return process_keystroke_arrays(decode_keystroke_arrays(raw), is_multiplayer, reaction_time)
+
+    checked = errors = 0
+    mismatches = []
+    for keystroke_data in corpus:
+        for is_multiplayer, reaction_time in [(False, 0), (True, 0), (True, rng.randint(100, 900))]:
+            expected = run_processor(process_objects, keystroke_data, is_multiplayer, reaction_time)
+            actual = run_processor(process_arrays, keystroke_data, is_multiplayer, reaction_time)
+            checked += 1
+            errors += isinstance(expected, str)
+
+            if differences := compare(expected, actual):
+                mismatches.append((keystroke_data, is_multiplayer, differences))
+
+    print(f"Checked {checked:,} runs ({errors:,} invalid), {len(mismatches):,} mismatches")
+    for keystroke_data, is_multiplayer, differences in mismatches[:10]:
+        print(f"  multiplayer={is_multiplayer} {', '.join(differences)}: {json.dumps(keystroke_data)[:200]}")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Load test the race importer against a replayed API cassette.
+
+Starts the replay server in-process, points the bot at it, imports each user into an
+empty temporary database and reports throughput alongside the server's request stats:
+
+    python benchmarks/load_import.py capture.jsonl.gz --latency 80 --rate-limit 0.02
+    python benchmarks/load_import.py capture.jsonl.gz user1 user2 --concurrency 2 --reject-excess
+
+Users default to everyone whose races appear in the cassette.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import unquote
+
+from aiohttp import web
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARK_DIR.parent / "src"))
+sys.path.insert(0, str(BENCHMARK_DIR))
+
+from replay import add_arguments, create_server  # noqa: E402
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_recorded_users(server):
+    """Returns the user IDs whose race pages were recorded."""
+    user_ids = set()
+    for key in server.responses:
+        path = json.loads(key)[1]
+        if match := re.fullmatch(r"/v1/users/([^/]+)/races", path):
+            user_ids.add(unquote(match.group(1)))
+
+    return sorted(user_ids)
+
+
+async def run_imports(server, user_ids: list[str], port: int, sequential: bool):
+    from commands.account import download
+    from database.typegg.db import get_row_count
+
+    runner = web.AppRunner(server.create_app())
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+
+    failures = {}
+
+    async def import_user(user_id):
+        try:
+            await download.run(user_id=user_id)
+        except Exception as e:
+            failures[user_id] = f"{type(e).__name__}: {e}"
+
+    start = time.perf_counter()
+    try:
+        if sequential:
+            for user_id in user_ids:
+                await import_user(user_id)
+        else:
+            await asyncio.gather(*(import_user(user_id) for user_id in user_ids))
+    finally:
+        elapsed = time.perf_counter() - start
+        await runner.cleanup()
+
+    return {
+        "users": len(user_ids),
+        "seconds": round(elapsed, 3),
+        "races": get_row_count("races"),
+        "races_per_second": round(get_row_count("races") / elapsed, 1),
+        "failures": failures,
+        "server": dict(server.stats),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the importer against a replayed cassette.")
+    add_arguments(parser)
+    parser.add_argument("users", nargs="*", help="User IDs to import (default: all recorded users)")
+    parser.add_argument("--sequential", action="store_true", help="Import users one at a time")
+    args = parser.parse_args()
+
+    server = create_server(args)
+    user_ids = args.users or get_recorded_users(server)
+    port = get_free_port()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ["DATA_DIR"] = data_dir
+        os.environ["API_URL"] = f"http://127.0.0.1:{port}"
+        os.environ.pop("API_CAPTURE_FILE", None)
+
+        results = asyncio.run(run_imports(server, user_ids, port, args.sequential))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
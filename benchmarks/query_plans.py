@@ -0,0 +1,263 @@
+"""
+Query plan audit for the TypeGG database.
+
+Calls every query function in database/typegg against a copy of the synthetic database,
+captures each distinct SQL statement they execute and prints its EXPLAIN QUERY PLAN.
+Exits non-zero if a statement falls back to a full scan of one of the large tables:
+
+    python benchmarks/query_plans.py
+    python benchmarks/query_plans.py --verbose
+
+Scans that are expected to read a whole table (global leaderboards and the like) are
+listed in ALLOWED_SCANS along with the reason.
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARK_DIR.parent / "src"))
+sys.path.insert(0, str(BENCHMARK_DIR))
+
+from run import move_legacy_keystrokes, prepare_database  # noqa: E402
+from synthetic import Scale  # noqa: E402
+
+LARGE_TABLES = {"races", "keystroke_data", "match_results", "matches", "daily_quote_results", "quote_leaderboards"}
+
+# (query name, table) -> why a full scan of the table is expected
+ALLOWED_SCANS = {
+    ("users.get_quote_chars_typed", "races"): "Global leaderboard over every user's races",
+    ("users.get_quotes_over_leaderboard", "races"): "Global leaderboard over every user's races",
+    ("users.get_quotes_over_leaderboard.raw", "races"): "Global leaderboard over every user's races",
+    ("users.get_quotes_over_leaderboard.quickplay", "match_results"): "Global leaderboard over every match result",
+    ("daily_quotes.get_daily_rank_leaderboard", "daily_quote_results"): "Global leaderboard over every daily result",
+    ("db.get_row_count", "races"): "Counts the whole table",
+    ("users.delete_user_data", "quote_leaderboards"): "Rebuilds the leaderboards of every quote the user typed",
+    ("users.delete_user_data", "races"): "Rebuilds the leaderboards of every quote the user typed",
+    ("quote_leaderboards.remove_user_from_leaderboards", "quote_leaderboards"): "Rebuilds the leaderboards of every quote the user typed",
+    ("quote_leaderboards.remove_user_from_leaderboards", "races"): "Rebuilds the leaderboards of every quote the user typed",
+}
+
+SCAN_PATTERN = re.compile(r"^SCAN (?:\w+\.)?(\w+)(?: USING (?:COVERING )?INDEX (\w+))?")
+ALIAS_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+AS)?\s+(\w+)", re.IGNORECASE)
+LITERAL_PATTERN = re.compile(r"x?'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+KEYWORDS = {"WHERE", "JOIN", "LEFT", "INNER", "CROSS", "ON", "GROUP", "ORDER", "LIMIT", "USING", "SET", "WINDOW"}
+
+
+def get_queries(user_id: str, opponent_id: str, quote_id: str, race_id: str):
+    """Returns (name, callable) pairs covering the query functions, with destructive ones last."""
+    from database.typegg import daily_quotes, db, keystroke_data, keystroke_jobs, match_results, quote_leaderboards, \
+        quote_search, quotes, race_rollups, races, segment_bests, sources, timings, users
+    from database.typegg.race_resolver import race_resolver
+    from utils.flags import Flags
+    from utils.keystroke_jobs import JOBS
+
+    def run(coroutine):
+        return asyncio.run(coroutine)
+
+    quickplay = Flags(gamemode="quickplay")
+    character_typos = JOBS["character_typos"]
+
+    return [
+        ("races.get_races", lambda: run(races.get_races(user_id))),
+        ("races.get_races.date_range", lambda: run(races.get_races(
+            user_id, start_date="2024-01-10 00:00:00.000Z", end_date="2024-01-20 00:00:00.000Z",
+        ))),
+        ("races.get_races.quote", lambda: run(races.get_races(user_id, quote_id=quote_id, get_keystrokes=True))),
+        ("races.get_races.historical_pbs", lambda: run(races.get_races(user_id, only_historical_pbs=True))),
+        ("races.get_races.solo", lambda: run(races.get_races(user_id, flags=Flags(gamemode="solo")))),
+        ("races.get_races.quickplay", lambda: run(races.get_races(user_id, flags=quickplay))),
+        ("races.get_races.language", lambda: run(races.get_races(user_id, flags=Flags(language="en")))),
+        ("races.get_latest_race", lambda: races.get_latest_race(user_id)),
+        ("races.get_race", lambda: races.get_race(user_id, 1)),
+        ("races.get_quote_race_counts", lambda: races.get_quote_race_counts(user_id)),
+        ("race_rollups.get_rollups", lambda: race_rollups.get_rollups(user_id, status="any")),
+        ("race_rollups.get_rollups.date_range", lambda: race_rollups.get_rollups(
+            user_id, start_date=1704850200000, end_date=1705710600000, solo=True,
+        )),
+        ("race_rollups.update_race_rollups", lambda: run(race_rollups.update_race_rollups([(user_id, 1705000000000)]))),
+        ("race_rollups.rebuild_race_rollups", lambda: race_rollups.rebuild_race_rollups([user_id])),
+        ("race_resolver.get_local_races", lambda: race_resolver._get_local_races(user_id, [1, 2, 3], get_match=True)),
+        ("segment_bests.get_segment_bests", lambda: segment_bests.get_segment_bests(user_id, quote_id)),
+        ("segment_bests.get_new_races", lambda: list(segment_bests.get_new_races(user_id, quote_id, 0))),
+        ("timings.update_timings", lambda: run(timings.update_timings(user_id))),
+        ("timings.get_timing", lambda: timings.get_timing(user_id, "bigram", "th")),
+        ("timings.get_ranked_timings", lambda: timings.get_ranked_timings(user_id, "word", 10)),
+        ("keystroke_data.get_keystroke_data", lambda: keystroke_data.get_keystroke_data(race_id)),
+        ("keystroke_data.get_keystroke_data_batch", lambda: keystroke_data.get_keystroke_data_batch([race_id])),
+        ("keystroke_jobs.get_progress", lambda: keystroke_jobs.get_progress(character_typos, user_id)),
+        ("keystroke_jobs.get_user_chunks", lambda: list(keystroke_jobs.get_user_chunks(user_id, 0, 200))),
+        ("keystroke_jobs.get_all_chunks", lambda: next(keystroke_jobs.get_all_chunks(0, 200), None)),
+        ("keystroke_data.get_uncompressed_count", lambda: keystroke_data.get_uncompressed_count()),
+        ("keystroke_data.compress_batch", lambda: keystroke_data.compress_batch()),
+        ("users.get_user", lambda: users.get_user(user_id)),
+        ("users.get_quote_bests", lambda: users.get_quote_bests(user_id)),
+        ("users.get_quote_bests.quote", lambda: users.get_quote_bests(user_id, quote_id=quote_id)),
+        ("users.get_quote_bests.quickplay", lambda: users.get_quote_bests(user_id, flags=quickplay)),
+        ("users.get_best_by_length", lambda: users.get_best_by_length(user_id)),
+        ("users.get_running_maximum_by_length", lambda: users.get_running_maximum_by_length(user_id)),
+        ("users.get_quote_chars_typed", lambda: users.get_quote_chars_typed()),
+        ("users.get_quotes_over_leaderboard", lambda: users.get_quotes_over_leaderboard(100)),
+        ("users.get_quotes_over_leaderboard.raw", lambda: users.get_quotes_over_leaderboard(100, flags=Flags(raw=True))),
+        ("users.get_quotes_over_leaderboard.quickplay", lambda: users.get_quotes_over_leaderboard(100, flags=quickplay)),
+        ("match_results.get_encounter_stats", lambda: match_results.get_encounter_stats(user_id, Flags())),
+        ("match_results.get_match_stats", lambda: match_results.get_match_stats(user_id, Flags())),
+        ("match_results.get_opponent_encounters", lambda: match_results.get_opponent_encounters(user_id, opponent_id, Flags())),
+        ("quote_leaderboards.get_quote_leaderboard", lambda: quote_leaderboards.get_quote_leaderboard(quote_id)),
+        ("quote_leaderboards.update_quote_leaderboards", lambda: quote_leaderboards.update_quote_leaderboards([quote_id])),
+        ("quotes.get_quotes", lambda: quotes.get_quotes()),
+        ("quotes.get_quote", lambda: quotes.get_quote(quote_id)),
+        ("quotes.is_quote_id", lambda: quotes.is_quote_id(quote_id)),
+        ("quotes.get_top_submitters", lambda: quotes.get_top_submitters()),
+        ("quotes.get_ranked_quote_count", lambda: quotes.get_ranked_quote_count()),
+        ("quotes.get_ranked_quote_chars", lambda: quotes.get_ranked_quote_chars()),
+        ("quote_search.search_quotes", lambda: quote_search.search_quotes("the")),
+        ("quote_search.search_quotes.filtered", lambda: quote_search.search_quotes("the", language="en", ranked=True)),
+        ("quote_search.index_quotes", lambda: quote_search.index_quotes([quote_id])),
+        ("sources.get_sources", lambda: sources.get_sources()),
+        ("daily_quotes.get_daily_quote_id", lambda: daily_quotes.get_daily_quote_id()),
+        ("daily_quotes.get_missing_days", lambda: daily_quotes.get_missing_days()),
+        ("daily_quotes.get_daily_rank_leaderboard", lambda: daily_quotes.get_daily_rank_leaderboard(3)),
+        ("daily_quotes.get_user_results", lambda: daily_quotes.get_user_results(user_id)),
+        ("daily_quotes.get_today_result", lambda: daily_quotes.get_today_result(user_id, quote_id)),
+        ("daily_quotes.get_user_ranks", lambda: daily_quotes.get_user_ranks(user_id)),
+        ("db.get_row_count", lambda: db.get_row_count("races")),
+        ("keystroke_data.delete_keystroke_data_batch", lambda: keystroke_data.delete_keystroke_data_batch([race_id])),
+        ("users.delete_user_data", lambda: users.delete_user_data(opponent_id)),
+        ("quote_leaderboards.remove_user_from_leaderboards",
+         lambda: quote_leaderboards.remove_user_from_leaderboards(user_id)),
+    ]
+
+
+def capture_statements(queries):
+    """Runs each query, returning one expanded statement per distinct template it executed, by query name."""
+    from database.typegg import db
+
+    captured = {}
+    current = []
+
+    def trace(statement: str):
+        statement = " ".join(statement.split())
+        if current and statement.split(" ", 1)[0].upper() in {"SELECT", "WITH", "UPDATE", "DELETE", "INSERT"}:
+            templates = captured.setdefault(current[0], {})
+            templates.setdefault(LITERAL_PATTERN.sub("?", statement), statement)
+
+    async def fetch_async(query, params=[]):
+        # Async reads open their own aiosqlite connection, so they are traced through the reader instead
+        return db.fetch(query, params)
+
+    db.fetch_async = fetch_async
+    db.reader.set_trace_callback(trace)
+    db.writer.connection.set_trace_callback(trace)
+
+    try:
+        for name, query in queries:
+            current[:] = [name]
+            query()
+    finally:
+        db.reader.set_trace_callback(None)
+        db.writer.connection.set_trace_callback(None)
+
+    return captured
+
+
+def get_aliases(sql: str):
+    """Returns the table each alias in the SQL refers to."""
+    aliases = {}
+    for table, alias in ALIAS_PATTERN.findall(sql):
+        if alias.upper() not in KEYWORDS:
+            aliases[alias] = table
+
+    return aliases
+
+
+def get_full_scans(plan: list[str], aliases: dict, partial_indexes: set):
+    """Returns the large tables a plan scans from start to end, with or without an index."""
+    tables = []
+    for detail in plan:
+        if (match := SCAN_PATTERN.match(detail)) and match.group(2) not in partial_indexes:
+            table = aliases.get(match.group(1), match.group(1))
+            if table in LARGE_TABLES:
+                tables.append(table)
+
+    return tables
+
+
+def copy_database(source: Path, destination: Path):
+    with sqlite3.connect(source) as source_connection, sqlite3.connect(destination) as destination_connection:
+        source_connection.backup(destination_connection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the query plans of the database functions.")
+    parser.add_argument("--verbose", action="store_true", help="Print every plan, not just full scans")
+    args = parser.parse_args()
+
+    prepare_database(Scale(), regenerate=False)
+
+    if "database.typegg.db" in sys.modules:
+        # Generating the database connected to it, so restart to run the destructive queries on a copy
+        os.execv(sys.executable, [sys.executable] + sys.argv)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        source_dir = Path(os.environ["DATA_DIR"])
+        for file_name in ["typegg.db", "keystrokes.db", "users.db"]:
+            if (source_dir / file_name).exists():
+                copy_database(source_dir / file_name, Path(data_dir) / file_name)
+        os.environ["DATA_DIR"] = data_dir
+        move_legacy_keystrokes()
+
+        from database.typegg import db
+
+        user_ids = [row["userId"] for row in db.fetch("""
+            SELECT userId FROM races
+            GROUP BY userId
+            ORDER BY COUNT(*) DESC
+            LIMIT 2
+        """)]
+        user_id, opponent_id = user_ids[0], user_ids[-1]
+        race = db.fetch_one("""
+            SELECT r.raceId, r.quoteId FROM races r
+            JOIN keystrokes.keystroke_data k ON k.raceId = r.raceId
+            WHERE r.userId = ?
+            LIMIT 1
+        """, [user_id])
+
+        captured = capture_statements(get_queries(user_id, opponent_id, race["quoteId"], race["raceId"]))
+        views = " ".join(row["sql"] for row in db.fetch("SELECT sql FROM sqlite_master WHERE type = 'view'"))
+        partial_indexes = {
+            row["name"] for schema in ["main", "keystrokes"]
+            for row in db.fetch(f"SELECT name, sql FROM {schema}.sqlite_master WHERE type = 'index' AND sql IS NOT NULL")
+            if " WHERE " in row["sql"].upper()
+        }
+
+        failures = []
+        for name, templates in captured.items():
+            for statement in templates.values():
+                plan = [row["detail"] for row in db.fetch(f"EXPLAIN QUERY PLAN {statement}")]
+                scans = get_full_scans(plan, get_aliases(f"{views} {statement}"), partial_indexes)
+                unexpected = [table for table in scans if (name, table) not in ALLOWED_SCANS]
+
+                if unexpected:
+                    failures.append((name, unexpected))
+
+                if args.verbose or unexpected:
+                    status = f"FULL SCAN of {", ".join(unexpected)}" if unexpected else "ok"
+                    print(f"{name} [{status}]\n    {statement[:160]}")
+                    for detail in plan:
+                        print(f"        {detail}")
+
+        statement_count = sum(len(statements) for statements in captured.values())
+        print(f"Checked {statement_count} statements from {len(captured)} queries, {len(failures)} full scans")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
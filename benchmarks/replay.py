@@ -0,0 +1,169 @@
+"""
+Local replay server for recorded TypeGG API traffic.
+
+Record a cassette by running the bot (or any API caller) with API_CAPTURE_FILE set,
+then serve it back with configurable latency, 429 injection and concurrency limits:
+
+    python benchmarks/replay.py capture.jsonl.gz --port 8899 --latency 80 --jitter 30 --rate-limit 0.02
+
+Point the bot at it with API_URL=http://127.0.0.1:8899. Requests are matched on method,
+path, query parameters and JSON body. Repeated requests are served the recorded responses
+in order, with the last one repeated once they run out.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from api.cassette import load_cassette, request_key  # noqa: E402
+
+
+class ReplayServer:
+    def __init__(
+        self,
+        cassette_path: str | Path,
+        latency: float = 0,
+        jitter: float = 0,
+        recorded_latency: bool = False,
+        rate_limit: float = 0,
+        concurrency: int = None,
+        reject_excess: bool = False,
+        seed: int = 1,
+    ):
+        """
+        Args:
+            latency (float): Mean response delay in milliseconds
+            jitter (float): Maximum random deviation from the mean delay in milliseconds
+            recorded_latency (bool): Replay the delays measured while recording instead
+            rate_limit (float): Probability of answering a request with a 429
+            concurrency (int, optional): Maximum number of requests handled at once
+            reject_excess (bool): Answer requests over the concurrency limit with a 429 instead of queueing them
+            seed (int): Seed for jitter and 429 injection
+        """
+        self.responses = {
+            key: [entry for entry in entries if entry["status"] != 429]
+            for key, entries in load_cassette(cassette_path).items()
+        }
+        self.positions = defaultdict(int)
+        self.latency = latency
+        self.jitter = jitter
+        self.recorded_latency = recorded_latency
+        self.rate_limit = rate_limit
+        self.concurrency = concurrency
+        self.reject_excess = reject_excess
+        self.random = random.Random(seed)
+        self.semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+        self.in_flight = 0
+        self.stats = Counter()
+
+    def create_app(self):
+        app = web.Application()
+        app.router.add_get("/_replay/stats", self.get_stats)
+        app.router.add_route("*", "/{path:.*}", self.handle)
+        return app
+
+    async def get_stats(self, _request: web.Request):
+        return web.json_response(dict(self.stats))
+
+    def next_response(self, key: str):
+        entries = self.responses.get(key)
+        if not entries:
+            return None
+
+        position = self.positions[key]
+        self.positions[key] += 1
+
+        return entries[min(position, len(entries) - 1)]
+
+    def get_delay(self, entry: dict):
+        if self.recorded_latency:
+            return entry["elapsed"] / 1000
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        return max(delay, 0) / 1000
+
+    async def handle(self, request: web.Request):
+        self.stats["requests"] += 1
+
+        if self.concurrency and self.reject_excess and self.in_flight >= self.concurrency:
+            self.stats["rejected"] += 1
+            return web.json_response({"message": "Too many concurrent requests."}, status=429)
+
+        if self.semaphore:
+            await self.semaphore.acquire()
+
+        self.in_flight += 1
+        self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.in_flight)
+        try:
+            return await self.respond(request)
+        finally:
+            self.in_flight -= 1
+            if self.semaphore:
+                self.semaphore.release()
+
+    async def respond(self, request: web.Request):
+        if self.rate_limit and self.random.random() < self.rate_limit:
+            self.stats["rate_limited"] += 1
+            return web.json_response({"message": "Rate limit exceeded."}, status=429)
+
+        text = await request.text()
+        json_data = json.loads(text) if text else None
+        key = request_key(request.method, request.rel_url.raw_path, dict(request.query), json_data)
+        entry = self.next_response(key)
+
+        if entry is None:
+            self.stats["misses"] += 1
+            return web.json_response({"message": "No recorded response for this request."}, status=404)
+
+        await asyncio.sleep(self.get_delay(entry))
+        self.stats["served"] += 1
+
+        return web.json_response(entry["body"], status=entry["status"])
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("cassette", type=Path, help="Cassette recorded with API_CAPTURE_FILE")
+    parser.add_argument("--latency", type=float, default=0, help="Mean response delay (ms)")
+    parser.add_argument("--jitter", type=float, default=0, help="Random deviation from the mean delay (ms)")
+    parser.add_argument("--recorded-latency", action="store_true", help="Replay the delays measured while recording")
+    parser.add_argument("--rate-limit", type=float, default=0, help="Probability of answering with a 429")
+    parser.add_argument("--concurrency", type=int, help="Maximum number of requests handled at once")
+    parser.add_argument("--reject-excess", action="store_true", help="Answer requests over the limit with a 429")
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def create_server(args: argparse.Namespace):
+    return ReplayServer(
+        args.cassette,
+        latency=args.latency,
+        jitter=args.jitter,
+        recorded_latency=args.recorded_latency,
+        rate_limit=args.rate_limit,
+        concurrency=args.concurrency,
+        reject_excess=args.reject_excess,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a recorded TypeGG API cassette.")
+    add_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    args = parser.parse_args()
+
+    server = create_server(args)
+    print(f"Replaying {sum(len(entries) for entries in server.responses.values()):,} responses")
+    web.run_app(server.create_app(), host=args.host, port=args.port)
+    print(json.dumps(dict(server.stats), indent=2))
+
+
+if __name__ == "__main__":
+    main()
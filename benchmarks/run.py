@@ -0,0 +1,220 @@
+"""
+Offline benchmark runner.
+
+Builds (or reuses) a synthetic typegg.db for the requested scale, times each registered
+case and writes the results as JSON. Pass a previous results file with --baseline
+to print the relative change of every case.
+
+Usage (from the repository root):
+    python benchmarks/run.py
+    python benchmarks/run.py --users 20 --races 5000 --baseline benchmarks/results/before.json
+"""
+
+import asyncio
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, fields
+from datetime import datetime, timezone
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCHMARK_DIR.parent
+SOURCE_DIR = ROOT_DIR / "src"
+
+sys.path.insert(0, str(SOURCE_DIR))
+sys.path.insert(0, str(BENCHMARK_DIR))
+
+from synthetic import Scale  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    for field in fields(Scale):
+        parser.add_argument(f"--{field.name}", type=type(field.default), default=field.default)
+    parser.add_argument("--cases", nargs="*", help="Only run cases starting with any of these prefixes")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs per case")
+    parser.add_argument("--regenerate", action="store_true", help="Rebuild the synthetic database")
+    parser.add_argument("--output", type=Path, help="Results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", type=Path, help="Previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change reported as a regression")
+
+    return parser.parse_args()
+
+
+def prepare_database(scale: Scale, regenerate: bool):
+    """Point the bot at the synthetic data directory for this scale, generating it if needed."""
+    data_dir = BENCHMARK_DIR / "data" / scale.key
+    database_path = data_dir / "typegg.db"
+
+    if regenerate and data_dir.exists():
+        for file in data_dir.iterdir():
+            file.unlink()
+
+    exists = database_path.exists()
+    data_dir.mkdir(parents=True, exist_ok=True)
+    os.environ["DATA_DIR"] = str(data_dir)
+
+    if not exists:
+        from synthetic import generate
+
+        print(f"Generating synthetic database at {data_dir}...")
+        start = time.perf_counter()
+        generate(scale)
+        print(f"Generated in {time.perf_counter() - start:,.1f}s\n")
+
+
+def move_legacy_keystrokes():
+    """Finish moving keystroke data out of databases generated before it was split into keystrokes.db."""
+    from database.typegg import keystroke_data
+
+    async def move():
+        while keystroke_data.legacy_table:
+            await keystroke_data.move_legacy_batch(10_000)
+
+    asyncio.run(move())
+
+
+def time_case(func, fixture, repeat: int, warmup: int):
+    """Returns the timings (seconds) of a case's timed callable."""
+    timed = func(fixture)
+
+    for _ in range(warmup):
+        timed()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        timed()
+        timings.append(time.perf_counter() - start)
+
+    return timings
+
+
+def summarize(timings: list[float]):
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0,
+        "runs": len(timings),
+    }
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_duration(seconds: float):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:,.1f}µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:,.2f}ms"
+    return f"{seconds:,.3f}s"
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """Print the relative change of each case against a baseline, returning the regressed cases."""
+    regressions = []
+    print(f"\nCompared to {baseline["meta"].get("commit") or "baseline"}:")
+
+    for name, result in results["cases"].items():
+        previous = baseline["cases"].get(name)
+        if not previous or "error" in result or "error" in previous:
+            continue
+
+        change = result["median"] / previous["median"] - 1
+        marker = ""
+        if change > threshold:
+            marker = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            marker = "  improved"
+
+        print(
+            f"  {name:<32} {format_duration(previous["median"]):>12} -> "
+            f"{format_duration(result["median"]):>12} ({change:+.1%}){marker}"
+        )
+
+    return regressions
+
+
+def main():
+    args = parse_args()
+    scale = Scale(**{field.name: getattr(args, field.name) for field in fields(Scale)})
+    prepare_database(scale, args.regenerate)
+    move_legacy_keystrokes()
+
+    from cases import CASES, Fixture
+
+    selected = {
+        name: func for name, func in CASES.items()
+        if not args.cases or any(name.startswith(prefix) for prefix in args.cases)
+    }
+
+    results = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "commit": get_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": asdict(scale),
+            "repeat": args.repeat,
+        },
+        "cases": {},
+    }
+
+    fixture = Fixture()
+    cwd = os.getcwd()
+
+    # Graphs write their images to the working directory
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        try:
+            for name, func in selected.items():
+                try:
+                    timings = time_case(func, fixture, args.repeat, args.warmup)
+                except Exception as e:
+                    results["cases"][name] = {"error": f"{type(e).__name__}: {e}"}
+                    print(f"  {name:<32} failed: {type(e).__name__}: {e}")
+                    continue
+
+                summary = summarize(timings)
+                results["cases"][name] = summary
+                print(
+                    f"  {name:<32} {format_duration(summary["median"]):>12} median "
+                    f"{format_duration(summary["min"]):>12} min"
+                )
+        finally:
+            os.chdir(cwd)
+            fixture.close()
+
+    output = args.output or BENCHMARK_DIR / "results" / f"{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline["meta"]["scale"] != results["meta"]["scale"]:
+            print("Warning: baseline was recorded at a different scale")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""Synthetic TypeGG data generation, inserted through the bot's own database helpers."""
+
+import asyncio
+import random
+import string
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+
+WORDS = (
+    "the of and to in is you that it he was for on are as with his they at be this have from or one had by "
+    "word but not what all were we when your can said there use an each which she do how their if will up "
+    "other about out many then them these so some her would make like him into time has look two more write "
+    "go see number no way could people my than first water been call who oil its now find long down day did "
+    "get come made may part over new sound take only little work know place year live me back give most very "
+    "after thing our just name good sentence man think say great where help through much before line right "
+    "too mean old any same tell boy follow came want show also around form three small set put end does "
+    "another well large must big even such because turn here why ask went men read need land different home "
+    "us move try kind hand picture again change off play spell air away animal house point page letter "
+    "mother answer found study still learn should America world high every near add food between own below "
+    "country plant last school father keep tree never start city earth eye light thought head under story "
+    "saw left don't few while along might close something seem next hard open example begin life always"
+).split()
+PUNCTUATION = [",", ".", ";", "!", "?"]
+LANGUAGES = ["English"] * 8 + ["Spanish", "French"]
+BOT_NAMES = ["Eggbot", "Yolkbot", "Shellbot"]
+START_DATE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass
+class Scale:
+    users: int = 10
+    races: int = 2_000  # Races per user
+    quotes: int = 1_000
+    matches: float = 0.3  # Fraction of races played in multiplayer matches
+    keystrokes: float = 0.1  # Fraction of races with stored keystroke data
+    legacy: float = 0.2  # Fraction of keystroke blobs stored in the legacy format
+    compressed: float = 0.5  # Fraction of keystroke blobs stored zlib compressed
+    seed: int = 1
+
+    @property
+    def key(self):
+        """Returns a directory-safe name identifying this scale."""
+        return (
+            f"u{self.users}_r{self.races}_q{self.quotes}_m{self.matches:g}"
+            f"_k{self.keystrokes:g}_l{self.legacy:g}_c{self.compressed:g}_s{self.seed}"
+        )
+
+
+def format_timestamp(date: datetime):
+    """Format a datetime the way the API returns race timestamps."""
+    return date.strftime("%Y-%m-%dT%H:%M:%S.") + f"{date.microsecond // 1000:03d}Z"
+
+
+def make_text(rng: random.Random, length: int):
+    """Returns a quote-like sentence of roughly the given length."""
+    words = []
+    total = 0
+    while total < length:
+        word = rng.choice(WORDS)
+        if rng.random() < 0.1:
+            word = word.capitalize()
+        if rng.random() < 0.08:
+            word += rng.choice(PUNCTUATION)
+        words.append(word)
+        total += len(word) + 1
+
+    return " ".join(words) + "."
+
+
+def make_source(index: int):
+    return {
+        "sourceId": f"source{index}",
+        "title": f"Synthetic Source {index}",
+        "author": f"Author {index % 37}",
+        "type": "book",
+        "thumbnailUrl": "",
+        "publicationYear": 1900 + index % 120,
+    }
+
+
+def make_quote(rng: random.Random, index: int, source_count: int):
+    length = int(min(max(rng.lognormvariate(5, 0.6), 20), 2_000))
+    ranked = rng.random() < 0.9
+
+    return {
+        "quoteId": f"quote{index}",
+        "sourceId": f"source{index % source_count}",
+        "text": make_text(rng, length),
+        "explicit": False,
+        "difficulty": round(rng.uniform(1, 12), 2),
+        "complexity": round(rng.uniform(0, 1), 3),
+        "submittedByUsername": f"submitter{index % 50}",
+        "ranked": ranked,
+        "created": format_timestamp(START_DATE - timedelta(days=index % 365)),
+        "language": rng.choice(LANGUAGES) if not ranked else "English",
+        "formatting": None,
+    }
+
+
+def make_keystroke_data(rng: random.Random, text: str, wpm: float, version: int, typo_rate: float = 0.03):
+    """Encode a plausible run of the text in the compact keystroke codec format."""
+    mean_delta = 12000 / max(wpm, 10)
+    tokens = []
+
+    def delta():
+        return max(int(rng.gauss(mean_delta, mean_delta / 3)), 1)
+
+    for char in text:
+        if rng.random() < typo_rate:
+            wrong = rng.choice(string.ascii_lowercase)
+            if wrong != char:
+                tokens.append(f"{delta()}+{wrong}|")
+                tokens.append(f"{delta()}<|")
+        tokens.append(f"{delta()}+{char}|")
+
+    return [version, text, 0, "".join(tokens)]
+
+
+def to_legacy_format(raw: list):
+    """Convert compact keystroke data to the legacy dictionary format."""
+    from utils.keystroke_codec import decode_keystroke_data
+
+    decoded = decode_keystroke_data(raw)
+    return {
+        "text": decoded.text,
+        "isStickyStart": decoded.isStickyStart,
+        "keystrokes": [{
+            "action": {key: value for key, value in asdict(keystroke.action).items() if value is not None},
+            "time": keystroke.time,
+            "timeDelta": keystroke.timeDelta,
+        } for keystroke in decoded.keystrokes],
+    }
+
+
+def make_race(rng: random.Random, user: dict, quote: dict, race_number: int, timestamp: datetime):
+    wpm = max(rng.gauss(user["skill"], user["skill"] / 8), 10)
+    raw_wpm = wpm * rng.uniform(1, 1.15)
+    pp_ratio = quote["difficulty"] / 5 if quote["ranked"] else 0
+
+    return {
+        "raceId": f"{user["userId"]}-{race_number}",
+        "quoteId": quote["quoteId"],
+        "userId": user["userId"],
+        "matchId": None,
+        "raceNumber": race_number,
+        "pp": wpm * pp_ratio,
+        "rawPp": raw_wpm * pp_ratio,
+        "wpm": wpm,
+        "rawWpm": raw_wpm,
+        "duration": len(quote["text"]) * 12000 / wpm,
+        "accuracy": rng.uniform(0.9, 1),
+        "errorReactionTime": rng.uniform(100, 500),
+        "errorRecoveryTime": rng.uniform(200, 900),
+        "timestamp": format_timestamp(timestamp),
+        "stickyStart": False,
+    }
+
+
+def make_match(rng: random.Random, race: dict, users: list[dict], timestamp: datetime):
+    """Returns a match and its player results, with the racer plus random opponents and bots."""
+    match_id = f"match-{race["raceId"]}"
+    gamemode = "quickplay" if rng.random() < 0.85 else "lobby"
+    opponents = rng.sample([u for u in users if u["userId"] != race["userId"]], k=min(rng.randint(1, 4), len(users) - 1))
+    players = []
+
+    racers = [(race["userId"], None, race["wpm"], race["raceNumber"])]
+    racers += [(opponent["userId"], None, max(rng.gauss(opponent["skill"], 10), 10), None) for opponent in opponents]
+    if rng.random() < 0.3:
+        racers.append((None, rng.choice(BOT_NAMES), rng.uniform(60, 150), None))
+
+    for user_id, bot_id, wpm, race_number in racers:
+        completion_type = "finished" if user_id == race["userId"] or rng.random() < 0.9 else "dnf"
+        players.append({
+            "matchId": match_id,
+            "userId": user_id,
+            "botId": bot_id,
+            "username": user_id or bot_id,
+            "raceNumber": race_number,
+            "matchWpm": wpm if completion_type == "finished" else 0,
+            "rawMatchWpm": wpm * 1.05 if completion_type == "finished" else 0,
+            "matchPp": race["pp"] if user_id == race["userId"] else 0,
+            "rawMatchPp": race["rawPp"] if user_id == race["userId"] else 0,
+            "startTime": rng.randint(0, 600),
+            "accuracy": rng.uniform(0.9, 1),
+            "placement": 0,
+            "completionType": completion_type,
+            "timestamp": format_timestamp(timestamp),
+        })
+
+    players.sort(key=lambda p: -p["matchWpm"])
+    for placement, player in enumerate(players, 1):
+        player["placement"] = placement
+
+    match = {
+        "matchId": match_id,
+        "quoteId": race["quoteId"],
+        "startTime": format_timestamp(timestamp - timedelta(seconds=race["duration"] / 1000)),
+        "gamemode": gamemode,
+        "players": len(players),
+    }
+
+    return match, players
+
+
+async def write_batch(races: list, keystroke_races: list, matches: list, match_results: list):
+    """Insert a batch of generated rows, the same way the importer writes a page."""
+    from database.typegg.keystroke_data import add_keystroke_data
+    from database.typegg.match_results import add_match_results
+    from database.typegg.matches import add_matches
+    from database.typegg.races import add_races
+
+    await asyncio.gather(
+        add_races(races),
+        add_keystroke_data(keystroke_races),
+        add_matches(matches),
+        add_match_results(match_results),
+    )
+
+
+def generate(scale: Scale):
+    """Populate the configured typegg.db with synthetic sources, quotes, users, races, matches and keystrokes."""
+    from database.typegg.keystroke_data import compress_batch
+    from database.typegg.quote_leaderboards import update_quote_leaderboards
+    from database.typegg.quotes import add_quotes
+    from database.typegg.sources import add_sources
+    from database.typegg.users import create_user
+
+    rng = random.Random(scale.seed)
+
+    source_count = max(scale.quotes // 10, 1)
+    add_sources([make_source(i) for i in range(source_count)])
+
+    quotes = [make_quote(rng, i, source_count) for i in range(scale.quotes)]
+    add_quotes(quotes)
+
+    users = [{
+        "userId": f"user{i}",
+        "username": f"user{i}",
+        "country": rng.choice(["US", "GB", "DE", "FR", None]),
+        "skill": rng.uniform(60, 180),
+    } for i in range(scale.users)]
+
+    for user in users:
+        create_user(user)
+
+    keystroke_count = 0
+    batch_size = 10_000
+
+    for user in users:
+        timestamp = START_DATE + timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+        favorite_quotes = rng.sample(quotes, k=min(50, len(quotes)))
+        races, keystroke_races, matches, match_results = [], [], [], []
+
+        for race_number in range(1, scale.races + 1):
+            timestamp += timedelta(seconds=rng.randint(20, 60 * 60 * 6))
+            quote = rng.choice(favorite_quotes) if rng.random() < 0.3 else rng.choice(quotes)
+            race = make_race(rng, user, quote, race_number, timestamp)
+
+            if rng.random() < scale.matches:
+                match, players = make_match(rng, race, users, timestamp)
+                race["matchId"] = match["matchId"]
+                matches.append(match)
+                match_results.extend(players)
+
+            if rng.random() < scale.keystrokes:
+                keystroke_data = make_keystroke_data(rng, quote["text"], race["wpm"], rng.choice([1, 2]))
+                if rng.random() < scale.legacy:
+                    keystroke_data = to_legacy_format(keystroke_data)
+                race["keystrokeData"] = keystroke_data
+                keystroke_races.append(race)
+
+            races.append(race)
+
+            if len(races) >= batch_size or race_number == scale.races:
+                asyncio.run(write_batch(races, keystroke_races, matches, match_results))
+                keystroke_count += len(keystroke_races)
+                races, keystroke_races, matches, match_results = [], [], [], []
+
+    compress_batch(int(keystroke_count * scale.compressed))
+    update_quote_leaderboards([quote["quoteId"] for quote in quotes])
+
+    return users, quotes
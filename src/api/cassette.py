@@ -0,0 +1,66 @@
+import atexit
+import gzip
+import json
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl
+
+
+def request_key(method: str, path: str, params: dict, json_data: dict = None):
+    """Returns a stable key identifying a request, independent of the API host."""
+    return json.dumps([
+        method.upper(),
+        path,
+        {key: str(value) for key, value in params.items()},
+        json_data or None,
+    ], sort_keys=True, separators=(",", ":"))
+
+
+class Cassette:
+    """Records API request/response pairs as gzipped JSON lines."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.file = None
+
+    def record(
+        self,
+        method: str,
+        url: str,
+        params: dict,
+        json_data: dict,
+        status: int,
+        body: dict,
+        elapsed: float,
+    ):
+        if self.file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.file = gzip.open(self.path, "at", encoding="utf-8")
+            atexit.register(self.close)
+
+        parts = urlsplit(url)
+        entry = {
+            "key": request_key(method, parts.path, dict(parse_qsl(parts.query)) | params, json_data),
+            "status": status,
+            "elapsed": round(elapsed * 1000, 1),
+            "body": body,
+        }
+        self.file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def load_cassette(path: str | Path):
+    """Returns recorded responses grouped by request key, in the order they were recorded."""
+    responses = defaultdict(list)
+
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        for line in file:
+            entry = json.loads(line)
+            responses[entry["key"]].append(entry)
+
+    return dict(responses)
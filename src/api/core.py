@@ -1,9 +1,11 @@
 import asyncio
 import os
+import time
 
 import aiohttp
 from aiohttp import ContentTypeError
 
+from api.cassette import Cassette
 from config import SECRET
 from utils.errors import APIError
 from utils.logging import log
@@ -13,6 +15,10 @@ AUTH_HEADERS = {
     "Authorization": SECRET,
 }
 
+# Set API_CAPTURE_FILE to record all API traffic for offline replay
+CAPTURE_FILE = os.getenv("API_CAPTURE_FILE")
+cassette = Cassette(CAPTURE_FILE) if CAPTURE_FILE else None
+
 
 def get_params(raw_params):
     """Prepare and return API parameters."""
@@ -49,6 +55,7 @@ async def request(
     method = method.lower()
 
     async def do_request():
+        start = time.perf_counter()
         async with aiohttp.ClientSession() as session:
             async with session.request(
                 method,
@@ -64,6 +71,10 @@ async def request(
                 except ContentTypeError:
                     raise APIError(response.status, "TypeGG is likely down, try again later.")
 
+                if cassette:
+                    elapsed = time.perf_counter() - start
+                    cassette.record(method, url, params, json_data, status, json, elapsed)
+
                 return status, json, message
 
     status, json, message = await do_request()
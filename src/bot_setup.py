@@ -8,7 +8,8 @@ from discord.ext import commands
 
 from config import BOT_PREFIX, STAGING, STATS_CHANNEL_ID, TYPEGG_GUILD_ID, CHAT_CHANNEL_UNIVERSES, SITE_CHAT_URL, \
     SECRET, EIKO, KEEGAN
-from database.bot.users import get_user, update_commands, get_user_ids, get_all_command_usage
+from database.bot.command_usage import record_command, get_total_command_count
+from database.bot.users import get_user, get_user_ids
 from database.typegg.quotes import is_quote_id
 from utils.dates import is_date_like, parse_date
 from utils.errors import BotLocked, UserBanned, InvalidNumber
@@ -20,7 +21,7 @@ from utils.urls import parse_solo_url
 from web_server.utils import assign_user_roles
 
 users = get_user_ids()
-total_commands = sum(get_all_command_usage().values())
+total_commands = get_total_command_count()
 
 _locked = False
 
@@ -290,7 +291,7 @@ def register_bot_checks(bot):
         global total_commands
 
         command_origin = "server" if ctx.guild else "dm"
-        update_commands(ctx.author.id, ctx.command.name, command_origin)
+        record_command(ctx.author.id, ctx.command.name, command_origin)
 
         total_commands += 1
         if total_commands % 50_000 == 0:
@@ -2,7 +2,8 @@ from discord.ext import commands
 
 from bot_setup import BotContext
 from commands.base import Command
-from database.bot.users import get_command_usage_by_user, get_top_users_by_command_usage, get_all_command_usage, get_command_usage
+from database.bot.command_usage import get_command_leaderboard, get_top_users_by_command_usage, get_all_command_usage, \
+    get_command_usage, get_total_command_count
 from utils.errors import UnknownCommand, BotUserNotFound, UserNotAdmin
 from utils.files import get_command_modules
 from utils.messages import Page, Message
@@ -56,19 +57,12 @@ class CommandLeaderboard(Command):
 
 async def command_leaderboard(ctx: BotContext, command_name: str):
     """Display a leaderboard of users by usage count for a given command."""
-    all_commands = get_command_usage_by_user()
-
-    command_usage = [user for user in all_commands if command_name in user["commands"]]
-    total_usages = sum(user["commands"][command_name] for user in command_usage)
-    sorted_usage = sorted(
-        command_usage,
-        key=lambda user: user["commands"][command_name],
-        reverse=True,
-    )
+    top_users = get_command_leaderboard(command_name, limit=10)
+    total_usages = get_all_command_usage().get(command_name, 0)
 
     description_lines = [
-        f"{i + 1}. <@{user["discord_id"]}> - {user["commands"][command_name]:,}"
-        for i, user in enumerate(sorted_usage[:10])
+        f"{i + 1}. <@{user["discord_id"]}> - {user["count"]:,}"
+        for i, user in enumerate(top_users)
     ]
     description = "\n".join(description_lines) or ""
 
@@ -85,10 +79,9 @@ async def command_leaderboard(ctx: BotContext, command_name: str):
 
 def format_user_leaderboard(top_users: list[dict]):
     description = "**Overall**\n\n"
-    total_usages = sum(user["total_commands"] for user in top_users)
     for i, user in enumerate(top_users[:20]):
         description += f"{i + 1}. <@{user['discord_id']}> - {user['total_commands']:,}\n"
-    return description, total_usages
+    return description
 
 
 def format_command_leaderboard(command_usage: dict, discord_id: int | str):
@@ -105,9 +98,9 @@ async def user_command_leaderboard(ctx: BotContext, discord_id: int | str):
     """Display a leaderboard of command usage count by user, or overall."""
     if discord_id == "users":
         title = "Top Command Users"
-        top_users = get_top_users_by_command_usage()
-        description, total_usages = format_user_leaderboard(top_users)
-        footer_text = f"Total Usages: {total_usages:,}\nTotal Users: {len(top_users):,}"
+        top_users, user_count = get_top_users_by_command_usage(limit=20)
+        description = format_user_leaderboard(top_users)
+        footer_text = f"Total Usages: {get_total_command_count():,}\nTotal Users: {user_count:,}"
     else:
         title = "Most Used Commands"
         if discord_id == "all":
@@ -8,17 +8,14 @@ from api.sources import get_source
 from api.users import get_races, get_profile
 from bot_setup import BotContext
 from commands.base import Command
-from database.typegg.keystroke_data import add_keystroke_data
-from database.typegg.match_results import add_match_results
-from database.typegg.matches import add_matches
 from database.typegg.quotes import get_quotes, add_quote
-from database.typegg.races import add_races, get_latest_race
+from database.typegg.races import store_races, get_latest_race
 from database.typegg.sources import get_sources, add_source
+from database.typegg.timings import schedule_timing_update
 from database.typegg.users import get_user, create_user
-from utils.dates import string_to_date, date_to_string, epoch, parse_date
+from utils.dates import string_to_date, date_to_string, epoch
 from utils.logging import log
 from utils.messages import Page, Message
-from utils.stats import calculate_duration
 from utils.strings import escape_formatting, LOADING
 
 info = {
@@ -148,16 +145,12 @@ async def run(
                 get_keystrokes=True,
             )
             race_list = results["races"]
-            race_list_no_dnf = []
 
             if not race_list:
                 break
 
             log(f"Fetched races {race_list[0]["raceNumber"] or "DNF"} - {race_list[-1]["raceNumber"] or "DNF"}")
 
-            match_list = []
-            match_result_list = []
-
             for race in race_list:
                 quote_id = race["quoteId"]
 
@@ -165,29 +158,6 @@ async def run(
                     new_quote_ids.add(quote_id)
                     quote_ids.add(quote_id)
 
-                if race["completionType"] == "finished":
-                    race_list_no_dnf.append(race)
-
-                match = race.get("match")
-
-                if match:
-                    race["matchId"] = match["matchId"]
-                    players = match["players"]
-                    match["players"] = len(players)
-                    match["gamemode"] = race["gamemode"]
-                    match["quoteId"] = quote_id
-                    match_list.append(match)
-
-                    for player in players:
-                        player["matchId"] = match["matchId"]
-                        wpm_ratio = (player["rawMatchWpm"] or 0) / (player["matchWpm"] or 1)
-                        player["rawMatchPp"] = player.get("matchPp", 0) * (wpm_ratio or 1)
-                        start_timestamp = match["startTime"]
-                        duration = calculate_duration(player["matchWpm"], player["charactersTyped"])
-                        end_timestamp = parse_date(start_timestamp) + relativedelta(microseconds=duration * 1000)
-                        player["timestamp"] = date_to_string(end_timestamp)
-                        match_result_list.append(player)
-
             if new_quote_ids:
                 new_quote_count = len(new_quote_ids)
                 title = f"New Quote Import {LOADING}"
@@ -207,15 +177,7 @@ async def run(
 
                 await import_new_quotes(list(new_quote_ids))
 
-            keystroke_races = [
-                race for race in race_list_no_dnf
-                if race.get("keystrokeData")
-            ]
-
-            add_races(race_list_no_dnf)
-            add_keystroke_data(keystroke_races)
-            add_matches(match_list)
-            add_match_results(match_result_list)
+            await store_races(race_list)
 
             start_date = string_to_date(race_list[-1]["timestamp"]) + relativedelta(microseconds=1000)
 
@@ -230,6 +192,9 @@ async def run(
             page.title = "New Quotes Import"
             page.description = "Finished adding new quotes"
             await message.edit()
+
+        # Left until after the import is reported, since a first import decodes the user's whole history
+        schedule_timing_update(user_id)
     finally:
         _active_imports.discard(user_id)
 
@@ -1,9 +1,8 @@
-import json
-
 from discord.ext import commands
 
 from bot_setup import BotContext
 from commands.base import Command
+from database.bot.command_usage import get_command_usage
 from database.bot.users import get_user, get_user_by_user_id
 from utils.errors import ProfileNotFound, BotError
 from utils.messages import Page, Message
@@ -82,7 +81,7 @@ async def run(ctx: BotContext, bot_profile: dict = None, site_profile: dict = No
         description += "### TypeGG: Account not linked\n"
 
     if bot_profile:
-        commands_used = json.loads(bot_profile["commands"])["counts"]
+        commands_used = get_command_usage(bot_profile["discordId"])
         top_commands = sorted(commands_used.items(), key=lambda x: -x[1])
         total_commands = sum([c[1] for c in top_commands])
         top_commands_str = "".join([f"{i + 1}. {c[0]} ({c[1]:,})\n" for i, c in enumerate(top_commands[:3])])
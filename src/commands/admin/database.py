@@ -3,8 +3,13 @@ from discord.ext import commands
 from bot_setup import BotContext
 from commands.base import Command
 from commands.checks import is_bot_owner
-from database.typegg.db import get_row_count
-from utils.messages import Page, Message
+from database.bot.users import user_cache
+from database.typegg.db import get_row_count, writer
+from database.typegg.maintenance import get_storage_stats, last_maintenance, last_integrity_check
+from database.typegg.race_resolver import race_resolver
+from utils.keystrokes import keystroke_cache
+from utils.messages import Page, Message, Field
+from utils.strings import discord_date, format_file_size
 
 info = {
     "name": "database",
@@ -24,6 +29,45 @@ class Database(Command):
         quote_rows = get_row_count("quotes")
         source_rows = get_row_count("sources")
 
+        storage_fields = []
+        for title, schema in [("Storage", "main"), ("Keystroke Storage", "keystrokes")]:
+            storage = get_storage_stats(schema)
+            free_size = storage["freelist_count"] * storage["page_size"]
+            storage_fields.append(Field(
+                title=title,
+                content=(
+                    f"**File Size:** {format_file_size(storage["file_size"])}\n"
+                    f"**Pages:** {storage["page_count"]:,} ({format_file_size(storage["page_size"])})\n"
+                    f"**Free Pages:** {storage["freelist_count"]:,} ({format_file_size(free_size)})\n"
+                    f"**WAL Size:** {format_file_size(storage["wal_size"])}\n"
+                    f"**Auto Vacuum:** {storage["auto_vacuum"].title()}"
+                ),
+                inline=True,
+            ))
+
+        if last_maintenance:
+            maintenance = (
+                f"**Last Run:** {discord_date(last_maintenance["date"].timestamp())}\n"
+                f"**Duration:** {last_maintenance["duration"]:,.1f}s\n"
+                f"**Pages Released:** {last_maintenance["released_pages"]:,}\n"
+            )
+            if last_maintenance["wal_busy"]:
+                maintenance += "**WAL Truncate:** Blocked by readers\n"
+        else:
+            maintenance = "Not run since restart\n"
+
+        if last_integrity_check:
+            problems = last_integrity_check["problems"]
+            maintenance += (
+                f"**Integrity:** {f"{len(problems):,} problems" if problems else "OK"} "
+                f"({discord_date(last_integrity_check["date"].timestamp())})"
+            )
+
+        cache = keystroke_cache.stats()
+        users = user_cache.stats()
+        writes = writer.stats()
+        resolver = race_resolver.stats()
+
         page = Page(
             title="Database Stats",
             description=(
@@ -32,6 +76,54 @@ class Database(Command):
                 f"**Quotes:** {quote_rows:,}\n"
                 f"**Sources:** {source_rows:,}\n"
             ),
+            fields=storage_fields + [
+                Field(
+                    title="Maintenance",
+                    content=maintenance,
+                    inline=True,
+                ),
+                Field(
+                    title="Writes",
+                    content=(
+                        f"**Jobs:** {writes["jobs"]:,} ({writes["failures"]:,} failed)\n"
+                        f"**Commits:** {writes["commits"]:,} ({writes["jobs_per_commit"]:,.2f} jobs each)\n"
+                        f"**Largest Group:** {writes["largest_group"]:,}\n"
+                        f"**Queued:** {writes["queued"]:,} ({writes["full_waits"]:,} full waits)\n"
+                        f"**Latency:** {writes["latency_p50"] * 1000:,.1f}ms p50, "
+                        f"{writes["latency_p99"] * 1000:,.1f}ms p99"
+                    ),
+                    inline=True,
+                ),
+                Field(
+                    title="Keystroke Cache",
+                    content=(
+                        f"**Entries:** {cache["entries"]:,}\n"
+                        f"**Size:** {format_file_size(cache["bytes"])} / {format_file_size(cache["max_bytes"])}\n"
+                        f"**Hit Rate:** {cache["hit_rate"]:.1%} ({cache["hits"]:,} hits)\n"
+                        f"**Evictions:** {cache["evictions"]:,}"
+                    ),
+                    inline=True,
+                ),
+                Field(
+                    title="User Cache",
+                    content=(
+                        f"**Entries:** {users["entries"]:,} / {users["max_entries"]:,}\n"
+                        f"**Hit Rate:** {users["hit_rate"]:.1%} ({users["hits"]:,} hits)\n"
+                        f"**Evictions:** {users["evictions"]:,}"
+                    ),
+                    inline=True,
+                ),
+                Field(
+                    title="Race Resolver",
+                    content=(
+                        f"**Local Hit Rate:** {resolver["hit_rate"]:.1%} ({resolver["local_hits"]:,} races)\n"
+                        f"**API Races:** {resolver["api_hits"]:,} ({resolver["api_requests"]:,} requests)\n"
+                        f"**Stored:** {resolver["stored"]:,}\n"
+                        f"**Match Misses:** {resolver["match_misses"]:,}"
+                    ),
+                    inline=True,
+                ),
+            ],
         )
 
         message = Message(ctx, page=page)
@@ -3,7 +3,7 @@ from discord.ext import commands
 from bot_setup import BotContext
 from commands.base import Command
 from commands.checks import is_bot_owner
-from database.bot.users import migrate_command_name
+from database.bot.command_usage import rename_command
 from utils.messages import Page, Message
 
 info = {
@@ -25,13 +25,13 @@ class RenameCommand(Command):
 
 
 async def run(ctx: BotContext, old_name: str, new_name: str):
-    affected = migrate_command_name(old_name, new_name)
+    affected = rename_command(old_name, new_name)
 
     message = Message(ctx, Page(
         title="Command Renamed",
         description=(
             f"Migrated `{old_name}` → `{new_name}`\n"
-            f"Updated **{affected:,}** user record{'s' if affected != 1 else ''}."
+            f"Updated **{affected:,}** user{'s' if affected != 1 else ''}."
         ),
     ))
 
@@ -54,7 +54,9 @@ async def run(ctx: BotContext, daily_quote: dict):
         scores = []
         for score in entries:
             score = dict(score)
-            score["keystroke_wpm"] = get_keystroke_data(score["keystrokeData"]).keystrokeWpm
+            score["keystroke_wpm"] = get_keystroke_data(
+                score["keystrokeData"], race_id=score.get("raceId"),
+            ).keystrokeWpm
             scores.append(score)
         return scores
 
@@ -1,15 +1,17 @@
-import math
 from collections import defaultdict
 
+import numpy as np
 from discord.ext import commands
 
 from bot_setup import BotContext
 from commands.base import Command
-from database.typegg.quotes import get_quotes
+from database.typegg.quotes import QuoteCatalog, get_quote_catalog
 from database.typegg.users import get_quote_bests
 from graphs import compare_histogram, compare_bar
 from utils.errors import SameUsername, MissingArguments, BotError
+from utils.flags import Flags
 from utils.messages import Page, Message, Field
+from utils.stats import bucket_counts, max_positive_run
 from utils.strings import username_with_flag
 from utils.urls import compare_url
 
@@ -67,99 +69,61 @@ def difficulty_range(lower, upper):
     return f"{lower:.10g} - {upper:.10g}★"
 
 
-def max_positive_subarray_sum(buckets, diffs):
-    max_sum = 0
-    current_sum = 0
-    start = 0
-    best_start = best_end = None
-
-    for i, diff in enumerate(diffs):
-        if diff > 0:
-            if current_sum == 0:
-                start = i
-            current_sum += diff
-            if current_sum > max_sum:
-                max_sum = current_sum
-                best_start, best_end = start, i
-        else:
-            current_sum = 0
-
-    if best_start is None:
-        return 0, None, None
-    return max_sum, buckets[best_start], buckets[best_end]
+def get_quote_best_arrays(catalog: QuoteCatalog, user_id: str, metric: str, flags: Flags):
+    """Returns a catalog aligned array of a user's quote best metric, NaN where they have no best."""
+    quote_bests = get_quote_bests(user_id, columns=["quoteId", metric], flags=flags)
+    return catalog.align(quote_bests, metric)
 
 
 async def comparegraph_main(ctx: BotContext, profile1: dict, profile2):
-    quotes = get_quotes()
-    quote_bests1 = get_quote_bests(profile1["userId"], as_dictionary=True, flags=ctx.flags)
-    quote_bests2 = get_quote_bests(profile2["userId"], as_dictionary=True, flags=ctx.flags)
-    quote_ids1 = quote_bests1.keys()
-    quote_ids2 = quote_bests2.keys()
-
-    if not list(quote_bests1.keys() & quote_bests2.keys()):
+    catalog = get_quote_catalog()
+    wpm1 = get_quote_best_arrays(catalog, profile1["userId"], "wpm", ctx.flags)
+    wpm2 = get_quote_best_arrays(catalog, profile2["userId"], "wpm", ctx.flags)
+    in1 = ~np.isnan(wpm1)
+    in2 = ~np.isnan(wpm2)
+    both = in1 & in2
+
+    if not both.any():
         raise NoCommonTexts(ctx.flags)
 
-    gains1 = defaultdict(int)
-    gains2 = defaultdict(int)
-    defaults = defaultdict(int)
-
     # Aggregation
-    min_difficulty1 = float("inf")
-    max_difficulty1 = float("-inf")
-    min_difficulty2 = float("inf")
-    max_difficulty2 = float("-inf")
-
-    for quote_id in set(quote_ids1) | set(quote_ids2):
-        difficulty = quotes[quote_id]["difficulty"]
-        bucket = math.floor(difficulty * 2) / 2
-
-        in1 = quote_id in quote_bests1
-        in2 = quote_id in quote_bests2
-
-        if in1:
-            min_difficulty1 = min(min_difficulty1, difficulty)
-            max_difficulty1 = max(max_difficulty1, difficulty)
-        if in2:
-            min_difficulty2 = min(min_difficulty2, difficulty)
-            max_difficulty2 = max(max_difficulty2, difficulty)
-
-        if in1 and not in2:
-            defaults[bucket] -= 1
-        elif in2 and not in1:
-            defaults[bucket] += 1
-        else:
-            if quote_bests1[quote_id]["wpm"] > quote_bests2[quote_id]["wpm"]:
-                gains1[bucket] += 1
-            else:
-                gains2[bucket] += 1
+    difficulty = catalog.difficulty
+    won1 = both & (wpm1 > wpm2)
+    won2 = both & ~won1
+    gains1 = defaultdict(int, bucket_counts(difficulty[won1], 0.5))
+    gains2 = defaultdict(int, bucket_counts(difficulty[won2], 0.5))
 
-    # Post-processing
-    all_buckets = set(gains1) | set(gains2)
-    differences = {b: gains1[b] - gains2[b] for b in all_buckets}
-    most_active_bucket, most_active_quotes = max(
-        ((b, gains1[b] + gains2[b]) for b in differences),
-        key=lambda x: x[1],
-        default=(None, 0)
-    )
+    unique = in1 ^ in2
+    defaults = defaultdict(int, bucket_counts(
+        difficulty[unique], 0.5, weights=np.where(in1[unique], -1, 1)
+    ))
 
-    sorted_buckets = sorted(differences.keys())
-    diff_values = [differences[b] for b in sorted_buckets]
+    # Post-processing
+    sorted_buckets = sorted(gains1.keys() | gains2.keys())
+    won_counts1 = np.array([gains1[b] for b in sorted_buckets])
+    won_counts2 = np.array([gains2[b] for b in sorted_buckets])
+    diff_values = won_counts1 - won_counts2
+    most_active = np.argmax(won_counts1 + won_counts2)
+    most_active_bucket = sorted_buckets[most_active]
+    most_active_quotes = (won_counts1 + won_counts2)[most_active]
 
-    sum1, start1, end1 = max_positive_subarray_sum(sorted_buckets, diff_values)
-    sum2, start2, end2 = max_positive_subarray_sum(sorted_buckets, [-d for d in diff_values])
+    sum1, start1, end1 = max_positive_run(diff_values)
+    sum2, start2, end2 = max_positive_run(-diff_values)
 
     strength1 = "—"
     strength2 = "—"
     if sum1 > 0:
-        strength1 = f"{difficulty_range(start1, end1 + 0.5)} (+{sum1:,} quotes)"
+        strength1 = f"{difficulty_range(sorted_buckets[start1], sorted_buckets[end1] + 0.5)} (+{sum1:,} quotes)"
     if sum2 > 0:
-        strength2 = f"{difficulty_range(start2, end2 + 0.5)} (+{sum2:,} quotes)"
-
-    quotes1 = sum(gains1.values())
-    quotes2 = sum(gains2.values())
-    unique1 = len(quote_ids1 - quote_ids2)
-    unique2 = len(quote_ids2 - quote_ids1)
-    common = len(quote_ids1 & quote_ids2)
+        strength2 = f"{difficulty_range(sorted_buckets[start2], sorted_buckets[end2] + 0.5)} (+{sum2:,} quotes)"
+
+    min_difficulty1, max_difficulty1 = difficulty[in1].min(), difficulty[in1].max()
+    min_difficulty2, max_difficulty2 = difficulty[in2].min(), difficulty[in2].max()
+    quotes1 = int(won1.sum())
+    quotes2 = int(won2.sum())
+    unique1 = int((in1 & ~in2).sum())
+    unique2 = int((in2 & ~in1).sum())
+    common = int(both.sum())
     total_quotes = quotes1 + quotes2
     edge1 = (quotes1 - quotes2) / total_quotes
     edge2 = (quotes2 - quotes1) / total_quotes
@@ -224,25 +188,25 @@ async def comparegraph_ranged(
     max_difficulty: float,
     metric: str,
 ):
-    quotes = get_quotes(min_difficulty=min_difficulty, max_difficulty=max_difficulty)
-    quote_bests1 = get_quote_bests(profile1["userId"], as_dictionary=True, flags=ctx.flags)
-    quote_bests2 = get_quote_bests(profile2["userId"], as_dictionary=True, flags=ctx.flags)
-    common_quotes = list(quotes.keys() & quote_bests1.keys() & quote_bests2.keys())
-    if not common_quotes:
+    catalog = get_quote_catalog()
+    values1 = get_quote_best_arrays(catalog, profile1["userId"], metric, ctx.flags)
+    values2 = get_quote_best_arrays(catalog, profile2["userId"], metric, ctx.flags)
+    in_range = (catalog.difficulty >= min_difficulty) & (catalog.difficulty < max_difficulty)
+    common = np.flatnonzero(in_range & ~np.isnan(values1) & ~np.isnan(values2))
+    if not len(common):
         raise NoCommonTexts(ctx.flags)
 
-    differences = [
-        quote_bests1[quote_id][metric] - quote_bests2[quote_id][metric]
-        for quote_id in common_quotes
-    ]
+    values1 = values1[common]
+    values2 = values2[common]
+    differences = values1 - values2
+    gains1 = differences[differences > 0]
+    gains2 = -differences[differences < 0]
 
-    gains1 = [diff for diff in differences if diff > 0]
-    gains2 = [-diff for diff in differences if diff < 0]
-    match = max((
-        (common_quotes[i], quote_bests1[common_quotes[i]][metric])
-        for i, diff in enumerate(differences)
-        if diff == 0.0
-    ), key=lambda x: x[1], default=None)
+    match = None
+    ties = np.flatnonzero(differences == 0)
+    if len(ties):
+        tie = ties[np.argmax(values1[ties])]
+        match = (catalog.ids[common[tie]], values1[tie])
 
     def display_gain(value, decimals=2):
         gain = f"{value:,.{decimals}f}"
@@ -274,31 +238,28 @@ async def comparegraph_ranged(
 
     fields = []
 
-    quotes_greater = len(gains1)
-    gain = sum(gains1)
-    average_gain = 0 if gain == 0 else gain / quotes_greater
-    max_gap = -min(gains2) if gain == 0 else max(gains1)
-    quote_id = common_quotes[differences.index(max_gap)]
-    metric1 = quote_bests1[quote_id][metric]
-    metric2 = quote_bests2[quote_id][metric]
+    def largest_gap(gains, losses):
+        if len(gains):
+            return gains.max()
+        if len(losses):
+            return -losses.min()
+        return 0.0
 
+    max_gap = largest_gap(gains1, gains2)
+    i = np.flatnonzero(differences == max_gap)[0]
     fields.append(
         make_field(
-            profile1, quotes_greater, gain, average_gain, max_gap, metric1, metric2, metric
+            profile1, len(gains1), gains1.sum(), gains1.mean() if len(gains1) else 0,
+            max_gap, values1[i], values2[i], metric
         )
     )
 
-    quotes_greater = len(gains2)
-    gain = sum(gains2)
-    average_gain = 0 if gain == 0 else gain / quotes_greater
-    max_gap = -min(gains1) if gain == 0 else max(gains2)
-    quote_id = common_quotes[differences.index(-max_gap)]
-    metric1 = quote_bests2[quote_id][metric]
-    metric2 = quote_bests1[quote_id][metric]
-
+    max_gap = largest_gap(gains2, gains1)
+    i = np.flatnonzero(-differences == max_gap)[0]
     fields.append(
         make_field(
-            profile2, quotes_greater, gain, average_gain, max_gap, metric1, metric2, metric
+            profile2, len(gains2), gains2.sum(), gains2.mean() if len(gains2) else 0,
+            max_gap, values2[i], values1[i], metric
         )
     )
 
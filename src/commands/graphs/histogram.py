@@ -5,7 +5,9 @@ from bot_setup import BotContext
 from commands.base import Command
 from database.typegg.users import get_quote_bests
 from graphs import histogram
+from utils.flags import Flags
 from utils.messages import Page, Message, Field
+from utils.stats import describe, rows_to_arrays
 from utils.strings import username_with_flag
 
 metrics = {
@@ -61,36 +63,45 @@ class Histogram(Command):
         await run(ctx, profile, metric)
 
 
-def make_field(data: list[float], suffix: str, title: str = None, profile: dict = None):
+def make_field(data: np.ndarray, suffix: str, title: str = None, profile: dict = None):
     if suffix == "ms":
-        data = [v for v in data if v > 0]
+        data = data[data > 0]
         precision = 0
     else:
         precision = 2
 
-    quartiles = np.quantile(data, [0.25, 0.75])
+    stats = describe(data)
     return Field(
         title=title if title else username_with_flag(profile, link_user=False),
         content=(
-            f"**Average:** {np.average(data):,.{precision}f}{suffix}\n"
-            f"**Median:** {np.median(data):,.{precision}f}{suffix}\n"
-            f"**Q1:** {quartiles[0]:,.{precision}f}{suffix}\n"
-            f"**Q3:** {quartiles[1]:,.{precision}f}{suffix}\n"
-            f"**Std. Dev:** ± {np.std(data):,.{precision}f}{suffix}"
+            f"**Average:** {stats["average"]:,.{precision}f}{suffix}\n"
+            f"**Median:** {stats["median"]:,.{precision}f}{suffix}\n"
+            f"**Q1:** {stats["q1"]:,.{precision}f}{suffix}\n"
+            f"**Q3:** {stats["q3"]:,.{precision}f}{suffix}\n"
+            f"**Std. Dev:** ± {stats["std"]:,.{precision}f}{suffix}"
         ),
         inline=True,
     )
 
 
+def get_metric_arrays(user_id: str, flags: Flags):
+    """Returns a dictionary of metric to an array of the user's quote best values."""
+    quote_bests = get_quote_bests(user_id, columns=list(metrics.keys()), flags=flags)
+    arrays = rows_to_arrays(quote_bests, list(metrics.keys()))
+    arrays["accuracy"] *= 100
+
+    return {column: values[~np.isnan(values)] for column, values in arrays.items()}
+
+
 async def run(ctx: BotContext, profile: dict, metric: str):
     user_id = profile["userId"]
     ctx.flags.gamemode = "solo"
-    solo_quote_bests = get_quote_bests(user_id, columns=metrics.keys(), flags=ctx.flags)
+    solo_quote_bests = get_metric_arrays(user_id, ctx.flags)
     ctx.flags.gamemode = "quickplay"
-    multi_quote_bests = get_quote_bests(user_id, columns=metrics.keys(), flags=ctx.flags)
+    multi_quote_bests = get_metric_arrays(user_id, ctx.flags)
     ctx.flags.gamemode = None
 
-    def make_render(solo_values: list[float], multi_values: list[float], column: str):
+    def make_render(solo_values: np.ndarray, multi_values: np.ndarray, column: str):
         return lambda: histogram.render(
             profile["username"],
             metrics[column] | {"name": column},
@@ -105,12 +116,8 @@ async def run(ctx: BotContext, profile: dict, metric: str):
         if ctx.flags.status != "ranked" and column == "pp":
             continue
 
-        solo_values = [race[column] for race in solo_quote_bests if race[column] is not None]
-        multi_values = [race[column] for race in multi_quote_bests if race[column] is not None]
-
-        if column == "accuracy":
-            solo_values = np.array(solo_values) * 100
-            multi_values = np.array(multi_values) * 100
+        solo_values = solo_quote_bests[column]
+        multi_values = multi_quote_bests[column]
 
         metric_title = metrics[column]["title"]
         metric_suffix = metrics[column]["suffix"]
@@ -135,10 +142,10 @@ async def run(ctx: BotContext, profile: dict, metric: str):
 
 
 async def run_compare(ctx: BotContext, profile1: dict, profile2: dict, metric: str):
-    quote_bests1 = get_quote_bests(profile1["userId"], columns=list(metrics.keys()), flags=ctx.flags)
-    quote_bests2 = get_quote_bests(profile2["userId"], columns=list(metrics.keys()), flags=ctx.flags)
+    quote_bests1 = get_metric_arrays(profile1["userId"], ctx.flags)
+    quote_bests2 = get_metric_arrays(profile2["userId"], ctx.flags)
 
-    def make_render(values1: list[float], values2: list[float], column: str):
+    def make_render(values1: np.ndarray, values2: np.ndarray, column: str):
         return lambda: histogram.render_compare(
             profile1["username"],
             values1,
@@ -151,12 +158,8 @@ async def run_compare(ctx: BotContext, profile1: dict, profile2: dict, metric: s
     pages = []
 
     for column in metrics.keys():
-        values1 = [race[column] for race in quote_bests1]
-        values2 = [race[column] for race in quote_bests2]
-
-        if column == "accuracy":
-            values1 = np.array(values1) * 100
-            values2 = np.array(values2) * 100
+        values1 = quote_bests1[column]
+        values2 = quote_bests2[column]
 
         metric_title = metrics[column]["title"]
         metric_suffix = metrics[column]["suffix"]
@@ -7,7 +7,6 @@ from database.typegg.quotes import get_quotes
 from database.typegg.races import get_races
 from graphs import improvement
 from utils.colors import ERROR
-from utils.dates import parse_date
 from utils.messages import Page, Message, Field
 
 metrics = ["pp", "wpm"]
@@ -57,7 +56,7 @@ async def multiplayer_improvement(ctx: BotContext, profile: dict, metric: str):
     ctx.flags.gamemode = "quickplay"
     race_list = await get_races(
         user_id=profile["userId"],
-        columns=["quoteId", metric, "timestamp", "completionType"],
+        columns=["quoteId", metric, "timestampMs", "completionType"],
         flags=ctx.flags,
     )
 
@@ -75,8 +74,8 @@ async def multiplayer_improvement(ctx: BotContext, profile: dict, metric: str):
 
     quote_list = get_quotes()
 
-    values, dates, difficulties = zip(*[
-        (race[metric], race["timestamp"], quote_list[race["quoteId"]]["difficulty"])
+    values, timestamps, difficulties = zip(*[
+        (race[metric], race["timestampMs"] / 1000, quote_list[race["quoteId"]]["difficulty"])
         for race in race_list
         if race["completionType"] == "finished"
     ])
@@ -167,7 +166,7 @@ async def multiplayer_improvement(ctx: BotContext, profile: dict, metric: str):
                     values=values,
                     metric=metric,
                     theme=ctx.user["theme"],
-                    dates=dates,
+                    timestamps=timestamps,
                     window_size=window,
                     dnf_indices=dnf_indices,
                 ),
@@ -184,7 +183,7 @@ async def solo_improvement(ctx: BotContext, profile: dict, metric: str):
     ctx.flags.gamemode = "solo"
     race_list = await get_races(
         user_id=profile["userId"],
-        columns=["quoteId", metric, "timestamp"],
+        columns=["quoteId", metric, "timestampMs"],
         flags=ctx.flags,
     )
 
@@ -207,10 +206,10 @@ async def solo_improvement(ctx: BotContext, profile: dict, metric: str):
         if quote_id not in pb_dict or race[metric] > pb_dict[quote_id][metric]:
             pb_dict[quote_id] = race
             pbs.append(race)
-    pbs.sort(key=lambda r: parse_date(r["timestamp"]).timestamp())
+    pbs.sort(key=lambda r: r["timestampMs"])
 
     quote_list = get_quotes()
-    values, dates, quote_ids = zip(*[(race[metric], race["timestamp"], race["quoteId"]) for race in pbs])
+    values, timestamps, quote_ids = zip(*[(race[metric], race["timestampMs"] / 1000, race["quoteId"]) for race in pbs])
     difficulties = [quote_list[qid]["difficulty"] for qid in quote_ids]
 
     window = get_window_size(len(values))
@@ -246,7 +245,7 @@ async def solo_improvement(ctx: BotContext, profile: dict, metric: str):
                     values=values,
                     metric=metric,
                     theme=ctx.user["theme"],
-                    dates=dates,
+                    timestamps=timestamps,
                     window_size=window,
                 ),
                 flag_title=True,
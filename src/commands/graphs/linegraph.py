@@ -1,4 +1,4 @@
-import bisect
+import math
 
 from discord import File
 from discord.ext import commands
@@ -7,9 +7,10 @@ from bot_setup import BotContext
 from commands.base import Command
 from database.typegg.races import get_races
 from graphs import line
+from utils.data_structures import DecayingTopSum
 from utils.errors import BotError
-from utils.nwpm_model import calculate_nwpm, initialize_nwpm_model
-from utils.stats import calculate_quote_length, calculate_total_pp
+from utils.nwpm_model import calculate_nwpm_many, initialize_nwpm_model
+from utils.stats import calculate_quote_length, TOTAL_PP_ENTRIES, TOTAL_PP_DECAY
 from utils.strings import get_flag_title
 
 metrics = {
@@ -92,30 +93,23 @@ class LineGraph(Command):
 
 def get_total_pp_over_time(race_list: list[dict]):
     quote_bests = {}
-    best_pps = []
+    top_pps = DecayingTopSum(
+        (math.floor(race["pp"]) for race in race_list), TOTAL_PP_ENTRIES, TOTAL_PP_DECAY
+    )
     total_pp = []
     current_total = 0.0
-    max_entries = 250
 
     for race in race_list:
         quote_id = race["quoteId"]
         pp = race["pp"]
-        old_best = quote_bests.get(quote_id)
-
-        if old_best is None or pp > old_best["pp"]:
-            if old_best is not None:
-                old_pp = old_best["pp"]
-                idx = bisect.bisect_left([-x for x in best_pps], -old_pp)
-                if idx < len(best_pps) and best_pps[idx] == old_pp:
-                    best_pps.pop(idx)
-
-            bisect.insort_left(best_pps, pp)
-            best_pps.sort(reverse=True)
-
-            quote_bests[quote_id] = race
+        old_pp = quote_bests.get(quote_id)
 
-            if len(best_pps) <= max_entries or best_pps.index(pp) < max_entries:
-                current_total = calculate_total_pp(best_pps[:max_entries])
+        if old_pp is None or pp > old_pp:
+            if old_pp is not None:
+                top_pps.remove(math.floor(old_pp))
+            top_pps.add(math.floor(pp))
+            quote_bests[quote_id] = pp
+            current_total = top_pps.total
 
         total_pp.append(current_total)
 
@@ -159,36 +153,15 @@ def get_characters_over_time(race_list: list[dict]):
 
 
 def get_nwpm_over_time(race_list: list[dict]):
-    quote_bests = {}
-    best_pps = []
-    nwpm = []
-    current_total = 0.0
-    max_entries = 250
-
-    for race in race_list:
-        quote_id = race["quoteId"]
-        pp = race["pp"]
-        old_best = quote_bests.get(quote_id)
-
-        if old_best is None or pp > old_best["pp"]:
-            if old_best is not None:
-                old_pp = old_best["pp"]
-                idx = bisect.bisect_left([-x for x in best_pps], -old_pp)
-                if idx < len(best_pps) and best_pps[idx] == old_pp:
-                    best_pps.pop(idx)
-
-            bisect.insort_left(best_pps, pp)
-            best_pps.sort(reverse=True)
-
-            quote_bests[quote_id] = race
-
-            if len(best_pps) <= max_entries or best_pps.index(pp) < max_entries:
-                current_total = calculate_total_pp(best_pps[:max_entries])
+    quote_ids = set()
 
-        if len(best_pps) >= 125:
-            nwpm.append(calculate_nwpm(current_total))
+    for i, race in enumerate(race_list):
+        quote_ids.add(race["quoteId"])
+        if len(quote_ids) >= 125:
+            total_pp = get_total_pp_over_time(race_list)
+            return calculate_nwpm_many(total_pp[i:]).tolist()
 
-    return nwpm
+    return []
 
 
 async def run(ctx: BotContext, metric: str, profiles: list[dict]):
@@ -201,17 +174,17 @@ async def run(ctx: BotContext, metric: str, profiles: list[dict]):
     lines = []
     for profile in profiles:
         columns = metrics[metric]["columns"].split(" ")
-        columns.append("timestamp")
+        columns.append("timestampMs")
 
         race_list = await get_races(
             user_id=profile["userId"],
             columns=columns,
             include_dnf=False,
-            order_by="timestamp",
+            order_by="timestampMs",
             flags=ctx.flags,
         )
 
-        x_values = [race["timestamp"] for race in race_list]
+        x_values = [race["timestampMs"] / 1000 for race in race_list]
         y_values = []
 
         if metric == "pp":
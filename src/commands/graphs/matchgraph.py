@@ -2,12 +2,12 @@ from copy import deepcopy
 
 from discord.ext import commands
 
-from api.users import get_race
 from bot_setup import BotContext
 from commands.base import Command
 from commands.graphs.racegraph import run as run_racegraph
 from database.bot.recent_quotes import set_recent_quote
 from database.typegg.quotes import get_quote
+from database.typegg.race_resolver import race_resolver
 from graphs import match as match_graph
 from utils.errors import InvalidKeystrokeData
 from utils.keystrokes import get_keystroke_data
@@ -41,7 +41,7 @@ class MatchGraph(Command):
 
 
 async def run(ctx: BotContext, profile: dict, race_number: int):
-    race = await get_race(profile["userId"], race_number, get_keystrokes=True)
+    race = await race_resolver.get_race(profile["userId"], race_number, get_match=True)
     set_recent_quote(ctx.channel.id, race["quoteId"])
     match = race.get("match")
 
@@ -78,7 +78,9 @@ async def run(ctx: BotContext, profile: dict, race_number: int):
 
         if player.get("keystrokeData"):
             try:
-                keystroke_data = get_keystroke_data(player["keystrokeData"], True, player["startTime"])
+                keystroke_data = get_keystroke_data(
+                    player["keystrokeData"], True, player["startTime"], race_id=player.get("raceId"),
+                )
             except InvalidKeystrokeData:
                 continue
 
@@ -100,7 +102,9 @@ async def run(ctx: BotContext, profile: dict, race_number: int):
 
         if player.get("keystrokeData"):
             try:
-                keystroke_data = get_keystroke_data(player["keystrokeData"], True, player["startTime"])
+                keystroke_data = get_keystroke_data(
+                    player["keystrokeData"], True, player["startTime"], race_id=player.get("raceId"),
+                )
             except InvalidKeystrokeData:
                 continue
 
@@ -119,8 +123,8 @@ async def run(ctx: BotContext, profile: dict, race_number: int):
         else:
             raw_description += f":x: {bot} {username_with_flag(player, False)} - DNF"
 
-    players = [player for player in players if player.get("keystroke_wpm")]
-    raw_players = [player for player in raw_players if player.get("keystroke_wpm")]
+    players = [player for player in players if player.get("keystroke_wpm") is not None]
+    raw_players = [player for player in raw_players if player.get("keystroke_wpm") is not None]
 
     title = f"Match Graph - Race #{race_number:,}"
 
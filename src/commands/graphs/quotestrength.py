@@ -5,11 +5,12 @@ from discord.ext import commands
 
 from bot_setup import BotContext
 from commands.base import Command
-from database.typegg.quotes import get_quotes
+from database.typegg.quotes import get_quote_catalog
 from database.typegg.users import get_quote_bests
 from graphs import quotestrength as qs_graph
 from utils.errors import NoRankedRaces
 from utils.messages import Page, Message
+from utils.stats import TOTAL_PP_ENTRIES, TOTAL_PP_WEIGHTS, percentile_ranks, weighted_median
 
 max_users = 5
 
@@ -38,71 +39,43 @@ class QuoteStrength(Command):
         await run(ctx, profiles)
 
 
-def _quote_xy(quote, len_p10, len_p90, sorted_complexities):
-    log_len = np.log(len(quote["text"]))
-    raw = (log_len - len_p10) / (len_p90 - len_p10) * 2 - 1
-    x = float(np.tanh(raw * 1.2))
-    p = np.searchsorted(sorted_complexities, quote["complexity"], side="right") / len(sorted_complexities)
-    y = float(np.clip(p * 2 - 1, -1, 1))
+def _compass_xy(log_lengths, complexities, len_p10, len_p90, sorted_complexities):
+    """Maps log lengths to [-1, 1] around the ranked 10th-90th percentiles, and complexities to their percentile."""
+    raw = (log_lengths - len_p10) / (len_p90 - len_p10) * 2 - 1
+    x = np.tanh(raw * 1.2)
+    y = np.clip(percentile_ranks(sorted_complexities, complexities) * 2 - 1, -1, 1)
     return x, y
 
 
 async def run(ctx: BotContext, profiles: List[dict]):
-    quote_list = get_quotes()
-
-    ranked_quotes = [q for q in quote_list.values() if q.get("ranked")]
-    lengths = np.array([len(q["text"]) for q in ranked_quotes])
-    log_lengths = np.log(lengths)
-    complexities = np.array([q["complexity"] for q in ranked_quotes])
-    sorted_complexities = np.sort(complexities)
-
-    len_p10 = np.percentile(log_lengths, 10)
-    len_p90 = np.percentile(log_lengths, 90)
+    catalog = get_quote_catalog()
+    log_lengths = np.log(catalog.length)
+    len_p10, len_p90 = np.percentile(log_lengths[catalog.ranked], [10, 90])
+    sorted_complexities = np.sort(catalog.complexity[catalog.ranked])
 
     users = []
-    quote_bests = None
+    positions = None
 
     for profile in profiles:
         quote_bests = get_quote_bests(
             profile["userId"],
             columns=["pp", "quoteId"],
             order_by="pp",
-            limit=250,
+            limit=TOTAL_PP_ENTRIES,
         )
 
         if not quote_bests:
             raise NoRankedRaces(profile["username"])
 
-        weights = np.array([0.97 ** i for i in range(len(quote_bests))])
-        total_weight = np.sum(weights)
-
-        values = np.array([
-            np.log(len(quote_list[r["quoteId"]]["text"]))
-            for r in quote_bests
-        ])
-        weights_arr = weights / total_weight
-
-        # sort by value
-        sorted_idx = np.argsort(values)
-        values = values[sorted_idx]
-        weights_arr = weights_arr[sorted_idx]
+        positions = catalog.positions([r["quoteId"] for r in quote_bests])
+        weights = np.array(TOTAL_PP_WEIGHTS[:len(positions)])
+        known = positions >= 0
+        positions = positions[known]
+        weights = weights[known]
 
-        cum_weights = np.cumsum(weights_arr)
-        weighted_log_length = values[np.searchsorted(cum_weights, 0.5)]
-
-        weighted_complexity = sum(
-            quote_list[r["quoteId"]]["complexity"] * w
-            for r, w in zip(quote_bests, weights)
-        ) / total_weight
-
-        # Normalization
-        raw = (weighted_log_length - len_p10) / (len_p90 - len_p10)
-        raw = raw * 2 - 1
-        x = np.tanh(raw * 1.2)
-
-        # Percentile -> [-1, 1]
-        p = np.searchsorted(sorted_complexities, weighted_complexity, side="right") / len(sorted_complexities)
-        y = np.clip(p * 2 - 1, -1, 1)
+        weighted_log_length = weighted_median(log_lengths[positions], weights)
+        weighted_complexity = np.dot(catalog.complexity[positions], weights) / weights.sum()
+        x, y = _compass_xy(weighted_log_length, weighted_complexity, len_p10, len_p90, sorted_complexities)
 
         users.append({
             "username": profile["username"],
@@ -112,11 +85,9 @@ async def run(ctx: BotContext, profiles: List[dict]):
 
     heatmap_points = None
     if len(profiles) == 1:
-        heatmap_points = [
-            _quote_xy(quote_list[r["quoteId"]], len_p10, len_p90, sorted_complexities)
-            for r in quote_bests
-            if r["quoteId"] in quote_list
-        ]
+        heatmap_points = _compass_xy(
+            log_lengths[positions], catalog.complexity[positions], len_p10, len_p90, sorted_complexities
+        )
 
     page = Page(
         title="Quote Strength Compass",
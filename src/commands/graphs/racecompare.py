@@ -2,10 +2,10 @@ import asyncio
 
 from discord.ext import commands
 
-from api.users import get_race
 from bot_setup import BotContext
 from commands.base import Command, enforce_daily_quote
 from config import DAILY_QUOTE_CHANNEL_ID
+from database.typegg.race_resolver import race_resolver
 from database.typegg.races import get_races
 from database.typegg.users import get_quote_bests
 from graphs import match
@@ -66,12 +66,12 @@ async def run(ctx: BotContext, quote: dict, profiles: list[dict]):
         if not quote_best:
             raise NoQuoteRaces(profile["username"])
 
-        best_race = await get_race_keystrokes(
+        best_races = await get_races_keystrokes(
             profile["userId"],
-            quote_best[0]["raceNumber"],
+            [quote_best[0]["raceNumber"]],
             ctx.flags.raw,
         )
-        profile["bestRace"] = best_race
+        profile["bestRace"] = best_races[0]
         return profile
 
     profiles = await asyncio.gather(*[fetch_user_best(p) for p in profiles])
@@ -137,14 +137,10 @@ async def run_self(ctx: BotContext, quote: dict, profile: dict):
             recent_race | {"username": "Recent"},
         ]
 
-    # Fetch keystroke data in parallel
-    races_with_keystrokes = await asyncio.gather(*[
-        get_race_keystrokes(profile["userId"], rn, raw=ctx.flags.raw)
-        for rn in race_numbers
-    ])
+    races_with_keystrokes = await get_races_keystrokes(profile["userId"], race_numbers, raw=ctx.flags.raw)
 
     for i, race in enumerate(races_with_keystrokes):
-        del race["username"]
+        race.pop("username", None)
         race_data[i].update(race)
 
     title = f"Quote Best Comparison - {quote['quoteId']}"
@@ -160,16 +156,22 @@ async def run_self(ctx: BotContext, quote: dict, profile: dict):
     await message.send()
 
 
-async def get_race_keystrokes(user_id: str, race_number: int, raw: bool) -> dict:
-    """Fetch race with keystroke data and add keystroke_wpm."""
-    race = await get_race(user_id, race_number, get_keystrokes=True)
-    keystroke_data = get_keystroke_data(race["keystrokeData"])
-    if raw:
-        race["keystroke_wpm"] = keystroke_data.keystrokeRawWpm
-        race["wpm"] = race["rawWpm"]
-    else:
-        race["keystroke_wpm"] = keystroke_data.keystrokeWpm
-    return race
+async def get_races_keystrokes(user_id: str, race_numbers: list[int], raw: bool) -> list[dict]:
+    """Resolve a user's races with keystroke data and add keystroke_wpm, in the order given."""
+    races = await race_resolver.get_races(user_id, race_numbers)
+    race_list = []
+
+    for race_number in race_numbers:
+        race = dict(races[race_number])
+        keystroke_data = get_keystroke_data(race["keystrokeData"], race_id=race["raceId"])
+        if raw:
+            race["keystroke_wpm"] = keystroke_data.keystrokeRawWpm
+            race["wpm"] = race["rawWpm"]
+        else:
+            race["keystroke_wpm"] = keystroke_data.keystrokeWpm
+        race_list.append(race)
+
+    return race_list
 
 
 def format_race(profile: dict, race: dict, label: str = None) -> str:
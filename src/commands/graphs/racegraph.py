@@ -56,7 +56,7 @@ async def run(ctx: BotContext, profile: dict, race_number: int):
 
     enforce_daily_quote(ctx, race["quoteId"])
 
-    keystroke_data = get_keystroke_data(race["keystrokeData"])
+    keystroke_data = get_keystroke_data(race["keystrokeData"], race_id=race["raceId"])
 
     description = (
         f"Completed {discord_date(race["timestamp"])}\n\n"
@@ -1,3 +1,4 @@
+import numpy as np
 from discord.ext import commands
 
 from bot_setup import BotContext
@@ -85,13 +86,18 @@ def format_segment(segment: dict, show_race: bool = False) -> str:
 
 def build_segments(parts: list[str], delays: list, raw_delays: list) -> list[dict]:
     """Build segment WPM data from text parts and keystroke delays."""
+    delays = np.asarray(delays, dtype=float)
+    raw_delays = np.asarray(raw_delays, dtype=float)
+
+    # Segment durations are differences of the cumulative delays at each segment boundary
+    bounds = np.minimum(np.cumsum([0] + [len(text) for text in parts]), len(delays))
+    totals = np.concatenate(([0.0], np.cumsum(delays)))[bounds]
+    raw_totals = np.concatenate(([0.0], np.cumsum(raw_delays)))[bounds]
+
     segments = []
-    char_index = 0
 
-    for text in parts:
-        length = len(text)
-        segment_delays = delays[char_index:char_index + length]
-        raw_segment_delays = raw_delays[char_index:char_index + length]
+    for i, text in enumerate(parts):
+        segment_delays = delays[bounds[i]:bounds[i + 1]]
 
         # Adjust for first segment if it starts at time 0
         adjustment = 1 if segment_delays[0] == 0 else 0
@@ -99,11 +105,10 @@ def build_segments(parts: list[str], delays: list, raw_delays: list) -> list[dic
 
         segments.append({
             "text": text,
-            "wpm": calculate_wpm(sum(segment_delays), char_count),
-            "raw_wpm": calculate_wpm(sum(raw_segment_delays), char_count),
-            "delays": segment_delays,
+            "wpm": calculate_wpm(float(totals[i + 1] - totals[i]), char_count),
+            "raw_wpm": calculate_wpm(float(raw_totals[i + 1] - raw_totals[i]), char_count),
+            "delays": segment_delays.tolist(),
         })
-        char_index += length
 
     return segments
 
@@ -161,7 +166,7 @@ async def run(ctx: BotContext, profile: dict, race_number: int):
     set_recent_quote(ctx.channel.id, race["quoteId"])
 
     enforce_daily_quote(ctx, race["quoteId"])
-    keystroke_data = get_keystroke_data(race["keystrokeData"])
+    keystroke_data = get_keystroke_data(race["keystrokeData"], race_id=race["raceId"])
     delays = keystroke_data.wpmCharacterTimes
     raw_delays = keystroke_data.rawCharacterTimes
 
@@ -1,5 +1,3 @@
-import copy
-
 from dateutil import parser
 from discord.ext import commands
 
@@ -9,10 +7,11 @@ from commands.base import Command, enforce_daily_quote
 from commands.graphs.segments import build_segments, format_segment
 from config import DAILY_QUOTE_CHANNEL_ID
 from database.typegg.races import get_races, get_race
+from database.typegg.segment_bests import get_segment_bests, save_segment_bests, get_new_races
 from graphs import match as match_graph
 from graphs import segments as segment_graph
 from utils.errors import NoQuoteRaces, InvalidKeystrokeData
-from utils.keystrokes import get_keystroke_data, calculate_wpm, get_keystroke_wpm
+from utils.keystrokes import get_keystroke_data, calculate_wpm, get_keystroke_wpm, PROCESSOR_VERSION
 from utils.messages import Page, Message, usable_in
 from utils.strings import format_duration
 from utils.strings import get_segments, quote_display
@@ -53,23 +52,14 @@ class SumOfBest(Command):
         await run(ctx, profile, quote)
 
 
-async def run(ctx: BotContext, profile: dict, quote: dict):
-    quote_races = await get_races(
-        profile["userId"],
-        quote_id=quote["quoteId"],
-        order_by="rawWpm",
-        get_keystrokes=True,
-        flags=ctx.flags,
-    )
-    if not quote_races:
-        raise NoQuoteRaces(profile["username"])
-
-    text_segments = get_segments(quote["text"])
-    sum_of_best_segments = []
+def merge_segment_bests(sum_of_best_segments: list[dict], races: list[dict], text_segments: list[str]):
+    """Updates the best segments in place with any faster segments from the given races."""
+    for race in races:
+        if race["keystrokeData"] is None:
+            continue
 
-    for race in quote_races:
         try:
-            keystroke_data = get_keystroke_data(race["keystrokeData"])
+            keystroke_data = get_keystroke_data(race["keystrokeData"], race_id=race["raceId"])
         except InvalidKeystrokeData:
             continue
 
@@ -78,19 +68,61 @@ async def run(ctx: BotContext, profile: dict, quote: dict):
             keystroke_data.wpmCharacterTimes,
             keystroke_data.rawCharacterTimes,
         )
+        for segment in segments:
+            segment["raceNumber"] = race.get("raceNumber")
+            segment["timestamp"] = race.get("timestamp")
 
         if not sum_of_best_segments:
-            sum_of_best_segments = copy.deepcopy(segments)
-            for segment in sum_of_best_segments:
-                segment["raceNumber"] = race.get("raceNumber")
-                segment["timestamp"] = race.get("timestamp")
+            sum_of_best_segments.extend(segments)
             continue
 
         for i, segment in enumerate(segments):
             if segment["wpm"] > sum_of_best_segments[i]["wpm"] and segment["text"] == text_segments[i]:
-                sum_of_best_segments[i] = copy.deepcopy(segment)
-                sum_of_best_segments[i]["raceNumber"] = race.get("raceNumber")
-                sum_of_best_segments[i]["timestamp"] = race.get("timestamp")
+                sum_of_best_segments[i] = segment
+
+
+def get_sum_of_best_segments(user_id: str, quote_id: str, text_segments: list[str]):
+    """
+    Returns a user's best segments on a quote from the stored bests, merging in only the races
+    stored since. Rebuilt from every race if the quote's text or the keystroke processing changed.
+    """
+    sum_of_best_segments, last_race_row, processor_version = get_segment_bests(user_id, quote_id)
+    if processor_version != PROCESSOR_VERSION or (
+        sum_of_best_segments and [segment["text"] for segment in sum_of_best_segments] != text_segments
+    ):
+        sum_of_best_segments, last_race_row = [], 0
+
+    updated = False
+    for races in get_new_races(user_id, quote_id, last_race_row):
+        merge_segment_bests(sum_of_best_segments, races, text_segments)
+        last_race_row = races[-1]["raceRow"]
+        updated = True
+
+    if updated:
+        save_segment_bests(user_id, quote_id, sum_of_best_segments, last_race_row, PROCESSOR_VERSION)
+
+    return sum_of_best_segments
+
+
+async def run(ctx: BotContext, profile: dict, quote: dict):
+    text_segments = get_segments(quote["text"])
+
+    # The stored bests cover every race on the quote, so filtered runs are built from scratch
+    if ctx.flags.gamemode is None:
+        sum_of_best_segments = get_sum_of_best_segments(profile["userId"], quote["quoteId"], text_segments)
+    else:
+        quote_races = await get_races(
+            profile["userId"],
+            quote_id=quote["quoteId"],
+            order_by="rawWpm",
+            get_keystrokes=True,
+            flags=ctx.flags,
+        )
+        sum_of_best_segments = []
+        merge_segment_bests(sum_of_best_segments, quote_races, text_segments)
+
+    if not sum_of_best_segments:
+        raise NoQuoteRaces(profile["username"])
 
     delays = [delay for segment in sum_of_best_segments for delay in segment["delays"]]
     sum_of_best_wpm = calculate_wpm(len(quote["text"]) - 1, sum(delays))
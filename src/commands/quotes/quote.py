@@ -8,7 +8,6 @@ from database.typegg.races import get_races, get_race
 from database.typegg.users import get_quote_bests
 from graphs import improvement
 from utils.colors import SUCCESS
-from utils.dates import parse_date
 from utils.errors import BotError
 from utils.messages import Page, Message, Field, usable_in
 from utils.stats import calculate_total_pp
@@ -186,7 +185,7 @@ def build_history_page(quote_races: list[dict], ranked: bool):
 
         return history
 
-    quote_races.sort(key=lambda x: -parse_date(x["timestamp"]).timestamp())
+    quote_races.sort(key=lambda x: -x["timestampMs"])
     recent_races = quote_history(quote_races)
 
     quote_races.sort(key=lambda x: -x["wpm"])
@@ -226,7 +225,7 @@ def build_graph_page(quote_races: list, ranked: bool, theme: dict):
             f"**Best:** {max(wpm):,.2f} WPM"
         )
 
-    quote_races.sort(key=lambda x: parse_date(x["timestamp"]).timestamp())
+    quote_races.sort(key=lambda x: x["timestampMs"])
     page = Page(
         description=description,
         render=lambda: improvement.render_text(
@@ -4,6 +4,7 @@ from api.quotes import get_quotes
 from bot_setup import BotContext
 from commands.base import Command
 from database.bot.recent_quotes import set_recent_quote
+from database.typegg.quote_search import search_quotes, SEARCH_LIMIT
 from database.typegg.quotes import is_quote_id, get_quote
 from utils.errors import MissingArguments
 from utils.messages import Page, Message, paginate_data
@@ -34,14 +35,18 @@ class Search(Command):
 
 
 async def run(ctx: BotContext, query: str):
-    results = await get_quotes(
-        search=query,
-        min_length=len(query),
-        status="any",
-        per_page=100,
-    )
-    quotes = results["quotes"] or []
-    total_results = results["totalCount"]
+    quotes, total_results = search_quotes(query)
+
+    # Quotes are pushed to the bot as they're added, so only a miss can be a quote it hasn't received yet
+    if not quotes:
+        results = await get_quotes(
+            search=query,
+            min_length=len(query),
+            status="any",
+            per_page=SEARCH_LIMIT,
+        )
+        quotes = results["quotes"] or []
+        total_results = results["totalCount"]
 
     if is_quote_id(query):
         quote = get_quote(query)
@@ -60,7 +65,7 @@ async def run(ctx: BotContext, query: str):
         quote,
         max_text_chars=150,
         display_status=True,
-        text_highlight=query,
+        text_highlight=quote["matches"][0] if quote.get("matches") else query,
     ) + "\n"
     pages = paginate_data(quotes, entry_formatter, 20, per_page, False)
     for i, page in enumerate(pages):
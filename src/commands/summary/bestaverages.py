@@ -39,31 +39,19 @@ class BestAverages(Command):
         await run(ctx, profile, n, metric)
 
 
-async def run(ctx: BotContext, profile: dict, n: int, metric: str = "wpm"):
-    if n < 1:
-        raise NumberGreaterThan
-
-    race_list = await get_races(
-        user_id=profile["userId"],
-        columns=["wpm", "raceNumber", "timestamp", "accuracy", "pp", "quoteId"],
-        flags=ctx.flags,
-    )
-
-    if n > len(race_list):
-        raise NotEnoughRaces
-
+def get_best_averages(values: list[float], n: int, limit: int = 10):
+    """Returns the top (average, start_index) pairs of non-overlapping n-race windows."""
     # All averages (sliding window)
-    metric_values = [race[metric] or 0 for race in race_list]
     averages = []
 
-    for i in range(len(race_list) - n + 1):
-        window = metric_values[i:i + n]
+    for i in range(len(values) - n + 1):
+        window = values[i:i + n]
         average = sum(window) / n
         averages.append((average, i))
 
     sorted_averages = sorted(averages, key=lambda x: x[0], reverse=True)
 
-    # Find top 10 best non-overlapping averages
+    # Find the best non-overlapping averages
     best_averages = []
     used_indices = set()
 
@@ -73,11 +61,30 @@ async def run(ctx: BotContext, profile: dict, n: int, metric: str = "wpm"):
             best_averages.append((average, start_index))
             used_indices.update(window_indices)
 
-            if len(best_averages) >= 10:
+            if len(best_averages) >= limit:
                 break
 
     best_averages.sort(key=lambda x: x[0], reverse=True)
 
+    return best_averages
+
+
+async def run(ctx: BotContext, profile: dict, n: int, metric: str = "wpm"):
+    if n < 1:
+        raise NumberGreaterThan
+
+    race_list = await get_races(
+        user_id=profile["userId"],
+        columns=["wpm", "raceNumber", "timestamp", "accuracy", "pp", "quoteId"],
+        flags=ctx.flags,
+    )
+
+    if n > len(race_list):
+        raise NotEnoughRaces
+
+    metric_values = [race[metric] or 0 for race in race_list]
+    best_averages = get_best_averages(metric_values, n)
+
     top_average_desc = ""
     description = ""
 
@@ -0,0 +1,84 @@
+import math
+
+from discord.ext import commands
+
+from bot_setup import BotContext
+from commands.base import Command
+from commands.graphs.keystrokes import REPLACEMENT_CHARACTERS
+from database.typegg.timings import update_timings, get_ranked_timings
+from utils.messages import Page, Message, Field
+from utils.stats import calculate_wpm
+
+MIN_BIGRAM_COUNT = 50
+MIN_WORD_COUNT = 10
+info = {
+    "name": "bigrams",
+    "aliases": ["bi", "slowest"],
+    "description": "Displays a user's slowest and fastest bigrams and words across all of their races.\n"
+                   f"Only includes bigrams typed at least {MIN_BIGRAM_COUNT} times "
+                   f"and words typed at least {MIN_WORD_COUNT} times.",
+    "parameters": "[username]",
+    "examples": [
+        "-bi",
+        "-bi eiko",
+    ],
+}
+
+
+class Bigrams(Command):
+    @commands.command(aliases=info["aliases"])
+    async def bigrams(self, ctx: BotContext, *args: str):
+        profile = await self.get_profile(ctx, args[0] if args else None)
+        await run(ctx, profile)
+
+
+def format_key(key: str):
+    key = "".join(REPLACEMENT_CHARACTERS.get(char, char) for char in key)
+    return f"`{key.replace(" ", "␣")}`"
+
+
+def get_std_dev(timing: dict):
+    variance = timing["squares"] / timing["count"] - timing["average"] ** 2
+    return math.sqrt(max(variance, 0))
+
+
+def bigram_lines(timings: list):
+    return "\n".join(
+        f"{format_key(timing["key"])} ➜ {timing["average"]:,.0f}ms ± {get_std_dev(timing):,.0f} "
+        f"({timing["count"]:,})"
+        for timing in timings
+    ) or "Not enough data"
+
+
+def word_lines(timings: list):
+    return "\n".join(
+        f"{format_key(timing["key"])} ➜ {calculate_wpm(timing["average"], len(timing["key"])):,.2f} WPM "
+        f"({timing["count"]:,})"
+        for timing in timings
+    ) or "Not enough data"
+
+
+async def run(ctx: BotContext, profile: dict):
+    user_id = profile["userId"]
+    await update_timings(user_id)
+
+    pages = []
+    for kind, min_count, format_lines in [
+        ("bigram", MIN_BIGRAM_COUNT, bigram_lines),
+        ("word", MIN_WORD_COUNT, word_lines),
+    ]:
+        slowest = get_ranked_timings(user_id, kind, min_count, slowest=True)
+        fastest = get_ranked_timings(user_id, kind, min_count, slowest=False)
+
+        pages.append(Page(
+            title=f"{kind.title()} Timings",
+            fields=[
+                Field(title="Slowest", content=format_lines(slowest), inline=True),
+                Field(title="Fastest", content=format_lines(fastest), inline=True),
+            ],
+            button_name=f"{kind.title()}s",
+        ))
+
+    message = Message(ctx, pages=pages, profile=profile)
+
+    await message.send()
@@ -298,7 +298,7 @@ async def run_head_to_head(ctx: BotContext, profile1: dict, profile2: dict):
         ]:
             race = next(r for r in races if r["userId"] == profile["userId"])
             start_time = match[prefix + "StartTime"]
-            ks = get_keystroke_data(race["keystrokeData"], True, start_time)
+            ks = get_keystroke_data(race["keystrokeData"], True, start_time, race_id=race["raceId"])
 
             race |= {
                 "keystroke_wpm": ks.keystrokeWpm,
@@ -350,7 +350,62 @@ async def run_head_to_head(ctx: BotContext, profile1: dict, profile2: dict):
         )
     ]
 
-    # Biggest Wins
+    def codec_error_page(error: KeystrokeCodecError):
+        return Page(
+            title=f"Keystroke Codec Error",
+            description=str(error) + f"\nPlease tell <@{EIKO}> to fix this",
+            color=ERROR,
+        )
+
+    async def load_biggest_win(i: int, profile: dict, biggest: dict, delta: float):
+        try:
+            race_data = await load_race_data(biggest)
+        except KeystrokeCodecError as e:
+            return codec_error_page(e)
+
+        quote = get_quote(biggest["quoteId"])
+
+        return Page(
+            title=f"Biggest Win - {profile["username"]} (+{delta:,.2f} WPM)",
+            description=build_race_description(race_data, quote),
+            render=lambda: match_graph.render(
+                race_data=race_data,
+                title=(
+                    f"Match Graph - {profile1["username"]} - "
+                    f"Race #{race_data[i]["raceNumber"]:,}"
+                ),
+                theme=ctx.user["theme"],
+                themed_line=i,
+            ),
+            flag_title=True,
+        )
+
+    async def load_closest_race():
+        close_delta = abs(closest_race["userWpm"] - closest_race["opponentWpm"])
+        try:
+            close_race_data = await load_race_data(closest_race)
+        except KeystrokeCodecError as e:
+            return codec_error_page(e)
+
+        close_quote = get_quote(closest_race["quoteId"])
+        p1_race_number = next(r for r in close_race_data if r["userId"] == profile1["userId"])["raceNumber"]
+
+        return Page(
+            title=f"Closest Race (+{close_delta:,.2f} WPM)",
+            description=build_race_description(close_race_data, close_quote),
+            render=lambda: match_graph.render(
+                race_data=close_race_data,
+                title=(
+                    f"Match Graph - {profile1["username"]} - "
+                    f"Race #{p1_race_number:,}"
+                ),
+                theme=ctx.user['theme'],
+                themed_line=next(i for i, r in enumerate(close_race_data) if r["userId"] == profile1["userId"]),
+            ),
+            flag_title=True,
+        )
+
+    # Biggest Wins, loaded when first shown
     for i, profile in enumerate((profile1, profile2)):
         biggest = profile["enStats"]["biggestWin"]
 
@@ -366,63 +421,14 @@ async def run_head_to_head(ctx: BotContext, profile1: dict, profile2: dict):
         if delta <= 0:
             continue
 
-        try:
-            race_data = await load_race_data(biggest)
-            quote = get_quote(biggest["quoteId"])
-
-            pages.append(Page(
-                title=f"Biggest Win - {profile["username"]} (+{delta:,.2f} WPM)",
-                description=build_race_description(race_data, quote),
-                button_name=f"Biggest Win (p{i + 1})",
-                render=lambda id=i, rd=race_data: match_graph.render(
-                    race_data=rd,
-                    title=(
-                        f"Match Graph - {profile1["username"]} - "
-                        f"Race #{rd[id]["raceNumber"]:,}"
-                    ),
-                    theme=ctx.user["theme"],
-                    themed_line=id,
-                ),
-                flag_title=True,
-            ))
-        except KeystrokeCodecError as e:
-            pages.append(Page(
-                title=f"Keystroke Codec Error",
-                description=str(e) + f"\nPlease tell <@{EIKO}> to fix this",
-                button_name=f"Biggest Win (p{i + 1})",
-                color=ERROR,
-            ))
+        pages.append(Page(
+            button_name=f"Biggest Win (p{i + 1})",
+            load=lambda i=i, profile=profile, biggest=biggest, delta=delta: load_biggest_win(i, profile, biggest, delta),
+        ))
 
     # Closest race
     if closest_race is not None:
-        try:
-            close_delta = abs(closest_race["userWpm"] - closest_race["opponentWpm"])
-            close_race_data = await load_race_data(closest_race)
-            close_quote = get_quote(closest_race["quoteId"])
-            p1_race_number = next(r for r in close_race_data if r["userId"] == profile1["userId"])["raceNumber"]
-
-            pages.append(Page(
-                title=f"Closest Race (+{close_delta:,.2f} WPM)",
-                description=build_race_description(close_race_data, close_quote),
-                button_name="Closest Race",
-                render=lambda: match_graph.render(
-                    race_data=close_race_data,
-                    title=(
-                        f"Match Graph - {profile1["username"]} - "
-                        f"Race #{p1_race_number:,}"
-                    ),
-                    theme=ctx.user['theme'],
-                    themed_line=next(i for i, r in enumerate(close_race_data) if r["userId"] == profile1["userId"]),
-                ),
-                flag_title=True,
-            ))
-        except KeystrokeCodecError as e:
-            pages.append(Page(
-                title=f"Keystroke Codec Error",
-                description=str(e) + f"\nPlease tell <@{EIKO}> to fix this",
-                button_name="Closest Race",
-                color=ERROR,
-            ))
+        pages.append(Page(button_name="Closest Race", load=load_closest_race))
 
     message = Message(ctx, pages=pages)
     await message.send()
@@ -6,9 +6,10 @@ from discord.ext import commands
 from bot_setup import BotContext
 from commands.base import Command
 from database.typegg.quotes import get_quotes
+from database.typegg.race_rollups import ERROR_TIME_CAP, get_rollups, merge_rollups
 from database.typegg.races import get_races
 from database.typegg.users import get_quote_bests
-from utils.dates import count_unique_dates, parse_date, get_start_end_dates
+from utils.dates import count_unique_dates, parse_date, get_start_end_dates, to_epoch_ms, from_epoch_ms, date_to_string
 from utils.errors import NoRacesFiltered
 from utils.messages import Page, Message, Field
 from utils.stats import calculate_quote_length, calculate_quote_bests, calculate_total_pp
@@ -25,6 +26,7 @@ info = {
         "-rd eiko",
     ],
 }
+AVERAGE_KEYS = ["wpm", "rawWpm", "accuracy", "duration", "errorReactionTime", "errorRecoveryTime", "pp"]
 
 
 class Races(Command):
@@ -37,13 +39,15 @@ class Races(Command):
 
 
 def build_stat_fields(profile, race_list, flags, all_time=False):
+    return get_stat_fields(profile, summarize_races(profile, race_list, flags), flags, all_time)
+
+
+def summarize_races(profile, race_list, flags):
+    """Totals a list of races into the stats shown by get_stat_fields."""
     quote_list = get_quotes()
     multiplayer = flags.gamemode in ["quickplay", "lobby"]
 
-    cumulative_values = {
-        "wpm": [], "rawWpm": [], "accuracy": [], "duration": [],
-        "errorReactionTime": [], "errorRecoveryTime": [], "pp": [],
-    }
+    cumulative_values = {key: [] for key in AVERAGE_KEYS}
 
     total_races = 0
     solo_races = 0
@@ -78,7 +82,7 @@ def build_stat_fields(profile, race_list, flags, all_time=False):
         for key in cumulative_values:
             value = race[key] or 0
             if "error" in key:
-                cumulative_values[key].append(min(value, 2000))
+                cumulative_values[key].append(min(value, ERROR_TIME_CAP))
             else:
                 cumulative_values[key].append(value)
 
@@ -111,13 +115,91 @@ def build_stat_fields(profile, race_list, flags, all_time=False):
         else:
             cumulative_values[key] = 0
 
-    total_duration /= 1000
-    completion_rate = total_races / (total_races + dnf_count)
-    win_rate = wins / (total_races + dnf_count)
+    return {
+        "averages": cumulative_values,
+        "races": total_races,
+        "solo_races": solo_races,
+        "multi_races": multi_races,
+        "dnfs": dnf_count,
+        "wins": wins,
+        "best": best,
+        "duration": total_duration,
+        "words": words_typed,
+        "chars": chars_typed,
+        "difficulty": difficulty,
+        "quote_bests": calculate_quote_bests(race_list),
+        "start_date": race_list[0]["timestamp"],
+        "end_date": race_list[-1]["timestamp"],
+    }
+
+
+def summarize_rollups(profile, start_date, end_date, flags):
+    """
+    Totals a user's races over a period from their hourly rollups, without reading every race.
+    Only covers all and solo races without a language filter. Returns None if there were no races.
+    """
+    user_id = profile["userId"]
+    totals = merge_rollups(get_rollups(
+        user_id,
+        start_date=None if start_date is None else to_epoch_ms(start_date),
+        end_date=None if end_date is None else to_epoch_ms(end_date),
+        solo=True if flags.gamemode == "solo" else None,
+        status=flags.status,
+    ))
 
-    period_quote_bests = calculate_quote_bests(race_list)
+    if totals is None:
+        return None
+
+    quote_list = get_quotes()
+    quote_bests = get_quote_bests(
+        user_id=user_id,
+        columns=["quoteId", "COUNT(*) AS races"],
+        start_date=start_date,
+        end_date=end_date,
+        flags=flags,
+    )
+    total_races = totals["races"]
+
+    return {
+        "averages": {key: totals[key] / total_races for key in AVERAGE_KEYS},
+        "races": total_races,
+        "solo_races": totals["soloRaces"],
+        "multi_races": total_races - totals["soloRaces"],
+        "dnfs": 0,
+        "wins": 0,
+        "best": {
+            "pp": {"pp": totals["bestPp"], "raceNumber": totals["bestPpRace"]},
+            "wpm": {"wpm": totals["bestWpm"], "raceNumber": totals["bestWpmRace"]},
+        },
+        "duration": totals["duration"],
+        "words": sum(quote["races"] * len(quote_list[quote["quoteId"]]["text"].split()) for quote in quote_bests),
+        "chars": totals["chars"],
+        "difficulty": sum(quote["races"] * quote_list[quote["quoteId"]]["difficulty"] for quote in quote_bests),
+        "quote_bests": quote_bests,
+        "start_date": date_to_string(from_epoch_ms(totals["firstTimestampMs"])),
+        "end_date": date_to_string(from_epoch_ms(totals["lastTimestampMs"])),
+    }
+
+
+def get_stat_fields(profile, stats, flags, all_time=False):
+    multiplayer = flags.gamemode in ["quickplay", "lobby"]
+    cumulative_values = stats["averages"]
+    best = stats["best"]
+    total_races = stats["races"]
+    solo_races = stats["solo_races"]
+    multi_races = stats["multi_races"]
+    wins = stats["wins"]
+    words_typed = stats["words"]
+    chars_typed = stats["chars"]
+    difficulty = stats["difficulty"]
+
+    total_duration = stats["duration"] / 1000
+    completion_rate = total_races / (total_races + stats["dnfs"])
+    win_rate = wins / (total_races + stats["dnfs"])
+
+    period_quote_bests = stats["quote_bests"]
     period_total_pp = calculate_total_pp(period_quote_bests)
-    end_date = parse_date(race_list[-1]["timestamp"]) + relativedelta(microseconds=1000)
+    end_date = parse_date(stats["end_date"]) + relativedelta(microseconds=1000)
 
     quote_bests = get_quote_bests(
         user_id=profile["userId"],
@@ -126,7 +208,7 @@ def build_stat_fields(profile, race_list, flags, all_time=False):
     )
     total_pp = calculate_total_pp(quote_bests)
 
-    min_timestamp = race_list[0]["timestamp"]
+    min_timestamp = stats["start_date"]
     old_quote_bests = get_quote_bests(
         user_id=profile["userId"],
         end_date=min_timestamp,
@@ -163,8 +245,8 @@ def build_stat_fields(profile, race_list, flags, all_time=False):
     unique_quotes = len(period_quote_bests)
     new_quotes = len(quote_bests) - len(old_quote_bests)
 
-    start_date = race_list[0]["timestamp"]
-    end_date = race_list[-1]["timestamp"]
+    start_date = stats["start_date"]
+    end_date = stats["end_date"]
     start_time = parse_date(start_date).timestamp()
     end_time = parse_date(end_date).timestamp()
     timespan = end_time - start_time
@@ -214,17 +296,22 @@ async def run(
     flags = ctx.flags
     start_date, end_date = get_start_end_dates(date, period, ctx.user["timezone"])
 
-    race_list = await get_races(
-        user_id=profile["userId"],
-        start_date=start_date,
-        end_date=end_date,
-        flags=flags,
-    )
+    # Multiplayer results and language filters need every race, otherwise the hourly rollups are totalled
+    if flags.gamemode in ["quickplay", "lobby"] or flags.language:
+        race_list = await get_races(
+            user_id=profile["userId"],
+            start_date=start_date,
+            end_date=end_date,
+            flags=flags,
+        )
+        stats = summarize_races(profile, race_list, flags) if race_list else None
+    else:
+        stats = summarize_rollups(profile, start_date, end_date, flags)
 
-    if race_list:
-        fields = build_stat_fields(
+    if stats:
+        fields = get_stat_fields(
             profile,
-            race_list,
+            stats,
             flags,
             start_date is None and end_date is None,
         )
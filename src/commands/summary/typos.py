@@ -0,0 +1,68 @@
+from discord.ext import commands
+
+from bot_setup import BotContext
+from commands.base import Command
+from commands.graphs.keystrokes import REPLACEMENT_CHARACTERS
+from database.typegg.keystroke_jobs import run_job
+from utils.keystroke_jobs import JOBS
+from utils.messages import Page, Message, Field
+
+MIN_TYPED_COUNT = 100
+info = {
+    "name": "typos",
+    "aliases": ["ty"],
+    "description": "Displays the characters a user makes the most and fewest typos on across all of their races.\n"
+                   f"Only includes characters typed at least {MIN_TYPED_COUNT} times.",
+    "parameters": "[username]",
+    "examples": [
+        "-ty",
+        "-ty eiko",
+    ],
+}
+
+
+class Typos(Command):
+    @commands.command(aliases=info["aliases"])
+    async def typos(self, ctx: BotContext, *args: str):
+        profile = await self.get_profile(ctx, args[0] if args else None)
+        await run(ctx, profile)
+
+
+def format_char(char: str):
+    char = REPLACEMENT_CHARACTERS.get(char, char)
+    return f"`{char.replace(" ", "␣")}`"
+
+
+def typo_lines(rates: list):
+    return "\n".join(
+        f"{format_char(char)} ➜ {rate:.2%} ({typos:,} / {typed:,})"
+        for char, rate, typos, typed in rates
+    ) or "Not enough data"
+
+
+async def run(ctx: BotContext, profile: dict):
+    counts = await run_job(JOBS["character_typos"], profile["userId"])
+    typed, typos = counts["typed"], counts["typos"]
+
+    rates = sorted(
+        [(char, typos[char] / count, typos[char], count) for char, count in typed.items() if count >= MIN_TYPED_COUNT],
+        key=lambda rate: -rate[1],
+    )
+    total_typed = sum(typed.values())
+    total_typos = sum(typos.values())
+
+    page = Page(
+        title="Typos",
+        description=(
+            f"**Characters Typed:** {total_typed:,}\n"
+            f"**Typos:** {total_typos:,} ({total_typos / total_typed if total_typed else 0:.2%})\n"
+        ),
+        fields=[
+            Field(title="Most Typos", content=typo_lines(rates[:10]), inline=True),
+            Field(title="Fewest Typos", content=typo_lines(rates[::-1][:10]), inline=True),
+        ],
+    )
+
+    message = Message(ctx, page=page, profile=profile)
+
+    await message.send()
@@ -81,3 +81,4 @@ KEEGAN = 155481579005804544
 # === Paths ===
 ROOT_DIR = Path(__file__).resolve().parents[1]
 SOURCE_DIR = ROOT_DIR / "src"
+DATA_DIR = Path(os.getenv("DATA_DIR") or SOURCE_DIR / "data")
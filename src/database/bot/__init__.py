@@ -5,7 +5,7 @@ db.run("""
         discordId TEXT PRIMARY KEY,
         userId TEXT,
         theme JSON,
-        commands JSON,
+        commands JSON, -- Legacy, migrated to command_usage
         joined REAL,
         startDate REAL,
         endDate REAL,
@@ -41,3 +41,20 @@ db.run("""
         timestamp INTEGER NOT NULL
     )
 """)
+
+db.run("""
+    CREATE TABLE IF NOT EXISTS command_usage (
+        discordId TEXT NOT NULL,
+        command TEXT NOT NULL,
+        origin TEXT NOT NULL, -- 'server', 'dm', or 'unknown' for counts migrated from users.commands
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (discordId, command, origin)
+    )
+""")
+db.run("CREATE INDEX IF NOT EXISTS idx_command_usage_command ON command_usage(command, discordId, count)")
+
+# One-time copy of the counts that used to be kept in the users.commands JSON column
+if db.fetch_one("PRAGMA user_version")[0] < 1:
+    from database.bot.command_usage import migrate_command_usage
+
+    migrate_command_usage(version=1)
@@ -0,0 +1,155 @@
+import atexit
+import json
+from collections import Counter
+
+from database.bot import db
+
+FLUSH_INTERVAL = 5  # Seconds between writes of the pending counts
+
+# (discordId, command, origin) -> uses not yet written to the database
+pending = Counter()
+
+UPSERT_QUERY = """
+    INSERT INTO command_usage (discordId, command, origin, count)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (discordId, command, origin) DO UPDATE SET count = count + excluded.count
+"""
+
+
+def record_command(discord_id: str, command_name: str, origin: str):
+    """
+    Counts a command use in memory, to be written with the next flush.
+    Args:
+        discord_id: Discord ID of the user
+        command_name: Name of the command used
+        origin: Origin of the command ('server', 'dm')
+    """
+    pending[(str(discord_id), command_name, origin)] += 1
+
+
+def _take_pending():
+    counts = [(*key, count) for key, count in pending.items()]
+    pending.clear()
+    return counts
+
+
+def _restore_pending(counts: list[tuple]):
+    """Puts counts that failed to write back into the pending counts, alongside any recorded since."""
+    for *key, count in counts:
+        pending[tuple(key)] += count
+
+
+def flush():
+    """Writes the pending command counts in a single transaction. Counts are kept for the next flush if it fails."""
+    if counts := _take_pending():
+        try:
+            db.run_many(UPSERT_QUERY, counts)
+        except Exception:
+            _restore_pending(counts)
+            raise
+
+
+atexit.register(flush)
+
+
+async def flush_async():
+    """
+    Writes the pending command counts without blocking the event loop.
+    Counts are kept for the next flush if it fails.
+    """
+    if counts := _take_pending():
+        try:
+            await db.run_many_async(UPSERT_QUERY, counts)
+        except Exception:
+            _restore_pending(counts)
+            raise
+
+
+def get_command_usage(discord_id: int | str):
+    """Return command counts for a single user."""
+    flush()
+    results = db.fetch("""
+        SELECT command, SUM(count) AS count FROM command_usage
+        WHERE discordId = ?
+        GROUP BY command
+    """, [str(discord_id)])
+
+    return {row["command"]: row["count"] for row in results}
+
+
+def get_all_command_usage():
+    """Return total command counts across all users."""
+    flush()
+    results = db.fetch("""
+        SELECT command, SUM(count) AS count FROM command_usage
+        GROUP BY command
+    """)
+
+    return {row["command"]: row["count"] for row in results}
+
+
+def get_total_command_count():
+    """Return the number of commands used across all users."""
+    flush()
+    return db.fetch_one("SELECT COALESCE(SUM(count), 0) FROM command_usage")[0]
+
+
+def get_command_leaderboard(command_name: str, limit: int = 10):
+    """Return the users who used a command the most."""
+    flush()
+    results = db.fetch("""
+        SELECT discordId, SUM(count) AS count FROM command_usage
+        WHERE command = ?
+        GROUP BY discordId
+        ORDER BY count DESC
+        LIMIT ?
+    """, [command_name, limit])
+
+    return [{"discord_id": row["discordId"], "count": row["count"]} for row in results]
+
+
+def get_top_users_by_command_usage(limit: int = 20):
+    """Return users sorted by total command usage, along with the number of users who have used a command."""
+    flush()
+    results = db.fetch("""
+        SELECT discordId, SUM(count) AS total FROM command_usage
+        GROUP BY discordId
+        ORDER BY total DESC
+        LIMIT ?
+    """, [limit])
+    user_count = db.fetch_one("SELECT COUNT(DISTINCT discordId) FROM command_usage")[0]
+
+    return [{"discord_id": row["discordId"], "total_commands": row["total"]} for row in results], user_count
+
+
+def rename_command(old_name: str, new_name: str):
+    """Merge the usage of an old command name into a new one. Returns the number of users affected."""
+    flush()
+    affected = db.fetch_one("""
+        SELECT COUNT(DISTINCT discordId) FROM command_usage
+        WHERE command = ?
+    """, [old_name])[0]
+
+    db.run_transaction([
+        ("""
+            INSERT INTO command_usage (discordId, command, origin, count)
+            SELECT discordId, ?, origin, count FROM command_usage
+            WHERE command = ?
+            ON CONFLICT (discordId, command, origin) DO UPDATE SET count = count + excluded.count
+        """, [new_name, old_name]),
+        ("DELETE FROM command_usage WHERE command = ?", [old_name]),
+    ])
+
+    return affected
+
+
+def migrate_command_usage(version: int):
+    """Copies the per-user counts from the users.commands JSON column into command_usage, then sets the version."""
+    # The JSON only kept server and DM totals, not the origin of each command
+    counts = []
+    for user in db.fetch("SELECT discordId, commands FROM users WHERE commands IS NOT NULL"):
+        for command_name, count in json.loads(user["commands"]).get("counts", {}).items():
+            counts.append((str(user["discordId"]), command_name, "unknown", count))
+
+    # Applied together with the version, so the counts can't be copied twice
+    db.run_transaction([(UPSERT_QUERY, row) for row in counts] + [(f"PRAGMA user_version = {version}", [])])
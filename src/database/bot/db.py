@@ -2,14 +2,18 @@ import os
 import sqlite3
 from typing import Optional
 
-from config import SOURCE_DIR
+from config import DATA_DIR
+from database.writer import Writer
 
-folder_path = SOURCE_DIR / "data"
+folder_path = DATA_DIR
 os.makedirs(folder_path, exist_ok=True)
 
 file = os.path.join(folder_path, "users.db")
 connection = sqlite3.connect(file)
 connection.row_factory = sqlite3.Row
+connection.execute("PRAGMA journal_mode = WAL")  # Lets reads continue while the writer thread commits
+
+writer = Writer(file, name="bot-writer")
 
 
 def _execute_fetch(query: str, params: list, one: bool):
@@ -34,10 +38,29 @@ def fetch_one(query: str, params: Optional[list] = []):
 
 def run(query: str, params: Optional[list] = []):
     """Execute a write query (INSERT, UPDATE, DELETE) with commit."""
-    cursor = connection.cursor()
+    writer.execute(lambda cursor: cursor.execute(query, params))
 
-    try:
+
+async def run_async(query: str, params: Optional[list] = []):
+    """Queue a write query without blocking, committing it together with other queued writes."""
+    await writer.execute_async(lambda cursor: cursor.execute(query, params))
+
+
+def run_many(query: str, data: list):
+    """Execute a write query on multiple sets of parameters with commit."""
+    writer.execute(lambda cursor: cursor.executemany(query, data))
+
+
+async def run_many_async(query: str, data: list):
+    """Queue a write query on multiple sets of parameters without blocking."""
+    await writer.execute_async(lambda cursor: cursor.executemany(query, data))
+
+
+def _run_statements(cursor, statements: list[tuple]):
+    for query, params in statements:
         cursor.execute(query, params)
-        connection.commit()
-    finally:
-        cursor.close()
+
+
+def run_transaction(statements: list[tuple]):
+    """Execute multiple write queries atomically in a single transaction."""
+    writer.execute(lambda cursor: _run_statements(cursor, statements))
@@ -1,14 +1,106 @@
 import json
-from typing import Counter
+from collections import OrderedDict
+from typing import Optional
 
 from database.bot import db
 from utils import dates
 from utils.colors import DEFAULT_THEME
 
+MAX_CACHED_USERS = 10_000
+MISSING = object()
 
-def _parse_counts(commands_json: str):
-    """Parse the commands JSON string and return the counts dict."""
-    return json.loads(commands_json).get("counts", {})
+
+class UserCache:
+    """
+    Least recently used cache of user records by Discord ID, with an index of TypeGG user IDs.
+    Every write in this module updates the cached record, so it never has to be re-read.
+    """
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self.users: OrderedDict[str, Optional[dict]] = OrderedDict()  # None marks a Discord ID with no record
+        self.user_ids: dict[str, set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, discord_id: str):
+        """Returns the cached user, None if the user is known not to exist, or MISSING."""
+        user = self.users.get(discord_id, MISSING)
+        if user is MISSING:
+            self.misses += 1
+            return MISSING
+
+        self.users.move_to_end(discord_id)
+        self.hits += 1
+
+        return user
+
+    def get_discord_ids(self, user_id: str):
+        return self.user_ids.get(user_id, set())
+
+    def add(self, discord_id: str, user: Optional[dict]):
+        self.remove(discord_id)
+        self.users[discord_id] = user
+        if user and user["userId"]:
+            self.user_ids.setdefault(user["userId"], set()).add(discord_id)
+
+        while len(self.users) > self.max_users:
+            evicted_id, _ = self.users.popitem(last=False)
+            self._unindex(evicted_id)
+            self.evictions += 1
+
+    def update(self, discord_id: str, **fields):
+        """Applies written fields to a cached user."""
+        user = self.users.get(discord_id)
+        if not user:
+            return
+
+        if "userId" in fields:
+            self._unindex(discord_id)
+        user.update(fields)
+        if user["userId"]:
+            self.user_ids.setdefault(user["userId"], set()).add(discord_id)
+
+    def remove(self, discord_id: str):
+        self._unindex(discord_id)
+        self.users.pop(discord_id, None)
+
+    def _unindex(self, discord_id: str):
+        user = self.users.get(discord_id)
+        if user and user["userId"] in self.user_ids:
+            self.user_ids[user["userId"]].discard(discord_id)
+            if not self.user_ids[user["userId"]]:
+                del self.user_ids[user["userId"]]
+
+    def clear(self):
+        self.users.clear()
+        self.user_ids.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.users),
+            "max_entries": self.max_users,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+user_cache = UserCache(MAX_CACHED_USERS)
+
+
+def _parse_user(row):
+    user = dict(row)
+    user["theme"] = json.loads(user["theme"])
+    return user
+
+
+def _copy_user(user: dict):
+    """Callers modify the user and its theme, so they are given copies of the cached record."""
+    return dict(user, theme=dict(user["theme"]))
 
 
 def add_user(discord_id: str):
@@ -16,11 +108,7 @@ def add_user(discord_id: str):
         "discordId": discord_id,
         "userId": None,
         "theme": json.dumps(DEFAULT_THEME),
-        "commands": json.dumps({
-            "counts": {},
-            "server": 0,
-            "dm": 0,
-        }),
+        "commands": None,  # Legacy, usage is kept in command_usage
         "joined": dates.now().timestamp(),
         "startDate": None,
         "endDate": None,
@@ -33,46 +121,51 @@ def add_user(discord_id: str):
     user_values = user.values()
 
     db.run(f"INSERT INTO users VALUES ({",".join(["?"] * len(user_values))})", list(user_values))
+    user_cache.add(str(discord_id), dict(user, discordId=str(discord_id), theme=dict(DEFAULT_THEME)))
 
     return user
 
 
 def get_user(discord_id: str, auto_insert: bool = True):
     """Returns a user object given a Discord ID. Optionally create a new user if no record is found."""
-    results = db.fetch("""
-        SELECT * FROM users
-        WHERE discordId = ?
-        LIMIT 1
-    """, [discord_id])
+    discord_id = str(discord_id)
+    user = user_cache.get(discord_id)
 
-    if results:
-        user = results[0]
-    elif auto_insert:
-        user = add_user(discord_id)
-    else:
-        return None
+    if user is MISSING:
+        result = db.fetch_one("""
+            SELECT * FROM users
+            WHERE discordId = ?
+        """, [discord_id])
+        user = _parse_user(result) if result else None
+        user_cache.add(discord_id, user)
 
-    user = dict(user)
-    user["theme"] = json.loads(user["theme"])
-    return user
+    if user is None:
+        if not auto_insert:
+            return None
+        add_user(discord_id)
+        user = user_cache.get(discord_id)
+
+    return _copy_user(user)
 
 
 def get_user_by_user_id(user_id: str):
     """Returns a user object given a TypeGG user ID."""
-    results = db.fetch("""
+    if discord_ids := user_cache.get_discord_ids(user_id):
+        return get_user(next(iter(discord_ids)), auto_insert=False)
+
+    result = db.fetch_one("""
         SELECT * FROM users
         WHERE userId = ?
         LIMIT 1
     """, [user_id])
 
-    if results:
-        user = results[0]
-    else:
+    if not result:
         return None
 
-    user = dict(user)
-    user["theme"] = json.loads(user["theme"])
-    return user
+    user = _parse_user(result)
+    user_cache.add(user["discordId"], user)
+
+    return _copy_user(user)
 
 
 def get_user_ids():
@@ -81,77 +174,11 @@ def get_user_ids():
     return [int(user[0]) for user in users]
 
 
-def get_command_usage(user_id: int):
-    """Return command counts for a single user."""
-    results = db.fetch("SELECT commands FROM users WHERE discordId = ?", [user_id])
-    return _parse_counts(results[0]["commands"]) if results else {}
-
-
-def get_all_command_usage():
-    """Return total command counts across all users."""
-    all_commands = db.fetch("SELECT commands FROM users")
-    counter = Counter()
-
-    for user in all_commands:
-        counter.update(_parse_counts(user["commands"]))
-
-    return dict(counter)
-
-
-def get_command_usage_by_user():
-    """Return a list of per-user command counts."""
-    all_commands = db.fetch("SELECT discordId, commands FROM users")
-    return [
-        {"discord_id": user["discordId"], "commands": _parse_counts(user["commands"])}
-        for user in all_commands
-    ]
-
-
-def get_top_users_by_command_usage():
-    """Return users sorted by total command usage."""
-    users = db.fetch("SELECT discordId, commands FROM users")
-
-    top_users = [{
-        "discord_id": user["discordId"],
-        "total_commands": sum(_parse_counts(user["commands"]).values()),
-    } for user in users]
-
-    return sorted(top_users, key=lambda u: u["total_commands"], reverse=True)
-
-
 def get_theme(discord_id: int):
     """Returns a user's theme if they exist."""
-    results = db.fetch("SELECT theme FROM users WHERE discordId = ?", [discord_id])
+    user = get_user(discord_id, auto_insert=False)
 
-    return json.loads(results[0]["theme"]) if results else None
-
-
-def update_commands(discord_id: str, command_name: str, origin: str):
-    """
-    Increments a user's command count.
-    Args:
-        discord_id: Discord ID of the user
-        command_name: Name of the command used
-        origin: Origin of the command ('server', 'dm')
-    """
-    user_commands = db.fetch("""
-        SELECT commands FROM users
-        WHERE discordId = ?
-    """, [discord_id])[0][0]
-
-    user_commands = json.loads(user_commands)
-
-    if command_name in user_commands["counts"]:
-        user_commands["counts"][command_name] += 1
-    else:
-        user_commands["counts"][command_name] = 1
-    user_commands[origin] += 1
-
-    db.run("""
-        UPDATE users
-        SET commands = ?
-        WHERE discordId = ?
-    """, [json.dumps(user_commands), discord_id])
+    return user["theme"] if user else None
 
 
 def update_theme(discord_id: str, theme: dict):
@@ -160,6 +187,7 @@ def update_theme(discord_id: str, theme: dict):
         SET theme = ?
         WHERE discordId = ?
     """, [json.dumps(theme), discord_id])
+    user_cache.update(str(discord_id), theme=dict(theme))
 
 
 def update_warning(discord_id: str):
@@ -168,6 +196,7 @@ def update_warning(discord_id: str):
         SET isPrivacyWarned = 1
         WHERE discordId = ?
     """, [discord_id])
+    user_cache.update(str(discord_id), isPrivacyWarned=1)
 
 
 def update_gg_plus_status(user_id: str, is_gg_plus: bool):
@@ -177,6 +206,8 @@ def update_gg_plus_status(user_id: str, is_gg_plus: bool):
         SET isGgPlus = ?
         WHERE userId = ?
     """, [1 if is_gg_plus else 0, user_id])
+    for discord_id in list(user_cache.get_discord_ids(user_id)):
+        user_cache.update(discord_id, isGgPlus=1 if is_gg_plus else 0)
 
 
 def update_timezone(discord_id: str, timezone: str):
@@ -186,6 +217,7 @@ def update_timezone(discord_id: str, timezone: str):
         SET timezone = ?
         WHERE discordId = ?
     """, [timezone, discord_id])
+    user_cache.update(str(discord_id), timezone=timezone)
 
 
 def link_user(discord_id: str, user_id: str):
@@ -195,6 +227,7 @@ def link_user(discord_id: str, user_id: str):
         SET userId = ?
         WHERE discordId = ?
     """, [user_id, discord_id])
+    user_cache.update(str(discord_id), userId=user_id)
 
 
 def unlink_user(discord_id: str):
@@ -204,6 +237,7 @@ def unlink_user(discord_id: str):
         SET userId = NULL
         WHERE discordId = ?
     """, [discord_id])
+    user_cache.update(str(discord_id), userId=None)
 
 
 def get_all_linked_users():
@@ -219,13 +253,9 @@ def get_all_linked_users():
 
 def is_user_linked(discord_id: str) -> bool:
     """Check if a Discord user is linked to a user ID."""
-    results = db.fetch("""
-        SELECT userId
-        FROM users
-        WHERE discordId = ? AND userId IS NOT NULL
-    """, [discord_id])
+    user = get_user(discord_id, auto_insert=False)
 
-    return len(results) > 0
+    return bool(user and user["userId"])
 
 
 def ban_user(discord_id: str):
@@ -234,6 +264,7 @@ def ban_user(discord_id: str):
         SET isBanned = 1
         WHERE discordId = ?
     """, [discord_id])
+    user_cache.update(str(discord_id), isBanned=1)
 
 
 def unban_user(discord_id: str):
@@ -242,6 +273,7 @@ def unban_user(discord_id: str):
         SET isBanned = 0
         WHERE discordId = ?
     """, [discord_id])
+    user_cache.update(str(discord_id), isBanned=0)
 
 
 def admin_user(discord_id: str):
@@ -250,6 +282,7 @@ def admin_user(discord_id: str):
         SET isAdmin = 1
         WHERE discordId = ?
     """, [discord_id])
+    user_cache.update(str(discord_id), isAdmin=1)
 
 
 def unadmin_user(discord_id: str):
@@ -258,6 +291,7 @@ def unadmin_user(discord_id: str):
         SET isAdmin = 0
         WHERE discordId = ?
     """, [discord_id])
+    user_cache.update(str(discord_id), isAdmin=0)
 
 
 def get_admin_users():
@@ -270,39 +304,8 @@ def get_admin_users():
 
 
 def get_discord_id(user_id: str):
-    result = db.fetch_one("SELECT discordId FROM users WHERE userId = ?", [user_id])
-    if not result:
+    user = get_user_by_user_id(user_id)
+    if not user:
         return None
 
-    return result["discordId"]
-
-
-def migrate_command_name(old_name: str, new_name: str):
-    """Migrate command usage data from an old command name to a new one."""
-    all_users = db.fetch("SELECT discordId, commands FROM users")
-    affected_count = 0
-
-    for user in all_users:
-        commands_data = json.loads(user["commands"])
-        counts = commands_data.get("counts", {})
-
-        # Check if old command name exists
-        if old_name in counts:
-            old_count = counts.pop(old_name)
-
-            # If new name already exists, merge the counts
-            if new_name in counts:
-                counts[new_name] += old_count
-            else:
-                counts[new_name] = old_count
-
-            # Update the database
-            db.run("""
-                UPDATE users
-                SET commands = ?
-                WHERE discordId = ?
-            """, [json.dumps(commands_data), user["discordId"]])
-
-            affected_count += 1
-
-    return affected_count
+    return user["discordId"]
@@ -1,4 +1,5 @@
 from database.typegg import db
+from database.typegg.migrations import migrate
 
 db.run("""
     CREATE TABLE IF NOT EXISTS users (
@@ -25,17 +26,15 @@ db.run("""
         errorReactionTime REAL NOT NULL,
         errorRecoveryTime REAL NOT NULL,
         timestamp TEXT NOT NULL, -- ISO 8601 string
-        stickyStart INTEGER -- boolean
+        stickyStart INTEGER, -- boolean
+        timestampMs INTEGER -- timestamp as milliseconds since the Unix epoch
     );
 """)
 
-db.run("CREATE INDEX IF NOT EXISTS idx_races_userId on races(userId)")
-db.run("CREATE INDEX IF NOT EXISTS idx_races_userId_quoteId on races(userId, quoteId)")
-db.run("CREATE INDEX IF NOT EXISTS idx_races_quoteId_pp ON races(quoteId, pp DESC)")
-
+# Stored in the attached keystroke database, so race IDs can't reference races(raceId)
 db.run("""
-    CREATE TABLE IF NOT EXISTS keystroke_data (
-        raceId TEXT PRIMARY KEY REFERENCES races(raceId) ON DELETE CASCADE,
+    CREATE TABLE IF NOT EXISTS keystrokes.keystroke_data (
+        raceId TEXT PRIMARY KEY,
         keystrokeData BLOB NOT NULL,
         compressed INTEGER NOT NULL DEFAULT 0 -- boolean
     )
@@ -135,7 +134,8 @@ db.run("""
         accuracy REAL,
         placement INTEGER,
         completionType TEXT,
-        timestamp TEXT -- ISO 8601 string
+        timestamp TEXT, -- ISO 8601 string
+        timestampMs INTEGER -- timestamp as milliseconds since the Unix epoch
     )
 """)
 
@@ -151,6 +151,92 @@ db.run("""
 """)
 db.run("CREATE INDEX IF NOT EXISTS idx_races_matchId_userId ON races(matchId, userId)")
 
+# Hourly per-user race totals, maintained by races.add_races
+db.run("""
+    CREATE TABLE IF NOT EXISTS race_rollups (
+        userId TEXT NOT NULL,
+        bucket INTEGER NOT NULL, -- hours since the Unix epoch
+        solo INTEGER NOT NULL, -- boolean
+        ranked INTEGER NOT NULL, -- boolean
+        races INTEGER NOT NULL,
+        wpm REAL NOT NULL, -- sums of each race's values
+        rawWpm REAL NOT NULL,
+        accuracy REAL NOT NULL,
+        duration REAL NOT NULL,
+        errorReactionTime REAL NOT NULL,
+        errorRecoveryTime REAL NOT NULL,
+        pp REAL NOT NULL,
+        chars INTEGER NOT NULL,
+        bestPp REAL NOT NULL,
+        bestPpRace INTEGER, -- race number
+        bestWpm REAL NOT NULL,
+        bestWpmRace INTEGER,
+        firstTimestampMs INTEGER NOT NULL,
+        lastTimestampMs INTEGER NOT NULL,
+        PRIMARY KEY (userId, bucket, solo, ranked)
+    )
+""")
+
+db.run("""
+    CREATE TABLE IF NOT EXISTS segment_bests (
+        userId TEXT NOT NULL,
+        quoteId TEXT NOT NULL REFERENCES quotes(quoteId) ON UPDATE CASCADE ON DELETE CASCADE,
+        segment INTEGER NOT NULL, -- index into the quote's text segments
+        text TEXT NOT NULL,
+        wpm REAL NOT NULL,
+        rawWpm REAL NOT NULL,
+        delays TEXT NOT NULL, -- JSON
+        raceNumber INTEGER,
+        timestamp TEXT, -- ISO 8601 string
+        PRIMARY KEY (userId, quoteId, segment)
+    )
+""")
+
+db.run("""
+    CREATE TABLE IF NOT EXISTS segment_best_progress (
+        userId TEXT NOT NULL,
+        quoteId TEXT NOT NULL REFERENCES quotes(quoteId) ON UPDATE CASCADE ON DELETE CASCADE,
+        lastRaceRow INTEGER NOT NULL, -- rowid of the last race included
+        processorVersion INTEGER NOT NULL,
+        PRIMARY KEY (userId, quoteId)
+    )
+""")
+
+for table in ["bigram_timings", "word_timings"]:
+    db.run(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            userId TEXT NOT NULL,
+            key TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            total REAL NOT NULL, -- ms
+            squares REAL NOT NULL, -- sum of squared times
+            best REAL NOT NULL, -- ms
+            PRIMARY KEY (userId, key)
+        )
+    """)
+
+db.run("""
+    CREATE TABLE IF NOT EXISTS timing_progress (
+        userId TEXT PRIMARY KEY,
+        lastRaceRow INTEGER NOT NULL, -- rowid of the last race included
+        processorVersion INTEGER NOT NULL
+    )
+""")
+
+db.run("""
+    CREATE TABLE IF NOT EXISTS keystroke_job_progress (
+        job TEXT NOT NULL,
+        userId TEXT NOT NULL, -- empty for jobs across all users
+        lastRow INTEGER NOT NULL, -- rowid of the last race or keystroke data row included
+        jobVersion INTEGER NOT NULL,
+        processorVersion INTEGER NOT NULL,
+        accumulator BLOB NOT NULL, -- pickled
+        PRIMARY KEY (job, userId)
+    )
+""")
+
+migrate()
+
 db.run("""
     CREATE VIEW IF NOT EXISTS multiplayer_races AS
     SELECT
@@ -170,12 +256,13 @@ db.run("""
         mr.rawMatchPp as rawPp,
         mr.completionType,
         mr.timestamp,
+        mr.timestampMs,
         mr.placement,
         m.gamemode,
         m.players
     FROM match_results mr
     LEFT JOIN races r ON r.matchId = mr.matchId AND r.userId = mr.userId
-    JOIN matches m ON m.matchId = mr.matchId
+    CROSS JOIN matches m ON m.matchId = mr.matchId -- Keeps match_results as the outer loop for userId lookups
 """)
 
 db.run("""
@@ -199,6 +286,7 @@ db.run("""
         opp.startTime as opponentStartTime,
         COALESCE(opp.botId, '') != '' AS isBot,
         mr.timestamp AS timestamp,
+        mr.timestampMs AS timestampMs,
         m.gamemode,
         m.quoteId
     FROM match_results mr
@@ -127,12 +127,12 @@ def get_user_results(user_id: str):
 
 def get_today_result(user_id: str, quote_id: str):
     """Fetch the user's best race on today's daily quote."""
-    today = dates.floor_day(dates.now()).strftime("%Y-%m-%d")
+    today = dates.to_epoch_ms(dates.floor_day(dates.now()))
     return db.fetch_one("""
         SELECT pp, wpm FROM races
         WHERE userId = ?
         AND quoteId = ?
-        AND timestamp >= ?
+        AND timestampMs >= ?
         ORDER BY wpm DESC
         LIMIT 1
     """, [user_id, quote_id, today])
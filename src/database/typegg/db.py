@@ -1,32 +1,73 @@
 import os
 import sqlite3
+import threading
 from typing import Optional
 
 import aiosqlite
 
-from config import SOURCE_DIR
+from config import DATA_DIR
+from database.writer import Writer
 
-folder_path = SOURCE_DIR / "data"
+folder_path = DATA_DIR
 os.makedirs(folder_path, exist_ok=True)
 
 file = os.path.join(folder_path, "typegg.db")
+keystroke_file = os.path.join(folder_path, "keystrokes.db")  # Cold storage, attached as "keystrokes"
 
-reader = sqlite3.connect(file)
-reader.row_factory = sqlite3.Row
-reader.execute("PRAGMA foreign_keys = ON")
-reader.execute("PRAGMA journal_mode = WAL")
-reader.execute("PRAGMA cache_size = -100000")
 
-writer = sqlite3.connect(file)
-writer.row_factory = sqlite3.Row
-writer.execute("PRAGMA foreign_keys = ON")
-writer.execute("PRAGMA journal_mode = WAL")
-writer.execute("PRAGMA cache_size = -100000")
+def _attach_keystrokes(connection):
+    """Attach the keystroke database, with a small page cache since its blobs are rarely read twice."""
+    connection.execute("ATTACH DATABASE ? AS keystrokes", [keystroke_file])
+    connection.execute("PRAGMA keystrokes.auto_vacuum = INCREMENTAL")
+    connection.execute("PRAGMA keystrokes.journal_mode = WAL")
+    connection.execute("PRAGMA keystrokes.cache_size = -8000")
+    connection.execute("PRAGMA keystrokes.mmap_size = 268435456")
+
+
+def _connect_reader(cache_size: int):
+    connection = sqlite3.connect(file)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA auto_vacuum = INCREMENTAL")  # Only takes effect on new databases, or after a VACUUM
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute(f"PRAGMA cache_size = {cache_size}")
+    _attach_keystrokes(connection)
+    return connection
+
+
+reader = _connect_reader(-100000)
+_reader_thread = threading.get_ident()
+_thread_readers = threading.local()
+
+
+def get_reader():
+    """
+    Returns the read connection for the current thread.
+    Reads moved off the event loop with asyncio.to_thread get a connection of their own per worker thread.
+    """
+    if threading.get_ident() == _reader_thread:
+        return reader
+
+    connection = getattr(_thread_readers, "connection", None)
+    if connection is None:
+        connection = _thread_readers.connection = _connect_reader(-8000)
+
+    return connection
+
+
+def _setup_writer(connection):
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA cache_size = -100000")
+    _attach_keystrokes(connection)
+
+
+writer = Writer(file, setup=_setup_writer, name="typegg-writer")
 
 
 def _execute_fetch(query: str, params: list, one: bool):
     """Execute a read-only query and return one row or all rows."""
-    cursor = reader.cursor()
+    cursor = get_reader().cursor()
     try:
         cursor.execute(query, params)
         return cursor.fetchone() if one else cursor.fetchall()
@@ -54,37 +95,57 @@ async def fetch_async(query, params=[]):
 
 def run(query: str, params: Optional[list] = []):
     """Execute a write query (INSERT, UPDATE, DELETE) with commit."""
-    cursor = writer.cursor()
-
-    try:
-        cursor.execute(query, params)
-        writer.commit()
-    finally:
-        cursor.close()
+    writer.execute(lambda cursor: cursor.execute(query, params))
 
 
 def run_many(query, data):
     """Execute a write query on multiple sets of parameters with commit."""
-    cursor = writer.cursor()
-    try:
-        cursor.executemany(query, data)
-        writer.commit()
-    finally:
-        cursor.close()
+    writer.execute(lambda cursor: cursor.executemany(query, data))
+
+
+def _run_statements(cursor, statements: list[tuple]):
+    for query, params in statements:
+        cursor.execute(query, params)
 
 
 def run_transaction(statements: list[tuple]):
     """Execute multiple write queries atomically in a single transaction."""
-    cursor = writer.cursor()
-    try:
-        for query, params in statements:
-            cursor.execute(query, params)
-        writer.commit()
-    except Exception:
-        writer.rollback()
-        raise
-    finally:
-        cursor.close()
+    writer.execute(lambda cursor: _run_statements(cursor, statements))
+
+
+async def run_async(query: str, params: Optional[list] = []):
+    """Queue a write query without blocking, committing it together with other queued writes."""
+    await writer.execute_async(lambda cursor: cursor.execute(query, params))
+
+
+async def run_many_async(query, data):
+    """Queue a write query on multiple sets of parameters without blocking."""
+    await writer.execute_async(lambda cursor: cursor.executemany(query, data))
+
+
+async def run_transaction_async(statements: list[tuple]):
+    """Queue multiple write queries to be applied atomically, without blocking."""
+    await writer.execute_async(lambda cursor: _run_statements(cursor, statements))
+
+
+def _run_batches(cursor, batches: list[tuple]):
+    for query, data in batches:
+        cursor.executemany(query, data)
+
+
+async def run_many_transaction_async(batches: list[tuple]):
+    """Queue multiple write queries, each on many sets of parameters, to be applied atomically without blocking."""
+    await writer.execute_async(lambda cursor: _run_batches(cursor, batches))
+
+
+def run_pragma(pragma: str):
+    """Execute a PRAGMA on the writer connection, outside of a transaction, and return its rows."""
+    return writer.execute(lambda cursor: cursor.execute(f"PRAGMA {pragma}").fetchall(), transaction=False)
+
+
+async def run_pragma_async(pragma: str):
+    """Queue a PRAGMA on the writer connection, outside of a transaction, without blocking. Returns its rows."""
+    return await writer.execute_async(lambda cursor: cursor.execute(f"PRAGMA {pragma}").fetchall(), transaction=False)
 
 
 def get_row_count(table):
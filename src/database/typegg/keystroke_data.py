@@ -1,8 +1,30 @@
+import asyncio
 import json
 import zlib
 
 from database.typegg import db
 
+LOOKUP_BATCH_SIZE = 500
+MOVE_BATCH_SIZE = 500
+MOVE_BATCH_DELAY = 0.1  # Seconds between moved batches, so queued writes can get through
+
+
+def _has_legacy_table():
+    """Whether keystroke data is still stored in the main database, from before the split."""
+    return db.fetch_one("""
+        SELECT 1 FROM main.sqlite_master
+        WHERE type = 'table' AND name = 'keystroke_data'
+    """) is not None
+
+
+legacy_table = _has_legacy_table()
+
+
+KEYSTROKE_DATA_INSERT = """
+    INSERT OR IGNORE INTO keystrokes.keystroke_data (raceId, keystrokeData, compressed)
+    VALUES (?, ?, ?)
+"""
+
 
 def keystroke_data_insert(race):
     return (
@@ -12,53 +34,93 @@ def keystroke_data_insert(race):
     )
 
 
-def add_keystroke_data(races):
+async def add_keystroke_data(races):
     """Batch insert keystroke data."""
 
-    db.run_many("""
-        INSERT OR IGNORE INTO keystroke_data (raceId, keystrokeData, compressed)
-        VALUES (?, ?, ?)
-    """, [keystroke_data_insert(race) for race in races])
+    await db.run_many_async(KEYSTROKE_DATA_INSERT, [keystroke_data_insert(race) for race in races])
 
 
-def _decompress(row):
-    """Decompress a keystroke data row if needed."""
-    if row is None:
-        return None
-    keystroke_data = row["keystrokeData"]
-    if row["compressed"] == 1:
+def _decompress(keystroke_data, compressed: int):
+    """Decompress stored keystroke data if needed."""
+    if compressed == 1:
         return zlib.decompress(keystroke_data)
     return keystroke_data
 
 
 def get_keystroke_data(race_id: str):
     """Get keystroke data by race ID, decompressed."""
-    result = db.fetch_one(f"""
-        SELECT keystrokeData FROM keystroke_data
+    result = db.fetch_one("""
+        SELECT keystrokeData, compressed FROM keystrokes.keystroke_data
         WHERE raceId = ?
     """, [race_id])
 
-    return json.loads(result["keystrokeData"])
+    if result is None and legacy_table:
+        result = db.fetch_one("""
+            SELECT keystrokeData, compressed FROM main.keystroke_data
+            WHERE raceId = ?
+        """, [race_id])
+
+    if result is None:
+        return None
+
+    return json.loads(_decompress(result["keystrokeData"], result["compressed"]))
+
+
+def get_stored_keystroke_data_batch(race_ids: list[str]):
+    """Get the stored keystroke data of many races, without decompressing. Returns a list of (raceId, keystrokeData, compressed)."""
+    tables = ["keystrokes.keystroke_data"] + ["main.keystroke_data"] * legacy_table
+    rows = []
+    found = set()
+
+    for table in tables:
+        missing = [race_id for race_id in race_ids if race_id not in found]
+
+        for i in range(0, len(missing), LOOKUP_BATCH_SIZE):
+            batch = missing[i:i + LOOKUP_BATCH_SIZE]
+            for row in db.fetch(f"""
+                SELECT raceId, keystrokeData, compressed FROM {table}
+                WHERE raceId IN ({",".join(["?"] * len(batch))})
+            """, batch):
+                rows.append(tuple(row))
+                found.add(row["raceId"])
+
+    return rows
+
+
+def get_keystroke_data_batch(race_ids: list[str]):
+    """Get the keystroke data of many races, decompressed. Returns a dictionary of race ID to keystroke data."""
+    return {
+        race_id: json.loads(_decompress(keystroke_data, compressed))
+        for race_id, keystroke_data, compressed in get_stored_keystroke_data_batch(race_ids)
+    }
 
 
 def delete_keystroke_data(user_id: str):
     """Delete all keystroke data for a user."""
     db.run("""
-        DELETE FROM keystroke_data
-        WHERE raceId IN (SELECT raceId FROM races WHERE userId = ?)
+        DELETE FROM keystrokes.keystroke_data
+        WHERE raceId IN (SELECT raceId FROM main.races WHERE userId = ?)
     """, [user_id])
 
 
+def delete_keystroke_data_batch(race_ids: list[str]):
+    """
+    Delete the keystroke data of many races, such as those removed through a cascade (quote and source deletes).
+    The race IDs must be collected before the races are deleted, as keystrokes.db can't cascade.
+    """
+    db.run_many("DELETE FROM keystrokes.keystroke_data WHERE raceId = ?", [(race_id,) for race_id in race_ids])
+
+
 def get_uncompressed_count():
     """Get the count of uncompressed keystroke data rows."""
-    result = db.fetch_one("SELECT COUNT(*) FROM keystroke_data WHERE compressed = 0")
+    result = db.fetch_one("SELECT COUNT(*) FROM keystrokes.keystroke_data WHERE compressed = 0")
     return result[0] if result else 0
 
 
 def compress_batch(batch_size: int = 1000):
     """Compress a batch of uncompressed keystroke data. Returns count compressed."""
     rows = db.fetch("""
-        SELECT raceId, keystrokeData FROM keystroke_data
+        SELECT raceId, keystrokeData FROM keystrokes.keystroke_data
         WHERE compressed = 0
         LIMIT ?
     """, [batch_size])
@@ -69,7 +131,7 @@ def compress_batch(batch_size: int = 1000):
     for row in rows:
         compressed = zlib.compress(row["keystrokeData"].encode("utf-8"), level=6)
         db.run("""
-            UPDATE keystroke_data SET keystrokeData = ?, compressed = ?
+            UPDATE keystrokes.keystroke_data SET keystrokeData = ?, compressed = ?
             WHERE raceId = ?
         """, [compressed, 1, row["raceId"]])
 
@@ -87,3 +149,57 @@ async def compress_all(batch_size: int = 1000):
             break
         compressed += count
         yield compressed, total
+
+
+async def move_legacy_batch(batch_size: int = MOVE_BATCH_SIZE):
+    """
+    Move a batch of keystroke data from the main database to the keystroke database.
+    Writes are queued on the writer thread, so the bot keeps serving while the move runs.
+    Drops the legacy table once it is empty. Returns the number of rows moved.
+    """
+    global legacy_table
+
+    if not legacy_table:
+        return 0
+
+    race_ids = [row["raceId"] for row in db.fetch("""
+        SELECT raceId FROM main.keystroke_data
+        ORDER BY raceId
+        LIMIT ?
+    """, [batch_size])]
+
+    if not race_ids:
+        await db.run_async("DROP TABLE main.keystroke_data")
+        legacy_table = False
+        return 0
+
+    placeholders = ",".join(["?"] * len(race_ids))
+
+    # Copied and deleted in separate commits, since attached WAL databases don't commit atomically together.
+    # Rows are only deleted once their copy exists, so an interrupted batch is picked up again.
+    await db.run_async(f"""
+        INSERT OR IGNORE INTO keystrokes.keystroke_data (raceId, keystrokeData, compressed)
+        SELECT raceId, keystrokeData, compressed FROM main.keystroke_data
+        WHERE raceId IN ({placeholders})
+    """, race_ids)
+    await db.run_async(f"""
+        DELETE FROM main.keystroke_data
+        WHERE raceId IN ({placeholders})
+        AND raceId IN (SELECT raceId FROM keystrokes.keystroke_data)
+    """, race_ids)
+
+    return len(race_ids)
+
+
+async def move_legacy_keystroke_data(max_batches: int = 20):
+    """Stream keystroke data out of the main database a few batches at a time. Returns the number of rows moved."""
+    moved = 0
+
+    for _ in range(max_batches):
+        count = await move_legacy_batch()
+        if count == 0:
+            break
+        moved += count
+        await asyncio.sleep(MOVE_BATCH_DELAY)
+
+    return moved
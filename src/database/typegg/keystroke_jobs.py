@@ -0,0 +1,151 @@
+import asyncio
+import itertools
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from database.typegg import db
+from database.typegg.keystroke_data import get_stored_keystroke_data_batch
+from utils.data_structures import KeyedLocks
+from utils.keystroke_jobs import KeystrokeJob, process_chunk
+from utils.keystrokes import PROCESSOR_VERSION
+from utils.logging import log
+
+JOB_CHUNK_SIZE = 200  # Races sent to a worker at a time
+JOB_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # Leaves a core for the bot
+ALL_USERS = ""  # Progress key of jobs run across every user
+
+_pool = None
+_job_locks = KeyedLocks()
+
+
+def get_pool():
+    """
+    Returns the worker pool, started on first use and kept for later jobs.
+    Workers are spawned rather than forked, since the bot process runs database writer threads.
+    """
+    global _pool
+
+    if _pool is None:
+        _pool = ProcessPoolExecutor(JOB_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+    return _pool
+
+
+def get_progress(job: KeystrokeJob, user_id: str):
+    """Returns a job's checkpointed accumulator and the last row included, or a fresh start if it's outdated."""
+    row = db.fetch_one("""
+        SELECT lastRow, jobVersion, processorVersion, accumulator FROM keystroke_job_progress
+        WHERE job = ? AND userId = ?
+    """, [job.name, user_id])
+
+    if row is None or (row["jobVersion"], row["processorVersion"]) != (job.version, PROCESSOR_VERSION):
+        return job.initial(), 0
+
+    return pickle.loads(row["accumulator"]), row["lastRow"]
+
+
+async def save_progress(job: KeystrokeJob, user_id: str, accumulator, last_row: int):
+    # Accumulators are only ever written and read back by the bot, so pickling them is safe
+    await db.run_async("""
+        INSERT INTO keystroke_job_progress VALUES (?,?,?,?,?,?)
+        ON CONFLICT(job, userId) DO UPDATE SET
+            lastRow = excluded.lastRow,
+            jobVersion = excluded.jobVersion,
+            processorVersion = excluded.processorVersion,
+            accumulator = excluded.accumulator
+    """, [job.name, user_id, last_row, job.version, PROCESSOR_VERSION, pickle.dumps(accumulator)])
+
+
+def get_user_chunks(user_id: str, last_row: int, chunk_size: int):
+    """
+    Yields (last race row, keystroke rows) chunks of a user's races stored after the given race row.
+    Race IDs are read at once and chunked here, so the user's races aren't sorted again for every chunk.
+    """
+    races = db.fetch("""
+        SELECT rowid AS raceRow, raceId FROM races
+        WHERE userId = ? AND rowid > ?
+        ORDER BY rowid
+    """, [user_id, last_row])
+
+    for i in range(0, len(races), chunk_size):
+        batch = races[i:i + chunk_size]
+        yield batch[-1]["raceRow"], get_stored_keystroke_data_batch([race["raceId"] for race in batch])
+
+
+def get_all_chunks(last_row: int, chunk_size: int):
+    """
+    Yields (last keystroke row, keystroke rows) chunks of every race's keystroke data stored after the given row.
+    Legacy rows are left out until they're moved, where they're given new row IDs and picked up by a later run.
+    """
+    while True:
+        rows = db.fetch("""
+            SELECT rowid, raceId, keystrokeData, compressed FROM keystrokes.keystroke_data
+            WHERE rowid > ?
+            ORDER BY rowid
+            LIMIT ?
+        """, [last_row, chunk_size])
+
+        if not rows:
+            return
+
+        last_row = rows[-1]["rowid"]
+        yield last_row, [tuple(row)[1:] for row in rows]
+
+
+def next_round(chunks):
+    """Reads the next round of chunks, one per worker slot."""
+    return list(itertools.islice(chunks, JOB_WORKERS * 2))
+
+
+async def run_job(job: KeystrokeJob, user_id: Optional[str] = None, chunk_size: int = JOB_CHUNK_SIZE):
+    """
+    Runs a job over the keystroke data of a user's races, or every race, and returns its accumulator.
+    Picks up from the job's last checkpoint, so only races stored since are processed.
+    Chunks are read in a thread, decoded and mapped in worker processes a round at a time,
+    then merged in order and checkpointed.
+    """
+    progress_key = user_id or ALL_USERS
+    # A concurrent run of the same job waits, then catches up from the checkpoint it left
+    async with _job_locks.hold((job.name, progress_key)):
+        accumulator, last_row = get_progress(job, progress_key)
+        chunks = get_user_chunks(user_id, last_row, chunk_size) if user_id else get_all_chunks(last_row, chunk_size)
+
+        loop = asyncio.get_running_loop()
+        pool = get_pool()
+        start = time.time()
+        processed = failed = 0
+
+        while True:
+            round_chunks = await asyncio.to_thread(next_round, chunks)
+            if not round_chunks:
+                break
+
+            results = await asyncio.gather(*[
+                loop.run_in_executor(pool, process_chunk, job, rows)
+                for _, rows in round_chunks
+            ])
+
+            for (_, rows), (partial, chunk_failed) in zip(round_chunks, results):
+                accumulator = job.merge(accumulator, partial)
+                processed += len(rows)
+                failed += chunk_failed
+
+            last_row = round_chunks[-1][0]
+            await save_progress(job, progress_key, accumulator, last_row)
+
+        if processed:
+            log(
+                f"Ran {job.name} for {user_id or "all users"} over {processed:,} races "
+                f"({failed:,} failed) in {time.time() - start:,.2f}s"
+            )
+
+        return accumulator
+
+
+def delete_job_progress(user_id: str):
+    """Deletes a user's checkpointed job results."""
+    db.run("DELETE FROM keystroke_job_progress WHERE userId = ?", [user_id])
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import sqlite3
+import time
+
+from database.typegg import db
+from utils import dates
+from utils.logging import log
+
+MAINTENANCE_HOUR = 9  # UTC, the bot's quietest hour
+INTEGRITY_CHECK_WEEKDAY = 0  # Monday
+VACUUM_STEP_PAGES = 1000
+STEP_DELAY = 0.5  # Seconds between steps, so queued writes can get through
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+DATABASE_FILES = {"main": db.file, "keystrokes": db.keystroke_file}
+
+last_maintenance = {}
+last_integrity_check = {}
+
+
+def get_storage_stats(schema: str = "main"):
+    """Returns a database's page, free page and WAL file statistics."""
+    file = DATABASE_FILES[schema]
+    wal_file = file + "-wal"
+
+    return {
+        "page_size": db.fetch_one(f"PRAGMA {schema}.page_size")[0],
+        "page_count": db.fetch_one(f"PRAGMA {schema}.page_count")[0],
+        "freelist_count": db.fetch_one(f"PRAGMA {schema}.freelist_count")[0],
+        "auto_vacuum": AUTO_VACUUM_MODES[db.fetch_one(f"PRAGMA {schema}.auto_vacuum")[0]],
+        "file_size": os.path.getsize(file),
+        "wal_size": os.path.getsize(wal_file) if os.path.exists(wal_file) else 0,
+    }
+
+
+async def checkpoint(mode: str = "PASSIVE"):
+    """
+    Copies the WAL back into the database on the writer thread. Returns whether it was blocked,
+    and the WAL and checkpointed pages.
+    """
+    busy, wal_pages, checkpointed_pages = (await db.run_pragma_async(f"wal_checkpoint({mode})"))[0]
+    return bool(busy), wal_pages, checkpointed_pages
+
+
+async def incremental_vacuum(schema: str = "main"):
+    """Releases a database's free pages back to the file system in small steps. Returns the number of pages released."""
+    if db.fetch_one(f"PRAGMA {schema}.auto_vacuum")[0] != 2:
+        return 0
+
+    released = 0
+    while (free_pages := db.fetch_one(f"PRAGMA {schema}.freelist_count")[0]) > 0:
+        await db.run_pragma_async(f"{schema}.incremental_vacuum({VACUUM_STEP_PAGES})")
+        released += min(free_pages, VACUUM_STEP_PAGES)
+        await asyncio.sleep(STEP_DELAY)
+
+    return released
+
+
+def quick_check(file: str):
+    """Runs a quick integrity check of a database file on a read-only connection of its own. Returns its results."""
+    connection = sqlite3.connect(f"file:{file}?mode=ro", uri=True)
+    try:
+        return [row[0] for row in connection.execute("PRAGMA quick_check")]
+    finally:
+        connection.close()
+
+
+async def integrity_check():
+    """
+    Runs a quick integrity check of each database in a thread, since it reads every page.
+    Returns the problems found.
+    """
+    problems = []
+    for schema, file in DATABASE_FILES.items():
+        results = await asyncio.to_thread(quick_check, file)
+        if results != ["ok"]:
+            problems += [f"{schema}: {result}" for result in results]
+
+    return problems
+
+
+async def run_maintenance(check_integrity: bool = False):
+    """Checkpoints the WAL, refreshes planner statistics and releases free pages, one step at a time."""
+    start = time.time()
+    result = {"date": dates.now()}
+
+    await checkpoint("PASSIVE")
+    await asyncio.sleep(STEP_DELAY)
+
+    await db.run_pragma_async("optimize")
+    await asyncio.sleep(STEP_DELAY)
+
+    result["released_pages"] = 0
+    for schema in DATABASE_FILES:
+        result["released_pages"] += await incremental_vacuum(schema)
+
+    result["wal_busy"] = (await checkpoint("TRUNCATE"))[0]
+    await asyncio.sleep(STEP_DELAY)
+
+    if check_integrity:
+        problems = await integrity_check()
+        last_integrity_check.update(date=dates.now(), problems=problems)
+        if problems:
+            log("Database integrity check failed:\n" + "\n".join(problems[:10]))
+
+    result["duration"] = time.time() - start
+    last_maintenance.update(result)
+
+    return result
@@ -1,6 +1,12 @@
 from database.typegg import db
+from utils.dates import to_epoch_ms
 from utils.flags import Flags
 
+MATCH_RESULT_INSERT = f"""
+    INSERT OR IGNORE INTO match_results
+    VALUES ({",".join(["?"] * 15)})
+"""
+
 
 def match_result_insert(match_player):
     """Return a match player tuple for parameterized inserting."""
@@ -19,15 +25,13 @@ def match_result_insert(match_player):
         match_player["placement"],
         match_player["completionType"],
         match_player["timestamp"],
+        to_epoch_ms(match_player["timestamp"]) if match_player["timestamp"] else None,
     )
 
 
-def add_match_results(match_players):
+async def add_match_results(match_players):
     """Batch insert match players."""
-    db.run_many(f"""
-        INSERT OR IGNORE INTO match_results
-        VALUES ({",".join(["?"] * 14)})
-    """, [match_result_insert(player) for player in match_players])
+    await db.run_many_async(MATCH_RESULT_INSERT, [match_result_insert(player) for player in match_players])
 
 
 def get_encounter_stats(user_id: str, flags: Flags = None):
@@ -144,7 +148,7 @@ def get_opponent_encounters(user_id: str, opponent_id: str, flags: Flags = None)
         SELECT * FROM encounters e
         {join_clause}
         {where_clause}
-        ORDER BY timestamp ASC
+        ORDER BY timestampMs ASC
     """, params)
 
     return matches
@@ -1,6 +1,11 @@
 from database.typegg import db
 from utils.dates import normalize_datetime
 
+MATCH_INSERT = f"""
+    INSERT OR IGNORE INTO matches
+    VALUES ({",".join(["?"] * 5)})
+"""
+
 
 def match_insert(match):
     """Return a match tuple for parameterized inserting."""
@@ -13,9 +18,6 @@ def match_insert(match):
     )
 
 
-def add_matches(match_players):
+async def add_matches(match_players):
     """Batch insert matches."""
-    db.run_many(f"""
-        INSERT OR IGNORE INTO matches
-        VALUES ({",".join(["?"] * 5)})
-    """, [match_insert(player) for player in match_players])
+    await db.run_many_async(MATCH_INSERT, [match_insert(player) for player in match_players])
@@ -0,0 +1,107 @@
+from database.typegg import db
+
+
+# Migrations
+
+def add_epoch_timestamps():
+    """Adds and backfills timestampMs on races and match results, with composite time indexes."""
+    for table in ["races", "match_results"]:
+        columns = [row["name"] for row in db.fetch(f"PRAGMA table_info({table})")]
+        if "timestampMs" in columns:
+            continue
+
+        db.run_transaction([
+            (f"ALTER TABLE {table} ADD COLUMN timestampMs INTEGER", []),
+            (f"""
+                UPDATE {table}
+                SET timestampMs = CAST(ROUND((julianday(timestamp) - 2440587.5) * 86400000) AS INTEGER)
+                WHERE timestamp IS NOT NULL
+            """, []),
+        ])
+
+        # Views select from the old column list, so they are recreated after migrating
+        db.run("DROP VIEW IF EXISTS multiplayer_races")
+        db.run("DROP VIEW IF EXISTS encounters")
+
+    db.run("CREATE INDEX IF NOT EXISTS idx_races_userId_timestampMs ON races(userId, timestampMs)")
+    db.run("CREATE INDEX IF NOT EXISTS idx_races_userId_raceNumber ON races(userId, raceNumber)")
+    db.run("CREATE INDEX IF NOT EXISTS idx_match_results_userId_timestampMs ON match_results(userId, timestampMs)")
+
+
+def add_query_indexes():
+    """Adds covering and lookup indexes for the per-user and leaderboard queries."""
+    # Covers the per-user quote best aggregates, and replaces the indexes it has as a prefix
+    db.run("""
+        CREATE INDEX IF NOT EXISTS idx_races_userId_quoteId_cover
+        ON races(userId, quoteId, pp, wpm, rawPp, rawWpm, matchId)
+    """)
+    db.run("DROP INDEX IF EXISTS idx_races_userId")
+    db.run("DROP INDEX IF EXISTS idx_races_userId_quoteId")
+
+    # Covers the quote leaderboard rebuilds
+    db.run("""
+        CREATE INDEX IF NOT EXISTS idx_races_quoteId_userId_cover
+        ON races(quoteId, userId, pp, wpm, timestampMs)
+    """)
+    db.run("DROP INDEX IF EXISTS idx_races_quoteId_pp")
+
+    db.run("CREATE INDEX IF NOT EXISTS idx_quote_leaderboards_userId ON quote_leaderboards(userId)")
+    db.run("CREATE INDEX IF NOT EXISTS idx_daily_quote_results_userId ON daily_quote_results(userId)")
+
+    # Databases created after keystroke data moved to keystrokes.db have no main table to index,
+    # split_keystroke_data adds the index there instead
+    if db.fetch_one("SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = 'keystroke_data'"):
+        db.run("CREATE INDEX IF NOT EXISTS idx_keystroke_data_uncompressed ON keystroke_data(raceId) WHERE compressed = 0")
+
+    # Recreated with matches joined after match_results
+    db.run("DROP VIEW IF EXISTS multiplayer_races")
+
+
+def split_keystroke_data():
+    """Prepares for keystroke data to be moved into the attached keystroke database."""
+    # Rows are streamed across in the background by keystroke_data.move_legacy_keystroke_data,
+    # and the emptied table is dropped at the end. Only the new table needs the compression index.
+    db.run("DROP INDEX IF EXISTS main.idx_keystroke_data_uncompressed")
+    db.run("""
+        CREATE INDEX IF NOT EXISTS keystrokes.idx_keystroke_data_uncompressed
+        ON keystroke_data(raceId) WHERE compressed = 0
+    """)
+
+
+def add_quote_search():
+    """Creates and fills the full-text search index over quotes and their sources."""
+    from database.typegg.quote_search import rebuild_quote_search
+    rebuild_quote_search()
+
+
+def add_race_rollups():
+    """Fills the hourly race rollups from every user's stored races."""
+    from database.typegg.race_rollups import rebuild_race_rollups
+    rebuild_race_rollups()
+
+
+MIGRATIONS = [
+    add_epoch_timestamps,
+    add_query_indexes,
+    split_keystroke_data,
+    add_quote_search,
+    add_race_rollups,
+]
+
+
+def get_schema_version():
+    """Returns the number of migrations applied to the database."""
+    return db.fetch_one("PRAGMA user_version")[0]
+
+
+def migrate():
+    """Applies any pending migrations in order, then refreshes the query planner statistics."""
+    version = get_schema_version()
+    if version >= len(MIGRATIONS):
+        return
+
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        migration()
+        db.run(f"PRAGMA user_version = {number}")
+
+    db.run("ANALYZE")
@@ -26,10 +26,10 @@ def update_quote_leaderboards(quote_ids: list[str]):
             SELECT quoteId, rn, userId
             FROM (
                 SELECT quoteId, userId,
-                       ROW_NUMBER() OVER (PARTITION BY quoteId ORDER BY MAX(pp) DESC, MAX(wpm) DESC, MIN(timestamp) ASC) AS rn
+                       ROW_NUMBER() OVER (PARTITION BY quoteId ORDER BY MAX(pp) DESC, MAX(wpm) DESC, MIN(timestampMs) ASC) AS rn
                 FROM races
                 WHERE quoteId IN ({placeholders})
-                GROUP BY userId, quoteId
+                GROUP BY quoteId, userId
             )
             WHERE rn <= 10
         """, quote_ids),
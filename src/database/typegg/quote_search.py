@@ -0,0 +1,161 @@
+import re
+from typing import Optional
+
+from database.typegg import db
+
+SEARCH_LIMIT = 100  # Results returned per search
+MATCH_START = "\x02"  # Markers around matched text, which can't appear in quote text
+MATCH_END = "\x03"
+
+# Column weights for ranking, in table order (quoteId, text, title, author)
+RANK_WEIGHTS = (0.0, 2.0, 1.0, 1.0)
+
+# Characters the unicode61 tokenizer treats as part of a token
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+CREATE_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS quote_search USING fts5(
+        quoteId UNINDEXED,
+        text,
+        title,
+        author,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+"""
+
+INSERT_QUOTES = """
+    INSERT INTO quote_search (quoteId, text, title, author)
+    SELECT q.quoteId, q.text, s.title, s.author
+    FROM quotes q
+    JOIN sources s ON s.sourceId = q.sourceId
+"""
+
+
+def rebuild_quote_search():
+    """Recreates the search index from every quote."""
+    db.run_transaction([
+        (CREATE_TABLE, []),
+        ("DELETE FROM quote_search", []),
+        (INSERT_QUOTES, []),
+    ])
+
+
+def index_quotes(quote_ids: list[str]):
+    """Replaces the indexed text of the given quotes with their current text and source."""
+    if not quote_ids:
+        return
+
+    placeholders = ",".join(["?"] * len(quote_ids))
+    db.run_transaction([
+        (f"DELETE FROM quote_search WHERE quoteId IN ({placeholders})", quote_ids),
+        (f"{INSERT_QUOTES} WHERE q.quoteId IN ({placeholders})", quote_ids),
+    ])
+
+
+def index_source(source_id: str):
+    """Reindexes the quotes of a source, after its title or author changed."""
+    db.run_transaction([
+        ("DELETE FROM quote_search WHERE quoteId IN (SELECT quoteId FROM quotes WHERE sourceId = ?)", [source_id]),
+        (f"{INSERT_QUOTES} WHERE q.sourceId = ?", [source_id]),
+    ])
+
+
+def remove_quotes(quote_ids: list[str]):
+    placeholders = ",".join(["?"] * len(quote_ids))
+    db.run(f"DELETE FROM quote_search WHERE quoteId IN ({placeholders})", quote_ids)
+
+
+def remove_orphaned_quotes():
+    """Removes indexed quotes that no longer exist, after a source delete cascaded to its quotes."""
+    db.run("DELETE FROM quote_search WHERE quoteId NOT IN (SELECT quoteId FROM quotes)")
+
+
+def get_match_query(query: str):
+    """
+    Returns an FTS5 expression matching the query's words as a phrase, with the last word as a prefix,
+    so a search for text as it's typed matches like a substring search from a word boundary.
+    Returns None if the query has no searchable words.
+    """
+    tokens = TOKEN_PATTERN.findall(query)
+    if not tokens:
+        return None
+
+    return f"\"{" ".join(tokens)}\" *"
+
+
+def get_match_offsets(highlighted: str):
+    """Returns the (start, end) offsets of each marked match, given text with match markers."""
+    offsets = []
+    position = 0
+    start = None
+
+    for part in re.split(f"([{MATCH_START}{MATCH_END}])", highlighted):
+        if part == MATCH_START:
+            start = position
+        elif part == MATCH_END:
+            offsets.append((start, position))
+        else:
+            position += len(part)
+
+    return offsets
+
+
+def search_quotes(
+    query: str,
+    language: Optional[str] = None,
+    ranked: Optional[bool] = None,
+    limit: int = SEARCH_LIMIT,
+):
+    """
+    Searches quote text, source titles and authors, best matches first.
+    Returns the matching quotes with their source and the offsets of each match in the text,
+    along with the total number of matches.
+    """
+    match_query = get_match_query(query)
+    if match_query is None:
+        return [], 0
+
+    conditions = ["quote_search MATCH ?"]
+    params = [match_query]
+
+    if language is not None:
+        conditions.append("q.language = ?")
+        params.append(language)
+    if ranked is not None:
+        conditions.append("q.ranked = ?")
+        params.append(int(ranked))
+
+    joins = """
+        JOIN quotes q ON q.quoteId = quote_search.quoteId
+        JOIN sources s ON s.sourceId = q.sourceId
+    """
+    where_clause = "WHERE " + " AND ".join(conditions)
+
+    rows = db.fetch(f"""
+        SELECT
+            q.*, s.title, s.author,
+            highlight(quote_search, 1, '{MATCH_START}', '{MATCH_END}') AS highlighted
+        FROM quote_search
+        {joins}
+        {where_clause}
+        ORDER BY bm25(quote_search, {", ".join(map(str, RANK_WEIGHTS))})
+        LIMIT ?
+    """, params + [limit])
+
+    # FTS5 auxiliary functions can't be used alongside window functions, so the total is counted separately
+    total = len(rows)
+    if total == limit:
+        total = db.fetch_one(f"SELECT COUNT(*) FROM quote_search {joins} {where_clause}", params)[0]
+
+    quotes = []
+    for row in rows:
+        quote = dict(row)
+        quote["source"] = {
+            "sourceId": quote["sourceId"],
+            "title": quote.pop("title"),
+            "author": quote.pop("author"),
+        }
+        quote["matches"] = get_match_offsets(quote.pop("highlighted"))
+        quotes.append(quote)
+
+    return quotes, total
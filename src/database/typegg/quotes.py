@@ -1,15 +1,85 @@
 import json
 from json import JSONDecodeError
 
+import numpy as np
+
 from api.quotes import get_all_quotes
 from api.sources import get_all_sources
 from database.typegg import db
+from database.typegg.keystroke_data import delete_keystroke_data_batch
+from database.typegg.quote_search import index_quotes, remove_quotes
+from database.typegg.race_rollups import rebuild_race_rollups, get_quote_users
 from database.typegg.sources import get_source
 from utils.dates import normalize_datetime
 from utils.errors import UnknownQuote
 from utils.logging import log, log_server
 
 
+def _load_quote_ids():
+    return {row["quoteId"] for row in db.fetch("SELECT quoteId FROM quotes")}
+
+
+# Every quote ID in the database, so arguments can be classified without a query per token.
+# Kept current by the writes in this module and by source deletes.
+quote_ids = _load_quote_ids()
+
+
+def reload_quote_ids():
+    """Reload the quote ID index, after quotes were removed outside this module."""
+    ids = _load_quote_ids()
+    quote_ids.clear()
+    quote_ids.update(ids)
+    invalidate_quote_catalog()
+
+
+class QuoteCatalog:
+    """
+    Columnar view of every quote, for analytics over the whole catalog.
+    Each attribute is an array indexed by the quote's position in `ids`.
+    """
+
+    def __init__(self, rows: list):
+        self.ids = [row["quoteId"] for row in rows]
+        self.index = {quote_id: i for i, quote_id in enumerate(self.ids)}
+        self.difficulty = np.array([row["difficulty"] for row in rows], dtype=float)
+        self.complexity = np.array([row["complexity"] for row in rows], dtype=float)
+        self.length = np.array([row["length"] for row in rows], dtype=int)
+        self.ranked = np.array([row["ranked"] for row in rows], dtype=bool)
+
+    def positions(self, quote_ids: list[str]):
+        """Returns the catalog index of each quote ID, -1 for unknown quotes."""
+        return np.array([self.index.get(quote_id, -1) for quote_id in quote_ids], dtype=int)
+
+    def align(self, quote_bests: list, column: str):
+        """Returns a catalog length array of a quote best column, NaN for quotes without a best."""
+        values = np.full(len(self.ids), np.nan)
+        positions = self.positions([quote["quoteId"] for quote in quote_bests])
+        known = positions >= 0
+        values[positions[known]] = np.array([quote[column] for quote in quote_bests], dtype=float)[known]
+
+        return values
+
+
+_quote_catalog = None
+
+
+def get_quote_catalog():
+    """Returns the cached quote catalog, loading it on first use after a quote write."""
+    global _quote_catalog
+    if _quote_catalog is None:
+        _quote_catalog = QuoteCatalog(db.fetch("""
+            SELECT quoteId, difficulty, complexity, LENGTH(text) AS length, ranked
+            FROM quotes
+        """))
+
+    return _quote_catalog
+
+
+def invalidate_quote_catalog():
+    global _quote_catalog
+    _quote_catalog = None
+
+
 def quote_insert(quote):
     """Return a quote tuple for parameterized inserting."""
     formatting = quote.get("formatting")
@@ -47,6 +117,9 @@ def add_quotes(quotes):
             language = excluded.language,
             formatting = excluded.formatting
     """, [quote_insert(quote) for quote in quotes])
+    quote_ids.update(quote["quoteId"] for quote in quotes)
+    index_quotes([quote["quoteId"] for quote in quotes])
+    invalidate_quote_catalog()
 
 
 def add_quote(quote):
@@ -54,6 +127,9 @@ def add_quote(quote):
         INSERT OR IGNORE INTO quotes
         VALUES ({",".join(["?"] * 11)})
     """, quote_insert(quote))
+    quote_ids.add(quote["quoteId"])
+    index_quotes([quote["quoteId"]])
+    invalidate_quote_catalog()
 
 
 def get_quotes(
@@ -120,8 +196,7 @@ def get_quote(quote_id: str):
 
 def is_quote_id(quote_id: str):
     """Returns a boolean whether a quote ID exists or not."""
-    result = db.fetch("SELECT 1 FROM quotes WHERE quoteId = ?", [quote_id])
-    return bool(result)
+    return quote_id in quote_ids
 
 
 async def reimport_quotes():
@@ -220,6 +295,8 @@ async def update_quote(quote_id: str, updates: dict):
 
                     log_server(f"Quote {quote_id} ranked: Updated pp values using ratio {pp_ratio:.4f}")
 
+                rebuild_race_rollups(get_quote_users(quote_id))
+
     fields = [
         "quoteId", "sourceId", "text", "explicit", "difficulty", "complexity",
         "submittedByUsername", "ranked", "created", "language", "formatting",
@@ -245,10 +322,24 @@ async def update_quote(quote_id: str, updates: dict):
         WHERE quoteId = ?
     """, params)
 
+    if updates.get("quoteId", quote_id) != quote_id and quote_id in quote_ids:
+        quote_ids.discard(quote_id)
+        quote_ids.add(updates["quoteId"])
+    index_quotes(list({quote_id, updates.get("quoteId", quote_id)}))
+    invalidate_quote_catalog()
+
 
 def delete_quote(quote_id: str):
     """
     Delete a quote by ID.
-    Cascades to delete races and keystroke_data via ON DELETE CASCADE.
+    Cascades to delete races via ON DELETE CASCADE, then removes their keystroke data.
+    Rollups of users who raced it are rebuilt without its races.
     """
+    user_ids = get_quote_users(quote_id)
+    race_ids = [row["raceId"] for row in db.fetch("SELECT raceId FROM races WHERE quoteId = ?", [quote_id])]
     db.run("DELETE FROM quotes WHERE quoteId = ?", [quote_id])
+    rebuild_race_rollups(user_ids)
+    quote_ids.discard(quote_id)
+    remove_quotes([quote_id])
+    invalidate_quote_catalog()
+    delete_keystroke_data_batch(race_ids)
@@ -0,0 +1,172 @@
+import asyncio
+
+from api.users import get_races as get_api_races
+from database.typegg import db
+from database.typegg.keystroke_data import get_keystroke_data_batch
+from database.typegg.quotes import quote_ids
+from database.typegg.races import store_races
+from utils.errors import RaceNotFound
+
+MAX_RANGE_SIZE = 50  # Missing race numbers closer together than this are fetched in one request
+
+
+class RaceResolver:
+    """
+    Resolves races with their keystroke data, serving imported races from the database
+    and fetching only the missing ones from the API, in as few requests as possible.
+    Races returned in the API's format, with usernames and (optionally) match players.
+    """
+
+    def __init__(self):
+        self.local_hits = 0
+        self.api_hits = 0
+        self.api_requests = 0
+        self.stored = 0
+        self.match_misses = 0
+
+    async def get_race(self, user_id: str, race_number: int, get_match: bool = False):
+        """Returns a single race, raising RaceNotFound if it doesn't exist."""
+        races = await self.get_races(user_id, [race_number], get_match)
+        return races[race_number]
+
+    async def get_races(self, user_id: str, race_numbers: list[int], get_match: bool = False):
+        """Returns a dictionary of race number to race, raising RaceNotFound for any that doesn't exist."""
+        race_numbers = list(dict.fromkeys(race_numbers))
+        races = self._get_local_races(user_id, race_numbers, get_match)
+        self.local_hits += len(races)
+
+        missing = [number for number in race_numbers if number not in races]
+        if missing:
+            api_races = await self._get_api_races(user_id, missing)
+            self.api_hits += len(api_races)
+            races.update(api_races)
+
+        for number in race_numbers:
+            if number not in races:
+                raise RaceNotFound(user_id, number)
+
+        return races
+
+    def _get_local_races(self, user_id: str, race_numbers: list[int], get_match: bool):
+        rows = db.fetch(f"""
+            SELECT r.*, u.username, u.country FROM races r
+            LEFT JOIN users u ON u.userId = r.userId
+            WHERE r.userId = ?
+            AND r.raceNumber IN ({",".join(["?"] * len(race_numbers))})
+        """, [user_id] + race_numbers)
+
+        keystroke_data = get_keystroke_data_batch([row["raceId"] for row in rows])
+        races = {}
+
+        for row in rows:
+            race = dict(row, keystrokeData=keystroke_data.get(row["raceId"]))
+            if race["keystrokeData"] is None:
+                continue
+
+            if get_match and race["matchId"]:
+                race["match"] = _get_local_match(race["matchId"])
+                if race["match"] is None:
+                    self.match_misses += 1
+                    continue
+
+            races[race["raceNumber"]] = race
+
+        return races
+
+    async def _get_api_races(self, user_id: str, race_numbers: list[int]):
+        ranges = []
+        for number in sorted(race_numbers):
+            if ranges and number - ranges[-1][0] < MAX_RANGE_SIZE:
+                ranges[-1][1] = number
+            else:
+                ranges.append([number, number])
+
+        self.api_requests += len(ranges)
+        pages = await asyncio.gather(*[
+            get_api_races(
+                user_id,
+                start_number=start,
+                end_number=end,
+                get_keystrokes=True,
+                per_page=end - start + 1,
+            )
+            for start, end in ranges
+        ])
+
+        wanted = set(race_numbers)
+        races = {
+            race["raceNumber"]: race
+            for page in pages
+            for race in page["races"]
+            if race["raceNumber"] in wanted
+        }
+        await self._store(user_id, list(races.values()))
+
+        return races
+
+    async def _store(self, user_id: str, races: list[dict]):
+        """
+        Writes fetched races through the import path, if they fall within the user's imported history.
+        Newer races are left for the next import, since it only fetches races after the latest stored one.
+        """
+        latest = db.fetch_one("SELECT MAX(raceNumber) FROM races WHERE userId = ?", [user_id])[0]
+        if latest is None:
+            return
+
+        storable = [
+            race for race in races
+            if race["raceNumber"] <= latest and race["quoteId"] in quote_ids
+        ]
+        if storable:
+            await store_races(storable)
+            self.stored += len(storable)
+
+    def stats(self) -> dict:
+        lookups = self.local_hits + self.api_hits
+        return {
+            "local_hits": self.local_hits,
+            "api_hits": self.api_hits,
+            "api_requests": self.api_requests,
+            "stored": self.stored,
+            "match_misses": self.match_misses,
+            "hit_rate": self.local_hits / lookups if lookups else 0.0,
+        }
+
+
+race_resolver = RaceResolver()
+
+
+def _get_local_match(match_id: str):
+    """
+    Rebuilds a match from its stored results. Returns None if a finished player's keystroke data is missing.
+    Only imported users have their races stored, so any match with a bot or another unimported finisher
+    falls back to the API, and is counted as a match miss.
+    """
+    match = db.fetch_one("SELECT * FROM matches WHERE matchId = ?", [match_id])
+    if match is None:
+        return None
+
+    rows = db.fetch("""
+        SELECT mr.*, r.raceId, u.country FROM match_results mr
+        LEFT JOIN races r ON r.matchId = mr.matchId AND r.userId = mr.userId
+        LEFT JOIN users u ON u.userId = mr.userId
+        WHERE mr.matchId = ?
+    """, [match_id])
+
+    if len(rows) != match["players"]:
+        return None
+
+    keystroke_data = get_keystroke_data_batch([row["raceId"] for row in rows if row["raceId"]])
+    players = []
+
+    for row in rows:
+        player = dict(row, keystrokeData=keystroke_data.get(row["raceId"]))
+        if player["completionType"] == "finished" and player["keystrokeData"] is None:
+            return None
+        players.append(player)
+
+    return {
+        "matchId": match_id,
+        "startTime": match["startTimestamp"],
+        "players": players,
+    }
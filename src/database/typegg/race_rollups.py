@@ -0,0 +1,192 @@
+from typing import Optional
+
+from database.typegg import db
+
+# Hourly, so a period in any timezone is whole buckets apart from, at most, a partial hour at each end
+ROLLUP_BUCKET_MS = 3_600_000
+ERROR_TIME_CAP = 2000  # ms, error reaction and recovery times are capped before averaging
+SUM_COLUMNS = [
+    "races", "wpm", "rawWpm", "accuracy", "duration",
+    "errorReactionTime", "errorRecoveryTime", "pp", "chars",
+]
+
+
+def get_rollup_query(conditions: str):
+    """
+    Returns a query aggregating the races matching the conditions into rollup rows.
+    Best races are broken by race number, so ties go to the earliest race.
+    """
+    return f"""
+        SELECT
+            userId,
+            bucket,
+            solo,
+            ranked,
+            COUNT(*) AS races,
+            SUM(wpm) AS wpm,
+            SUM(rawWpm) AS rawWpm,
+            SUM(accuracy) AS accuracy,
+            SUM(duration) AS duration,
+            SUM(MIN(errorReactionTime, {ERROR_TIME_CAP})) AS errorReactionTime,
+            SUM(MIN(errorRecoveryTime, {ERROR_TIME_CAP})) AS errorRecoveryTime,
+            SUM(pp) AS pp,
+            SUM(CAST(ROUND(wpm * duration / 12000) AS INTEGER) + 1) AS chars,
+            MAX(pp) AS bestPp,
+            MIN(bestPpRace) AS bestPpRace,
+            MAX(wpm) AS bestWpm,
+            MIN(bestWpmRace) AS bestWpmRace,
+            MIN(timestampMs) AS firstTimestampMs,
+            MAX(timestampMs) AS lastTimestampMs
+        FROM (
+            SELECT
+                userId, raceNumber, pp, wpm, rawWpm, accuracy, duration,
+                errorReactionTime, errorRecoveryTime, timestampMs,
+                timestampMs / {ROLLUP_BUCKET_MS} AS bucket,
+                matchId IS NULL AS solo,
+                pp > 0 AS ranked,
+                FIRST_VALUE(raceNumber) OVER (bucket_window ORDER BY pp DESC, raceNumber) AS bestPpRace,
+                FIRST_VALUE(raceNumber) OVER (bucket_window ORDER BY wpm DESC, raceNumber) AS bestWpmRace
+            FROM races
+            WHERE {conditions}
+            WINDOW bucket_window AS (PARTITION BY userId, timestampMs / {ROLLUP_BUCKET_MS}, matchId IS NULL, pp > 0)
+        )
+        GROUP BY userId, bucket, solo, ranked
+    """
+
+
+def get_refresh_statements(user_id: str, start_bucket: int, end_bucket: int):
+    """Returns the statements recomputing a user's rollups from start_bucket through end_bucket."""
+    return [
+        ("DELETE FROM race_rollups WHERE userId = ? AND bucket BETWEEN ? AND ?", [user_id, start_bucket, end_bucket]),
+        (
+            f"INSERT INTO race_rollups {get_rollup_query("userId = ? AND timestampMs >= ? AND timestampMs < ?")}",
+            [user_id, start_bucket * ROLLUP_BUCKET_MS, (end_bucket + 1) * ROLLUP_BUCKET_MS],
+        ),
+    ]
+
+
+def get_update_statements(races: list[tuple]):
+    """
+    Returns the statements recomputing the rollups of the hours a list of (userId, timestampMs) races were played in.
+    Rollups are rebuilt from the stored races, so races that were already stored aren't counted twice.
+    """
+    ranges = {}
+    for user_id, timestamp_ms in races:
+        bucket = timestamp_ms // ROLLUP_BUCKET_MS
+        start_bucket, end_bucket = ranges.get(user_id, (bucket, bucket))
+        ranges[user_id] = (min(start_bucket, bucket), max(end_bucket, bucket))
+
+    return [
+        statement
+        for user_id, (start_bucket, end_bucket) in ranges.items()
+        for statement in get_refresh_statements(user_id, start_bucket, end_bucket)
+    ]
+
+
+async def update_race_rollups(races: list[tuple]):
+    """Recomputes the rollups of the hours a list of (userId, timestampMs) races were played in."""
+    await db.run_transaction_async(get_update_statements(races))
+
+
+def rebuild_race_rollups(user_ids: Optional[list[str]] = None):
+    """Rebuilds the rollups of the given users, or every user, after their races changed outside of imports."""
+    if user_ids is None:
+        user_ids = [row["userId"] for row in db.fetch("SELECT DISTINCT userId FROM races")]
+
+    for user_id in user_ids:
+        db.run_transaction([
+            ("DELETE FROM race_rollups WHERE userId = ?", [user_id]),
+            (f"INSERT INTO race_rollups {get_rollup_query("userId = ?")}", [user_id]),
+        ])
+
+
+def get_quote_users(quote_id: str):
+    """Returns the users with races on a quote, whose rollups change along with the quote's races."""
+    return [row["userId"] for row in db.fetch("SELECT DISTINCT userId FROM races WHERE quoteId = ?", [quote_id])]
+
+
+def get_source_users(source_id: str):
+    """Returns the users with races on a source's quotes."""
+    return [row["userId"] for row in db.fetch("""
+        SELECT DISTINCT r.userId FROM quotes q
+        JOIN races r ON r.quoteId = q.quoteId
+        WHERE q.sourceId = ?
+    """, [source_id])]
+
+
+def get_rollups(
+    user_id: str,
+    start_date: Optional[int] = None,
+    end_date: Optional[int] = None,
+    solo: Optional[bool] = None,
+    status: str = "ranked",
+):
+    """
+    Returns a user's rollup rows between two epoch millisecond timestamps.
+    Whole hours are read from the stored rollups, and partial hours at either end are aggregated from races.
+    """
+    rollup_conditions = ["userId = ?"]
+    race_conditions = ["userId = ?"]
+    params = [user_id]
+
+    if solo is not None:
+        rollup_conditions.append("solo = ?")
+        race_conditions.append("(matchId IS NULL) = ?")
+        params.append(int(solo))
+    if status != "any":
+        rollup_conditions.append("ranked = ?")
+        race_conditions.append("(pp > 0) = ?")
+        params.append(int(status == "ranked"))
+
+    rollup_params = list(params)
+    partial_hours = []
+
+    if start_date is not None:
+        start_bucket = -(-start_date // ROLLUP_BUCKET_MS)
+        rollup_conditions.append("bucket >= ?")
+        rollup_params.append(start_bucket)
+
+        if start_date % ROLLUP_BUCKET_MS:
+            head_end = start_bucket * ROLLUP_BUCKET_MS
+            partial_hours.append((start_date, head_end if end_date is None else min(head_end, end_date)))
+
+    if end_date is not None:
+        end_bucket = end_date // ROLLUP_BUCKET_MS
+        rollup_conditions.append("bucket < ?")
+        rollup_params.append(end_bucket)
+
+        # Skipped when the period starts in the same hour, as the head already covers it
+        tail_start = end_bucket * ROLLUP_BUCKET_MS
+        if end_date % ROLLUP_BUCKET_MS and (start_date is None or tail_start >= start_date):
+            partial_hours.append((tail_start, end_date))
+
+    rollups = db.fetch(f"SELECT * FROM race_rollups WHERE {" AND ".join(rollup_conditions)}", rollup_params)
+
+    race_query = get_rollup_query(" AND ".join(race_conditions + ["timestampMs >= ?", "timestampMs < ?"]))
+    for start, end in partial_hours:
+        rollups += db.fetch(race_query, params + [start, end])
+
+    return rollups
+
+
+def merge_rollups(rollups: list[dict]):
+    """Combines rollup rows into period totals, or returns None if there are no races."""
+    if not rollups:
+        return None
+
+    totals = {column: sum(rollup[column] for rollup in rollups) for column in SUM_COLUMNS}
+    totals["soloRaces"] = sum(rollup["races"] for rollup in rollups if rollup["solo"])
+    totals["firstTimestampMs"] = min(rollup["firstTimestampMs"] for rollup in rollups)
+    totals["lastTimestampMs"] = max(rollup["lastTimestampMs"] for rollup in rollups)
+
+    for metric in ["Pp", "Wpm"]:
+        best = max(rollups, key=lambda rollup: (rollup[f"best{metric}"], -(rollup[f"best{metric}Race"] or 0)))
+        totals[f"best{metric}"] = best[f"best{metric}"]
+        totals[f"best{metric}Race"] = best[f"best{metric}Race"]
+
+    return totals
+
+
+def delete_race_rollups(user_id: str):
+    """Deletes all of a user's rollups."""
+    db.run("DELETE FROM race_rollups WHERE userId = ?", [user_id])
@@ -1,12 +1,27 @@
-import json
-import zlib
 from typing import Optional
 
+from dateutil.relativedelta import relativedelta
+
 from database.typegg import db
-from database.typegg.keystroke_data import get_keystroke_data
-from utils.dates import normalize_datetime
+from database.typegg.keystroke_data import (
+    KEYSTROKE_DATA_INSERT, keystroke_data_insert, get_keystroke_data, get_keystroke_data_batch, delete_keystroke_data,
+)
+from database.typegg.keystroke_jobs import delete_job_progress
+from database.typegg.match_results import MATCH_RESULT_INSERT, match_result_insert
+from database.typegg.matches import MATCH_INSERT, match_insert
+from database.typegg.race_rollups import get_update_statements, delete_race_rollups
+from database.typegg.segment_bests import delete_segment_bests
+from database.typegg.timings import delete_timings
+from utils.dates import normalize_datetime, to_epoch_ms, parse_date, date_to_string
 from utils.errors import RaceNotFound
 from utils.flags import Flags
+from utils.stats import calculate_duration
+
+
+RACE_INSERT = f"""
+    INSERT OR IGNORE INTO races
+    VALUES ({",".join(["?"] * 16)})
+"""
 
 
 def race_insert(race):
@@ -30,31 +45,66 @@ def race_insert(race):
         race["errorRecoveryTime"],
         timestamp,
         race["stickyStart"],
+        to_epoch_ms(timestamp),
     )
 
 
-def add_races(races):
-    """Batch insert user races."""
-    db.run_many(f"""
-        INSERT OR IGNORE INTO races
-        VALUES ({",".join(["?"] * 15)})
-    """, [race_insert(race) for race in races])
-
-
-def decompress_keystroke_data(rows):
-    """Decompress keystroke data in race rows."""
-    result = []
-    for row in rows:
-        row_dict = dict(row)
-        keystroke_data = row_dict.get("keystrokeData")
-        compressed = row_dict.get("compressed")
-        if keystroke_data is not None:
-            if compressed == 1:
-                keystroke_data = zlib.decompress(keystroke_data)
-            row_dict["keystrokeData"] = json.loads(keystroke_data)
-        del row_dict["compressed"]
-        result.append(row_dict)
-    return result
+def race_batches(races):
+    """Returns the batched statements inserting races and refreshing the rollups of the hours they were played in."""
+    rows = [race_insert(race) for race in races]
+    rollup_statements = get_update_statements([(row[2], row[15]) for row in rows])
+
+    return [(RACE_INSERT, rows)] + [(query, [params]) for query, params in rollup_statements]
+
+
+async def add_races(races):
+    """Batch insert user races, and refresh the rollups of the hours they were played in."""
+    await db.run_many_transaction_async(race_batches(races))
+
+
+async def store_races(race_list):
+    """
+    Write a page of races from the API along with their keystroke data and matches, in a single transaction.
+    DNF races are skipped, though their matches are kept. The given races are left unmodified.
+    """
+    races = []
+    match_list = []
+    match_result_list = []
+
+    for race in race_list:
+        match = race.get("match")
+
+        if race["completionType"] == "finished":
+            races.append(dict(race, matchId=match["matchId"]) if match else race)
+
+        if not match:
+            continue
+
+        match_list.append({
+            "matchId": match["matchId"],
+            "quoteId": race["quoteId"],
+            "startTime": match["startTime"],
+            "gamemode": race["gamemode"],
+            "players": len(match["players"]),
+        })
+
+        for player in match["players"]:
+            wpm_ratio = (player["rawMatchWpm"] or 0) / (player["matchWpm"] or 1)
+            duration = calculate_duration(player["matchWpm"], player["charactersTyped"])
+            end_timestamp = parse_date(match["startTime"]) + relativedelta(microseconds=duration * 1000)
+            match_result_list.append(dict(
+                player,
+                matchId=match["matchId"],
+                rawMatchPp=player.get("matchPp", 0) * (wpm_ratio or 1),
+                timestamp=date_to_string(end_timestamp),
+            ))
+
+    # One transaction, so an import never resumes past a page that was only partly written
+    await db.run_many_transaction_async(race_batches(races) + [
+        (KEYSTROKE_DATA_INSERT, [keystroke_data_insert(race) for race in races if race.get("keystrokeData")]),
+        (MATCH_INSERT, [match_insert(match) for match in match_list]),
+        (MATCH_RESULT_INSERT, [match_result_insert(player) for player in match_result_list]),
+    ])
 
 
 async def get_races(
@@ -103,11 +153,16 @@ async def get_races(
     conditions = []
     params = []
 
+    if start_date is not None:
+        start_date = to_epoch_ms(start_date)
+    if end_date is not None:
+        end_date = to_epoch_ms(end_date)
+
     condition_map = {
         user_id: "r.userId = ?",
         quote_id: "r.quoteId = ?",
-        start_date: "timestamp >= ?",
-        end_date: "timestamp < ?",
+        start_date: "timestampMs >= ?",
+        end_date: "timestampMs < ?",
         min_pp: "pp > ?",
         max_pp: "pp <= ?",
         match_id: "matchId = ?",
@@ -128,6 +183,8 @@ async def get_races(
             conditions.append("completionType NOT IN ('dnf', 'quit')")
 
     # ORDER clause
+    if order_by == "timestamp":
+        order_by = "timestampMs"
     order_clause = f"{order_by} {"DESC" if reverse else "ASC"}"
 
     # JOIN clause
@@ -138,9 +195,8 @@ async def get_races(
         params.append(flags.language.name)
         columns = columns.replace("quoteId", "r.quoteId")
 
-    if get_keystrokes:
-        join_clauses.append("LEFT JOIN keystroke_data k ON k.raceId = r.raceId")
-        columns += ", k.keystrokeData, k.compressed"
+    if get_keystrokes and "*" not in columns and "raceId" not in columns:
+        columns += ", r.raceId"
 
     join_clause = " ".join(join_clauses)
     where_clause = "WHERE " + " AND ".join(conditions)
@@ -159,7 +215,7 @@ async def get_races(
                     {columns},
                     MAX(wpm) OVER (
                         PARTITION BY r.quoteId
-                        ORDER BY timestamp
+                        ORDER BY timestampMs
                         ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
                     ) as prev_best_wpm
                 FROM {table} r
@@ -192,7 +248,11 @@ async def get_races(
             offset += batch_size
 
     if get_keystrokes:
-        return decompress_keystroke_data(race_list)
+        keystroke_data = get_keystroke_data_batch([race["raceId"] for race in race_list])
+        return [
+            dict(race, keystrokeData=keystroke_data.get(race["raceId"]))
+            for race in race_list
+        ]
 
     return race_list
 
@@ -203,7 +263,7 @@ def get_latest_race(user_id: str):
         SELECT * FROM races
         WHERE userId = ?
         AND raceNumber IS NOT NULL
-        ORDER BY timestamp DESC
+        ORDER BY timestampMs DESC
         LIMIT 1
     """, [user_id])
 
@@ -229,7 +289,12 @@ def get_race(user_id: str, number: int, get_keystrokes: bool = False):
 
 
 def delete_races(user_id: str):
-    """Deletes all of a user's races."""
+    """Deletes all of a user's races, along with the rollups, segment bests, timings and job results built from them."""
+    delete_keystroke_data(user_id)
+    delete_race_rollups(user_id)
+    delete_job_progress(user_id)
+    delete_segment_bests(user_id)
+    delete_timings(user_id)
     db.run("DELETE FROM races WHERE userId = ?", [user_id])
 
 
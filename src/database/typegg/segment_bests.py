@@ -0,0 +1,87 @@
+import json
+
+from database.typegg import db
+from database.typegg.keystroke_data import get_keystroke_data_batch
+
+RACE_BATCH_SIZE = 200  # Races decoded at a time while catching up
+
+
+def get_segment_bests(user_id: str, quote_id: str):
+    """
+    Returns a user's stored best segments on a quote, in text order, along with the
+    progress they were built from: the last race row included and the keystroke processor version.
+    """
+    rows = db.fetch("""
+        SELECT * FROM segment_bests
+        WHERE userId = ? AND quoteId = ?
+        ORDER BY segment
+    """, [user_id, quote_id])
+
+    progress = db.fetch_one("""
+        SELECT lastRaceRow, processorVersion FROM segment_best_progress
+        WHERE userId = ? AND quoteId = ?
+    """, [user_id, quote_id])
+
+    segments = [{
+        "text": row["text"],
+        "wpm": row["wpm"],
+        "raw_wpm": row["rawWpm"],
+        "delays": json.loads(row["delays"]),
+        "raceNumber": row["raceNumber"],
+        "timestamp": row["timestamp"],
+    } for row in rows]
+
+    if progress is None:
+        return segments, 0, None
+
+    return segments, progress["lastRaceRow"], progress["processorVersion"]
+
+
+def save_segment_bests(user_id: str, quote_id: str, segments: list[dict], last_race_row: int, processor_version: int):
+    """Replaces a user's best segments on a quote and the progress they were built from."""
+    db.run_transaction([
+        ("DELETE FROM segment_bests WHERE userId = ? AND quoteId = ?", [user_id, quote_id]),
+        *[("""
+            INSERT INTO segment_bests
+            VALUES (?,?,?,?,?,?,?,?,?)
+        """, [
+            user_id, quote_id, i, segment["text"], segment["wpm"], segment["raw_wpm"],
+            json.dumps(segment["delays"]), segment["raceNumber"], segment["timestamp"],
+        ]) for i, segment in enumerate(segments)],
+        ("""
+            INSERT INTO segment_best_progress VALUES (?,?,?,?)
+            ON CONFLICT(userId, quoteId) DO UPDATE SET
+                lastRaceRow = excluded.lastRaceRow,
+                processorVersion = excluded.processorVersion
+        """, [user_id, quote_id, last_race_row, processor_version]),
+    ])
+
+
+def get_new_races(user_id: str, quote_id: str, last_race_row: int):
+    """
+    Yields batches of a user's races on a quote stored after the given race row, with keystroke data.
+    Row IDs follow insertion order, so races imported out of order are still picked up.
+    """
+    while True:
+        rows = db.fetch("""
+            SELECT rowid AS raceRow, raceId, raceNumber, timestamp FROM races
+            WHERE userId = ? AND quoteId = ? AND rowid > ?
+            ORDER BY rowid
+            LIMIT ?
+        """, [user_id, quote_id, last_race_row, RACE_BATCH_SIZE])
+
+        if not rows:
+            return
+
+        keystroke_data = get_keystroke_data_batch([row["raceId"] for row in rows])
+        yield [dict(row, keystrokeData=keystroke_data.get(row["raceId"])) for row in rows]
+
+        last_race_row = rows[-1]["raceRow"]
+
+
+def delete_segment_bests(user_id: str):
+    """Deletes all of a user's stored best segments."""
+    db.run_transaction([
+        ("DELETE FROM segment_bests WHERE userId = ?", [user_id]),
+        ("DELETE FROM segment_best_progress WHERE userId = ?", [user_id]),
+    ])
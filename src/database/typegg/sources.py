@@ -1,4 +1,7 @@
 from database.typegg import db
+from database.typegg.keystroke_data import delete_keystroke_data_batch
+from database.typegg.quote_search import index_source, remove_orphaned_quotes
+from database.typegg.race_rollups import rebuild_race_rollups, get_source_users
 
 
 def source_insert(source):
@@ -70,6 +73,7 @@ def update_source(source_id: str, updates: dict):
         SET {", ".join(sets)}
         WHERE sourceId = ?
     """, params)
+    index_source(updates.get("sourceId", source_id))
 
     return True
 
@@ -77,6 +81,18 @@ def update_source(source_id: str, updates: dict):
 def delete_source(source_id: str):
     """
     Delete a source by ID.
-    Cascades to delete quotes, races, and keystroke_data.
+    Cascades to delete quotes and races, then removes their keystroke data and rebuilds affected rollups.
     """
+    from database.typegg.quotes import reload_quote_ids
+
+    user_ids = get_source_users(source_id)
+    race_ids = [row["raceId"] for row in db.fetch("""
+        SELECT r.raceId FROM quotes q
+        JOIN races r ON r.quoteId = q.quoteId
+        WHERE q.sourceId = ?
+    """, [source_id])]
     db.run("DELETE FROM sources WHERE sourceId = ?", [source_id])
+    rebuild_race_rollups(user_ids)
+    reload_quote_ids()
+    remove_orphaned_quotes()
+    delete_keystroke_data_batch(race_ids)
@@ -0,0 +1,126 @@
+import asyncio
+
+from database.typegg import db
+from database.typegg.keystroke_data import get_stored_keystroke_data_batch
+from database.typegg.keystroke_jobs import get_pool
+from utils.data_structures import KeyedLocks
+from utils.keystrokes import PROCESSOR_VERSION
+from utils.logging import log, log_error
+from utils.timings import get_chunk_timings
+
+TIMING_BATCH_SIZE = 200  # Races processed per batch while catching up
+TIMING_TABLES = {"bigram": "bigram_timings", "word": "word_timings"}
+_timing_locks = KeyedLocks()
+_update_tasks: set[asyncio.Task] = set()  # Referenced until done, so they aren't garbage collected
+
+
+def get_progress(user_id: str):
+    """Returns the rowid of the last race included in a user's timings, and the processor version used."""
+    row = db.fetch_one("SELECT lastRaceRow, processorVersion FROM timing_progress WHERE userId = ?", [user_id])
+    if row is None:
+        return 0, None
+
+    return row["lastRaceRow"], row["processorVersion"]
+
+
+async def save_timings(user_id: str, bigrams: dict, words: dict, last_race_row: int):
+    """
+    Merges a batch of timings into a user's index and advances their progress.
+    Written as one transaction, since the counts are added to and a batch must never be merged twice.
+    """
+    statements = [
+        (f"""
+            INSERT INTO {table} VALUES (?,?,?,?,?,?)
+            ON CONFLICT(userId, key) DO UPDATE SET
+                count = count + excluded.count,
+                total = total + excluded.total,
+                squares = squares + excluded.squares,
+                best = MIN(best, excluded.best)
+        """, [user_id, key, *stats])
+        for table, index in [("bigram_timings", bigrams), ("word_timings", words)]
+        for key, stats in index.items()
+    ]
+    statements.append(("""
+        INSERT INTO timing_progress VALUES (?,?,?)
+        ON CONFLICT(userId) DO UPDATE SET
+            lastRaceRow = excluded.lastRaceRow,
+            processorVersion = excluded.processorVersion
+    """, [user_id, last_race_row, PROCESSOR_VERSION]))
+
+    await db.run_transaction_async(statements)
+
+
+async def update_timings(user_id: str):
+    """
+    Merges the timings of a user's races stored since the last update into their index,
+    rebuilding it if keystroke processing changed since.
+    Keystroke data is read in a thread and decoded in the keystroke job pool, so a catch-up doesn't block the bot.
+    """
+    # A concurrent update waits, then catches up from the progress it left
+    async with _timing_locks.hold(user_id):
+        last_race_row, processor_version = get_progress(user_id)
+        if processor_version not in (None, PROCESSOR_VERSION):
+            delete_timings(user_id)
+            last_race_row = 0
+
+        rows = db.fetch("""
+            SELECT rowid AS raceRow, raceId FROM races
+            WHERE userId = ? AND rowid > ?
+            ORDER BY rowid
+        """, [user_id, last_race_row])
+
+        loop = asyncio.get_running_loop()
+        pool = get_pool()
+
+        for i in range(0, len(rows), TIMING_BATCH_SIZE):
+            batch = rows[i:i + TIMING_BATCH_SIZE]
+            keystroke_rows = await asyncio.to_thread(
+                get_stored_keystroke_data_batch, [row["raceId"] for row in batch],
+            )
+            bigrams, words = await loop.run_in_executor(pool, get_chunk_timings, keystroke_rows)
+            await save_timings(user_id, bigrams, words, batch[-1]["raceRow"])
+
+        if rows:
+            log(f"Updated timings for {user_id} from {len(rows):,} races")
+
+
+async def _update_timings_logged(user_id: str):
+    try:
+        await update_timings(user_id)
+    except Exception as e:
+        log_error(f"Timing Update ({user_id})", e)
+
+
+def schedule_timing_update(user_id: str):
+    """Catches up a user's timings in the background, such as after an import, logging any failure."""
+    task = asyncio.create_task(_update_timings_logged(user_id))
+    _update_tasks.add(task)
+    task.add_done_callback(_update_tasks.discard)
+
+
+def get_timing(user_id: str, kind: str, key: str):
+    """Returns a user's (count, total, squares, best) statistics for a bigram or word, or None."""
+    return db.fetch_one(f"""
+        SELECT count, total, squares, best FROM {TIMING_TABLES[kind]}
+        WHERE userId = ? AND key = ?
+    """, [user_id, key])
+
+
+def get_ranked_timings(user_id: str, kind: str, min_count: int, limit: int = 10, slowest: bool = True):
+    """Returns a user's bigrams or words with at least min_count occurrences, by average time."""
+    return db.fetch(f"""
+        SELECT key, count, total / count AS average, squares, total, best
+        FROM {TIMING_TABLES[kind]}
+        WHERE userId = ? AND count >= ?
+        ORDER BY average {"DESC" if slowest else "ASC"}
+        LIMIT ?
+    """, [user_id, min_count, limit])
+
+
+def delete_timings(user_id: str):
+    """Deletes a user's timing index."""
+    db.run_transaction([
+        ("DELETE FROM bigram_timings WHERE userId = ?", [user_id]),
+        ("DELETE FROM word_timings WHERE userId = ?", [user_id]),
+        ("DELETE FROM timing_progress WHERE userId = ?", [user_id]),
+    ])
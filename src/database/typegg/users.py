@@ -2,6 +2,7 @@ import asyncio
 from typing import Optional
 
 from database.typegg import db
+from utils.dates import to_epoch_ms
 from utils.errors import ProfileNotFound
 from utils.flags import Flags
 from utils.logging import log
@@ -75,10 +76,15 @@ def get_quote_bests(
     conditions = ["userId = ?"]
     params = [user_id]
 
+    if start_date is not None:
+        start_date = to_epoch_ms(start_date)
+    if end_date is not None:
+        end_date = to_epoch_ms(end_date)
+
     condition_map = {
         quote_id: "r.quoteId = ?",
-        start_date: "timestamp >= ?",
-        end_date: "timestamp < ?",
+        start_date: "timestampMs >= ?",
+        end_date: "timestampMs < ?",
         min_pp: "pp > ?",
         max_pp: "pp <= ?",
     }
@@ -0,0 +1,192 @@
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+GROUP_COMMIT_WINDOW = 0.002  # Seconds to wait for more jobs before committing a group
+MAX_GROUP_SIZE = 256
+MAX_QUEUED_JOBS = 1024  # Submitting blocks (or awaits) once this many jobs are waiting
+LATENCY_SAMPLES = 1000
+
+
+@dataclass
+class WriteJob:
+    """A unit of work run on the writer's connection, resolved once it has been committed."""
+    work: Callable[[sqlite3.Cursor], Any]
+    transaction: bool = True  # False for statements that can't run inside a transaction (some PRAGMAs, VACUUM)
+    group: bool = True  # Whether the writer may wait for more jobs to commit alongside this one
+    future: Future = field(default_factory=Future)
+    submitted: float = field(default_factory=time.perf_counter)
+
+
+class Writer:
+    """
+    Owns a database's write connection on a dedicated thread.
+    Jobs are queued from any thread or coroutine, and jobs that arrive close together
+    are committed in a single transaction, each inside its own savepoint so a failing
+    job only rolls back its own statements.
+    """
+
+    def __init__(self, file: str, setup: Optional[Callable[[sqlite3.Connection], None]] = None, name: str = "writer"):
+        self.connection = sqlite3.connect(file, isolation_level=None, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        if setup:
+            setup(self.connection)
+
+        self.jobs: queue.Queue[WriteJob] = queue.Queue(maxsize=MAX_QUEUED_JOBS)
+        self.pending: Optional[WriteJob] = None  # A job taken off the queue that has to start the next group
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.job_count = 0
+        self.commit_count = 0
+        self.failure_count = 0
+        self.largest_group = 0
+        self.full_waits = 0
+
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, job: WriteJob) -> Future:
+        """Queue a job, blocking while the queue is full. Returns a future of the job's result."""
+        if threading.current_thread() is self.thread:
+            # Called from inside another job, so it's already part of the open transaction
+            job.future.set_result(job.work(self.connection.cursor()))
+            return job.future
+
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            self.full_waits += 1
+            self.jobs.put(job)
+
+        return job.future
+
+    def execute(self, work: Callable[[sqlite3.Cursor], Any], transaction: bool = True):
+        """Run a job and wait for it to be committed."""
+        return self.submit(WriteJob(work, transaction, group=False)).result()
+
+    async def execute_async(self, work: Callable[[sqlite3.Cursor], Any], transaction: bool = True):
+        """Run a job without blocking the event loop, committing it alongside other queued jobs."""
+        job = WriteJob(work, transaction)
+
+        while True:
+            try:
+                self.jobs.put_nowait(job)
+                break
+            except queue.Full:
+                self.full_waits += 1
+                await asyncio.sleep(GROUP_COMMIT_WINDOW)
+
+        return await asyncio.wrap_future(job.future)
+
+    def _next_group(self):
+        """Blocks for the next job, then collects the jobs that arrive within the commit window."""
+        first = self.pending or self.jobs.get()
+        self.pending = None
+
+        if not first.transaction:
+            return [first]
+
+        group = [first]
+        deadline = time.perf_counter() + GROUP_COMMIT_WINDOW * first.group
+
+        while len(group) < MAX_GROUP_SIZE:
+            try:
+                timeout = deadline - time.perf_counter()
+                job = self.jobs.get(timeout=timeout) if timeout > 0 else self.jobs.get_nowait()
+            except queue.Empty:
+                break
+
+            if not job.transaction:
+                self.pending = job
+                break
+
+            group.append(job)
+
+        return group
+
+    def _run(self):
+        while True:
+            group = self._next_group()
+
+            if group[0].transaction:
+                self._commit_group(group)
+            else:
+                self._run_standalone(group[0])
+
+    def _run_standalone(self, job: WriteJob):
+        cursor = self.connection.cursor()
+        try:
+            result = job.work(cursor)
+        except Exception as e:
+            self.failure_count += 1
+            job.future.set_exception(e)
+        else:
+            self.commit_count += 1
+            job.future.set_result(result)
+        finally:
+            cursor.close()
+            self._record([job])
+
+    def _commit_group(self, group: list[WriteJob]):
+        cursor = self.connection.cursor()
+        results = []
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+
+            for job in group:
+                cursor.execute("SAVEPOINT job")
+                try:
+                    results.append((job, job.work(cursor), None))
+                    cursor.execute("RELEASE job")
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO job")
+                    cursor.execute("RELEASE job")
+                    results.append((job, None, e))
+
+            cursor.execute("COMMIT")
+            self.commit_count += 1
+        except Exception as e:
+            if self.connection.in_transaction:
+                self.connection.rollback()
+            results = [(job, None, e) for job in group]
+        finally:
+            cursor.close()
+
+        for job, result, error in results:
+            if error is not None:
+                self.failure_count += 1
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+
+        self.largest_group = max(self.largest_group, len(group))
+        self._record(group)
+
+    def _record(self, group: list[WriteJob]):
+        now = time.perf_counter()
+        self.job_count += len(group)
+        self.latencies.extend(now - job.submitted for job in group)
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float):
+            return latencies[min(int(len(latencies) * p), len(latencies) - 1)] if latencies else 0.0
+
+        return {
+            "jobs": self.job_count,
+            "commits": self.commit_count,
+            "failures": self.failure_count,
+            "jobs_per_commit": self.job_count / self.commit_count if self.commit_count else 0.0,
+            "largest_group": self.largest_group,
+            "queued": self.jobs.qsize(),
+            "full_waits": self.full_waits,
+            "latency_p50": percentile(0.5),
+            "latency_p99": percentile(0.99),
+        }
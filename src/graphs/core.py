@@ -1,6 +1,8 @@
-import sys
+import json
 import textwrap
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional
 
 import matplotlib
@@ -32,6 +34,10 @@ GRAPH_PALETTE = [
 ]
 plt.rcParams["axes.prop_cycle"] = plt.cycler(color=GRAPH_PALETTE)
 
+POINTS_PER_PIXEL = 2  # Line points kept per pixel of figure width, once a series is downsampled
+PRESELECT_FACTOR = 4  # Min-max buckets per output point, before the triangle pass
+MAX_CACHED_STYLES = 256  # Compiled themes kept, users' custom themes beyond the built-in ones
+
 CUSTOM_COLORMAPS = [
     ("plus", ["#8B1F6B", "#FF279A", "#FF6BC7"]),
     ("keegan", ["#0094FF", "#FF00DC"]),
@@ -64,35 +70,100 @@ class CollectionHandler(HandlerLineCollection):
         return [lc]
 
 
+@dataclass(frozen=True)
+class StyleBundle:
+    """A theme resolved into everything a render needs, compiled once per distinct theme."""
+    background: str
+    graph_background: str
+    title: str
+    text: str
+    axis: str
+    grid: str
+    grid_opacity: float
+    line: str
+    raw_speed: str
+    line_colormap: bool  # Whether the line color names a colormap
+    palette: tuple[str, ...]
+    logo: np.ndarray
+    logo_frame: bool  # Whether the logo needs a backdrop to stand out from the background
+    plus_badge: Optional[np.ndarray]
+
+
+@lru_cache(maxsize=None)
+def load_image(name: str):
+    """Returns a decoded image from the assets folder, read only since it's shared between renders."""
+    image = mpimg.imread(ASSETS_DIR / "images" / name)
+    image.setflags(write=False)
+    return image
+
+
+@lru_cache(maxsize=None)
+def get_palette(line_color: str):
+    """Returns the graph palette without colors that clash with a line color."""
+    if line_color in plt.colormaps():
+        return tuple(GRAPH_PALETTE)
+
+    return tuple(color for color in GRAPH_PALETTE if color_distance(line_color, color) > 0.25)
+
+
+@lru_cache(maxsize=MAX_CACHED_STYLES)
+def _compile_style(theme_key: str):
+    theme = json.loads(theme_key)
+    background = theme["background"]
+
+    return StyleBundle(
+        background=background,
+        graph_background=theme["graph_background"],
+        title=theme["title"],
+        text=theme["text"],
+        axis=theme["axis"],
+        grid=theme["grid"],
+        grid_opacity=theme["grid_opacity"],
+        line=theme["line"],
+        raw_speed=theme["raw_speed"],
+        line_colormap=theme["line"] in plt.colormaps(),
+        palette=get_palette(theme["line"]),
+        logo=load_image("logo.png" if get_luminance(*to_rgb(background)) <= 0.5 else "logo_dark.png"),
+        logo_frame=color_distance(background, "#00B5E2") <= 1,
+        plus_badge=load_image("plus.png") if theme.get("isGgPlus") else None,
+    )
+
+
+def get_style(theme: dict):
+    """Returns the compiled style bundle of a theme."""
+    return _compile_style(json.dumps(theme, sort_keys=True))
+
+
 def apply_theme(
     ax: Axes, theme: dict,
     legend_loc: Optional[int | str] = "upper left",
     force_legend: bool = False,
     themed_line: int = 0,
+    legend_outside: bool = False,
 ):
-    """Apply a theme to all graph elements."""
+    """Apply a theme to all graph elements. Graphs with a legend outside the axes pass legend_outside."""
+    style = get_style(theme)
+
     # Backgrounds
-    background_color = theme["background"]
-    ax.figure.set_facecolor(background_color)
-    ax.set_facecolor(theme["graph_background"])
+    ax.figure.set_facecolor(style.background)
+    ax.set_facecolor(style.graph_background)
 
     # Text
-    ax.title.set_color(theme["title"])
+    ax.title.set_color(style.title)
     ax.title.set_fontsize(14)
-    ax.xaxis.label.set_color(theme["text"])
-    ax.yaxis.label.set_color(theme["text"])
+    ax.xaxis.label.set_color(style.text)
+    ax.yaxis.label.set_color(style.text)
 
     # Axis
-    ax.tick_params(axis="both", which="both", colors=theme["axis"], labelcolor=theme["text"])
+    ax.tick_params(axis="both", which="both", colors=style.axis, labelcolor=style.text)
     for axis in ax.spines.values():
-        axis.set_color(theme["axis"])
+        axis.set_color(style.axis)
 
     # Grid
-    ax.grid(color=theme["grid"], alpha=theme["grid_opacity"])
+    ax.grid(color=style.grid, alpha=style.grid_opacity)
 
     # Lines & Legend
     legend_lines, legend_labels, handler_map = [], [], {}
-    line_color = theme["line"]
 
     for i, line in enumerate(ax.get_lines()):
         label = line.get_label()
@@ -104,17 +175,17 @@ def apply_theme(
         #     label = "\u200B" + label
 
         if label in ["Raw Speed"]:
-            line.set_color(theme["raw_speed"])
+            line.set_color(style.raw_speed)
             line.set_linewidth(1)
 
         line_handler = LineHandler()
 
         if i == themed_line:
-            if line_color in plt.colormaps():
-                line = get_line_colormap(ax, i, line_color)
+            if style.line_colormap:
+                line = get_line_colormap(ax, i, style.line)
                 line_handler = CollectionHandler(numpoints=50)
             else:
-                line.set_color(line_color)
+                line.set_color(style.line)
 
         legend_lines.append(line)
         legend_labels.append(label)
@@ -127,9 +198,8 @@ def apply_theme(
             "handler_map": handler_map,
             "loc": legend_loc
         }
-        caller_file = sys._getframe(1).f_code.co_filename
 
-        if any(graph in caller_file for graph in ["race", "daily", "match"]):
+        if legend_outside:
             legend_kwargs.update({
                 "bbox_to_anchor": (1.03, 1),
                 "borderaxespad": 0,
@@ -144,10 +214,10 @@ def apply_theme(
     legend = ax.get_legend()
     if legend:
         frame = legend.get_frame()
-        frame.set_facecolor(theme["graph_background"])
-        frame.set_edgecolor(theme["axis"])
+        frame.set_facecolor(style.graph_background)
+        frame.set_edgecolor(style.axis)
         for text in legend.get_texts():
-            text.set_color(theme["text"])
+            text.set_color(style.text)
 
     # TypeGG Logo
     if "\n" in ax.get_title():
@@ -156,15 +226,10 @@ def apply_theme(
         width, height = fig.get_size_inches()
         fig.set_size_inches(width, height + 0.22)
 
-    logo = "logo.png" if get_luminance(*to_rgb(background_color)) <= 0.5 else "logo_dark.png"
-    logo_path = ASSETS_DIR / "images" / logo
-    img = mpimg.imread(logo_path)
-    imagebox = OffsetImage(img, zoom=0.55)
-    frameon = False
+    imagebox = OffsetImage(style.logo, zoom=0.55)
     boxprops = None
 
-    if color_distance(background_color, "#00B5E2") <= 1:
-        frameon = True
+    if style.logo_frame:
         boxprops = dict(
             facecolor="#00031B",
             edgecolor="none",
@@ -179,17 +244,15 @@ def apply_theme(
         boxcoords="offset points",
         xybox=(6, -6),
         box_alignment=(0, 1),
-        frameon=frameon,
+        frameon=style.logo_frame,
         bboxprops=boxprops
     )
     ax.figure.add_artist(ab)
     ax.add_artist(ab)
 
     # GG+ Badge
-    if theme.get("isGgPlus"):
-        plus_path = ASSETS_DIR / "images" / "plus.png"
-        plus_img = mpimg.imread(plus_path)
-        plus_imagebox = OffsetImage(plus_img, zoom=0.045)
+    if style.plus_badge is not None:
+        plus_imagebox = OffsetImage(style.plus_badge, zoom=0.045)
 
         plus_ab = AnnotationBbox(
             plus_imagebox,
@@ -208,7 +271,7 @@ def get_line_colormap(ax: Axes, line_index: int, colormap_name: str):
     """Returns a line collection object with a colormap applied."""
     cmap = plt.get_cmap(colormap_name)
     line = ax.get_lines()[line_index]
-    x, y = line.get_data()
+    x, y = downsample(*line.get_data(), get_point_budget(ax.figure))
 
     ax.lines[line_index].remove()
     points = np.array([x, y]).T.reshape(-1, 1, 2)
@@ -221,36 +284,106 @@ def get_line_colormap(ax: Axes, line_index: int, colormap_name: str):
 
 
 def interpolate_segments(x, y):
-    """Returns a list of interpolated X and Y segments."""
-    x_segments = []
-    y_segments = []
-
-    for i in range(len(y) - 1):
-        x_range = x[-1] - x[0]
-        x_difference = x[i + 1] - x[i]
-        if x_difference == 0:
-            continue
-        x_size = x_range / x_difference
-        segment_count = max(int(50 / x_size), 2)
-        if segment_count == 2 and i < len(y) - 2:
-            x_segments.append(x[i])
-            y_segments.append(y[i])
-            continue
+    """Returns interpolated X and Y segments, so lines spanning a large part of the X-axis are drawn smoothly."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    x_differences = np.diff(x)
 
-        segments = np.linspace(y[i], y[i + 1], segment_count)
-        for v in segments[:-1]:
-            y_segments.append(v)
+    # Each pair is split into enough segments to cover its share of 50 across the X-axis
+    with np.errstate(divide="ignore", invalid="ignore"):
+        segment_counts = np.trunc(50 / ((x[-1] - x[0]) / x_differences))
+    segment_counts = np.where(x_differences == 0, 1, np.maximum(np.nan_to_num(segment_counts), 2)).astype(int) - 1
 
-        segments = np.linspace(x[i], x[i + 1], segment_count)
-        for v in segments[:-1]:
-            x_segments.append(v)
+    starts = np.repeat(np.arange(len(x_differences)), segment_counts)
+    steps = np.arange(len(starts)) - np.repeat(np.cumsum(segment_counts) - segment_counts, segment_counts)
+    fractions = steps / np.repeat(np.maximum(segment_counts, 1), segment_counts)
 
-    y_segments.append(y[-1])
-    x_segments.append(x[-1])
+    x_segments = np.append(x[starts] + fractions * x_differences[starts], x[-1])
+    y_segments = np.append(y[starts] + fractions * (y[starts + 1] - y[starts]), y[-1])
 
     return x_segments, y_segments
 
 
+def get_point_budget(fig=None):
+    """Returns the number of points a line needs to look exact at a figure's pixel width."""
+    if fig is None:
+        width, dpi = plt.rcParams["figure.figsize"][0], plt.rcParams["figure.dpi"]
+    else:
+        width, dpi = fig.get_figwidth(), fig.dpi
+
+    return int(width * dpi * POINTS_PER_PIXEL)
+
+
+def min_max_indices(y, bucket_count: int):
+    """Returns the sorted indices of the minimum and maximum of each of a number of equal buckets."""
+    y = np.asarray(y, dtype=float)
+    bucket_size = -(-len(y) // bucket_count)
+    buckets = np.pad(y, (0, bucket_size * bucket_count - len(y)), mode="edge").reshape(-1, bucket_size)
+    offsets = np.arange(len(buckets)) * bucket_size
+
+    minimums = np.minimum(buckets.argmin(axis=1) + offsets, len(y) - 1)
+    maximums = np.minimum(buckets.argmax(axis=1) + offsets, len(y) - 1)
+
+    return np.unique(np.concatenate([minimums, maximums]))
+
+
+def lttb_indices(x, y, point_count: int):
+    """Returns the indices of the points picked by largest-triangle-three-buckets, including the first and last."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if point_count >= len(x) or point_count < 3:
+        return np.arange(len(x))
+
+    edges = np.linspace(1, len(x) - 1, point_count - 1).astype(int)
+    indices = np.empty(point_count, dtype=int)
+    indices[0], indices[-1] = 0, len(x) - 1
+
+    # The average of each bucket is the third corner of the triangles in the bucket before it
+    bucket_x = np.add.reduceat(x[1:-1], edges[:-1] - 1) / np.diff(edges)
+    bucket_y = np.add.reduceat(y[1:-1], edges[:-1] - 1) / np.diff(edges)
+    next_x = np.append(bucket_x[1:], x[-1])
+    next_y = np.append(bucket_y[1:], y[-1])
+
+    previous = 0
+    for i in range(point_count - 2):
+        start, end = edges[i], edges[i + 1]
+        areas = np.abs(
+            (x[previous] - next_x[i]) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y[i] - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        indices[i + 1] = previous
+
+    return indices
+
+
+def downsample_indices(x, y, max_points: int):
+    """
+    Returns the sorted indices of the points to draw for a series of at most roughly max_points.
+    Points are preselected by bucket minimums and maximums, then picked by largest-triangle-three-buckets,
+    and the series' first, last, lowest and highest points are always kept.
+    """
+    y = np.asarray(y, dtype=float)
+    if len(y) <= max_points or np.isnan(y).all():
+        return np.arange(len(y))
+
+    x = np.asarray(x, dtype=float)
+    candidates = min_max_indices(y, min(max_points * PRESELECT_FACTOR // 2, len(y)))
+    candidates = np.unique(np.concatenate([[0, len(y) - 1], candidates]))
+    picked = candidates[lttb_indices(x[candidates], y[candidates], max_points)]
+
+    return np.unique(np.concatenate([picked, [np.nanargmin(y), np.nanargmax(y)]]))
+
+
+def downsample(x, y, max_points: int):
+    """Returns a series reduced to about max_points, keeping its shape and extremes."""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    indices = downsample_indices(x, y, max_points)
+
+    return x[indices], y[indices]
+
+
 def apply_date_ticks(ax: Axes, timestamps: list[float]):
     """Applies date ticks evenly spaced on the X-axis."""
     min_timestamp = min(timestamps)
@@ -290,10 +423,7 @@ def filter_palette(ax: Axes, line_color: str):
     if line_color in plt.colormaps():
         return
 
-    ax.set_prop_cycle(plt.cycler(color=[
-        color for color in GRAPH_PALETTE
-        if color_distance(line_color, color) > 0.25
-    ]))
+    ax.set_prop_cycle(plt.cycler(color=get_palette(line_color)))
 
 
 def apply_log_ticks(ax: Axes, max_value: int):
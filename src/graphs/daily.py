@@ -26,7 +26,7 @@ def render(
     ax.set_ylabel("WPM")
     ax.set_title(title, fontsize=10)
 
-    apply_theme(ax, theme, themed_line=themed_line)
+    apply_theme(ax, theme, themed_line=themed_line, legend_outside=True)
 
     file_name = generate_file_name("daily")
     plt.savefig(file_name)
@@ -1,7 +1,7 @@
 import numpy as np
 from matplotlib.collections import LineCollection
 
-from graphs.core import plt, apply_theme, generate_file_name
+from graphs.core import plt, apply_theme, generate_file_name, downsample, downsample_indices, get_point_budget
 
 
 def moving_average(y, window=20):
@@ -47,17 +47,21 @@ def render(
     p1_avg = moving_average(p1_wpm, window)
     p2_avg = moving_average(p2_wpm, window)
     diff_avg = moving_average(difficulties, window)
-    diff_x_avg = range(window, len(x) + 1) if len(diff_avg) < len(x) else x
+    diff_x_avg = np.arange(window, len(x) + 1) if len(diff_avg) < len(x) else x
+    point_budget = get_point_budget(fig)
 
     def plot_colored_path(ax, x_vals, y_vals, raw_wpm, base_color, zorder):
         """Create a line that becomes marked during DNFs."""
-        points = np.array([x_vals, y_vals]).T.reshape(-1, 1, 2)
+        indices = downsample_indices(x_vals, y_vals, point_budget)
+        points = np.array([x_vals[indices], y_vals[indices]]).T.reshape(-1, 1, 2)
         segments = np.concatenate([points[:-1], points[1:]], axis=1)
 
-        colors = [
-            theme["crosses"] if raw_wpm[i + 1] == 0 else base_color
-            for i in range(len(x_vals) - 1)
-        ]
+        # A segment is marked if any encounter it spans was a DNF
+        dnf_counts = np.cumsum(raw_wpm == 0)
+        colors = np.where(
+            dnf_counts[indices[1:]] > dnf_counts[indices[:-1]],
+            theme["crosses"], base_color,
+        ).tolist()
 
         lc = LineCollection(segments, colors=colors, linewidth=1.5, zorder=zorder)
         ax.add_collection(lc)
@@ -65,7 +69,7 @@ def render(
     plot_colored_path(ax, x, p1_avg, p1_wpm, "#00a2ff", 333)
     plot_colored_path(ax, x, p2_avg, p2_wpm, "#af8fe9", 111)
 
-    ax2.plot(diff_x_avg, diff_avg, color="#808080", alpha=0.5, linewidth=1)
+    ax2.plot(*downsample(diff_x_avg, diff_avg, point_budget), color="#808080", alpha=0.5, linewidth=1)
 
     ax.set_xlabel("Encounter #")
     ax.set_ylabel("WPM")
@@ -21,17 +21,7 @@ def render(
     ax.set_ylabel("Occurrences")
     ax.set_xlabel(metric["x_label"])
 
-    match metric["name"]:
-        case "pp":
-            bins = np.arange(min(values), max(values), 10)
-        case "wpm":
-            bins = np.arange(min(values), max(values), 5)
-        case "accuracy":
-            min_display_acc = 85
-            bins = np.floor(np.arange(np.floor(max(min(values), min_display_acc)), 101.1, 1))
-        case "errorReactionTime" | "errorRecoveryTime":
-            values = [v for v in values if 0 < v < 600]
-            bins = np.arange(min(values), max(values), 10)
+    bins = get_bins(metric["name"], values)
 
     if color in plt.colormaps():
         color = DEFAULT_THEME["line"]
@@ -81,17 +71,7 @@ def render_compare(
     ax.set_ylabel("Occurrences")
     ax.set_xlabel(metric["x_label"])
 
-    match metric["name"]:
-        case "pp":
-            bins = np.arange(min(values), max(values), 10)
-        case "wpm":
-            bins = np.arange(min(values), max(values), 5)
-        case "accuracy":
-            min_display_acc = 85
-            bins = np.floor(np.arange(np.floor(max(min(values), min_display_acc)), 101.1, 1))
-        case "errorReactionTime" | "errorRecoveryTime":
-            values = [v for v in values if 0 < v < 600]
-            bins = np.arange(min(values), max(values), 10)
+    bins = get_bins(metric["name"], values)
 
     heights = []
     if len(values1) > 0:
@@ -117,5 +97,20 @@ def render_compare(
     return file_name
 
 
+def get_bins(metric: str, values: np.ndarray):
+    """Returns the histogram bin edges for a metric's values."""
+    match metric:
+        case "pp":
+            return np.arange(values.min(), values.max(), 10)
+        case "wpm":
+            return np.arange(values.min(), values.max(), 5)
+        case "accuracy":
+            min_display_acc = 85
+            return np.floor(np.arange(np.floor(max(values.min(), min_display_acc)), 101.1, 1))
+        case "errorReactionTime" | "errorRecoveryTime":
+            values = values[(values > 0) & (values < 600)]
+            return np.arange(values.min(), values.max(), 10)
+
+
 def invert_color(color: str):
     return f"#{0xFFFFFF ^ int(color.lstrip("#"), 16):06x}"
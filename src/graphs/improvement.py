@@ -2,8 +2,8 @@ import numpy as np
 from matplotlib.colors import hex2color
 from matplotlib.ticker import FuncFormatter
 
-from graphs.core import plt, apply_theme, interpolate_segments, apply_date_ticks, generate_file_name
-from utils.dates import get_timestamp_list
+from graphs.core import plt, apply_theme, interpolate_segments, apply_date_ticks, generate_file_name, downsample, \
+    get_point_budget
 from utils.strings import format_big_number
 
 
@@ -11,7 +11,7 @@ def render_over_time(
     values: list[float],
     metric: str,
     theme: dict,
-    dates: list[str],
+    timestamps: list[float],
     window_size: int,
     dnf_indices: list[int] = None,
 ):
@@ -22,15 +22,12 @@ def render_over_time(
     downsampled_indices = np.arange(0, len(values), downsample_factor)
     downsampled_values = values[downsampled_indices]
 
-    if len(values) > 10000:
-        downsample_factor *= 10
+    moving_average = np.convolve(values, np.ones(window_size) / window_size, mode="valid")
 
-    moving_average = np.convolve(values, np.ones(window_size) / window_size, mode="valid")[0::downsample_factor]
-    x_points = np.arange(window_size - 1, len(values))[0::downsample_factor]
-
-    timestamps = np.asarray(get_timestamp_list(dates))
-    downsampled_indices = [timestamps[d] for d in downsampled_indices]
-    x_points = [timestamps[r] for r in x_points]
+    timestamps = np.asarray(timestamps)
+    downsampled_indices = timestamps[downsampled_indices]
+    x_points = timestamps[window_size - 1:]
+    line_x, line_y = downsample(x_points, moving_average, get_point_budget(fig))
     apply_date_ticks(ax, timestamps)
 
     bg_color = hex2color(theme["graph_background"])
@@ -38,12 +35,12 @@ def render_over_time(
 
     ax.scatter(downsampled_indices, downsampled_values, alpha=0.1, s=25, color=point_color, edgecolors="none")
 
-    segment_count = 50 // (len(moving_average) - 1) if len(moving_average) > 1 else 1
+    segment_count = 50 // (len(line_y) - 1) if len(line_y) > 1 else 1
     if segment_count > 1:
-        x_segments, y_segments = interpolate_segments(x_points, moving_average)
+        x_segments, y_segments = interpolate_segments(line_x, line_y)
         ax.plot(x_segments, y_segments, label="_")
     else:
-        ax.plot(x_points, moving_average, label="_")
+        ax.plot(line_x, line_y, label="_")
 
     if dnf_indices:
         dnf_indices = np.asarray(dnf_indices)
@@ -97,18 +94,19 @@ def render_over_races(
     moving_average = np.convolve(values, kernel, mode="valid")
     difficulty_average = np.convolve(difficulties, kernel, mode="valid")
 
-    x_points = [r + 1 for r in x_points]
+    x_points = x_points + 1
     ax.xaxis.set_major_formatter(FuncFormatter(format_big_number))
 
+    point_budget = get_point_budget(fig)
+    x_average, y_average = downsample(x_points, moving_average, point_budget)
+    x_difficulty, y_difficulty = downsample(x_points, difficulty_average, point_budget)
+
     segment_count = 50 // (len(moving_average) - 1) if len(moving_average) > 1 else 1
     if segment_count > 1:
-        x_average, y_average = interpolate_segments(x_points, moving_average)
-        x_difficulty, y_difficulty = interpolate_segments(x_points, difficulty_average)
-        ax.plot(x_average, y_average, label="_")
-        ax2.plot(x_difficulty, y_difficulty, label="_", alpha=0.5)
-    else:
-        ax.plot(x_points, moving_average, label="_")
-        ax2.plot(x_points, difficulty_average, label="_", alpha=0.5)
+        x_average, y_average = interpolate_segments(x_average, y_average)
+        x_difficulty, y_difficulty = interpolate_segments(x_difficulty, y_difficulty)
+    ax.plot(x_average, y_average, label="_")
+    ax2.plot(x_difficulty, y_difficulty, label="_", alpha=0.5)
 
     if dnf_indices:
         dnf_indices = np.asarray(dnf_indices)
@@ -154,14 +152,11 @@ def render_text(
     downsampled_values = values[downsampled_indices]
     window_size = min(max(len(values) // 15, 1), 50)
 
-    if len(values) > 10000:
-        downsample_factor *= 10
-
-    moving_values = np.convolve(values, np.ones(window_size) / window_size, mode="valid")[0::downsample_factor]
-    x_points = np.arange(window_size - 1, len(values))[0::downsample_factor]
+    moving_values = np.convolve(values, np.ones(window_size) / window_size, mode="valid")
+    x_points = np.arange(window_size, len(values) + 1)
 
-    downsampled_indices = [d + 1 for d in downsampled_indices]
-    x_points = [r + 1 for r in x_points]
+    downsampled_indices = downsampled_indices + 1
+    x_points, moving_values = downsample(x_points, moving_values, get_point_budget(fig))
     ax.xaxis.set_major_formatter(FuncFormatter(format_big_number))
 
     bg_color = hex2color(theme["graph_background"])
@@ -1,7 +1,8 @@
 from matplotlib.ticker import FuncFormatter
 
-from graphs.core import plt, apply_theme, interpolate_segments, apply_date_ticks, generate_file_name, filter_palette
-from utils.dates import get_timestamp_list, now
+from graphs.core import plt, apply_theme, interpolate_segments, apply_date_ticks, generate_file_name, filter_palette, \
+    downsample, get_point_budget
+from utils.dates import now
 from utils.strings import format_big_number
 
 
@@ -16,10 +17,11 @@ def render(
     filter_palette(ax, theme["line"])
 
     themed_line = 0
-    timestamps = get_timestamp_list([timestamp for line in lines for timestamp in line["x_values"]])
+    timestamps = [timestamp for line in lines for timestamp in line["x_values"]]
     timestamps.append(now().timestamp())
     max_timestamp = max(timestamps)
     line_count = len(lines)
+    point_budget = get_point_budget(fig)
 
     for i, line in enumerate(lines):
         username = line["username"]
@@ -28,20 +30,10 @@ def render(
 
         # Extending lines to the end of the graph
         y.append(y[-1])
-        x = get_timestamp_list(x)
+        x = list(x)
         x.append(max_timestamp)
 
-        # Downsampling
-        first_x, first_y = x[0], y[0]
-        last_x, last_y = x[-1], y[-1]
-        if len(x) > 10000:
-            x = x[::len(x) // 1000]
-            y = y[::len(y) // 1000]
-        x.insert(0, first_x)
-        x.append(last_x)
-        y.insert(0, first_y)
-        y.append(last_y)
-
+        x, y = downsample(x, y, point_budget)
         x, y = interpolate_segments(x, y)
         ax.plot(x, y, label=username, zorder=line_count - i)
 
@@ -29,7 +29,7 @@ def render(
     ax.set_ylabel("WPM")
     ax.set_title(title)
 
-    apply_theme(ax, theme, themed_line=themed_line)
+    apply_theme(ax, theme, themed_line=themed_line, legend_outside=True)
 
     file_name = generate_file_name("matchgraph")
     plt.savefig(file_name)
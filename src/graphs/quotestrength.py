@@ -6,7 +6,11 @@ from matplotlib.colors import LinearSegmentedColormap
 from graphs.core import plt, apply_theme, generate_file_name, GRAPH_PALETTE
 
 
-def render(users: List[Dict], theme: dict, heatmap_points: Optional[List[Tuple[float, float]]] = None) -> str:
+def render(
+    users: List[Dict],
+    theme: dict,
+    heatmap_points: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+) -> str:
     fig, ax = plt.subplots(figsize=(6, 6), constrained_layout=True)
 
     apply_theme(ax, theme=theme, legend_loc=None, force_legend=False)
@@ -30,20 +34,17 @@ def render(users: List[Dict], theme: dict, heatmap_points: Optional[List[Tuple[f
     ax.add_patch(inner)
 
     # Heatmap
-    if heatmap_points and len(heatmap_points) >= 2:
-        xs = np.array([p[0] for p in heatmap_points])
-        ys = np.array([p[1] for p in heatmap_points])
+    if heatmap_points is not None and len(heatmap_points[0]) >= 2:
+        xs, ys = heatmap_points
 
+        # The Gaussian kernel is separable, so the density is an outer product summed over points
         res = 300
-        xi = np.linspace(-1, 1, res)
-        yi = np.linspace(-1, 1, res)
-        Xi, Yi = np.meshgrid(xi, yi)
-
+        grid = np.linspace(-1, 1, res)
         hx = 0.5 * np.std(xs)
         hy = 0.5 * np.std(ys)
-        Zi = np.zeros((res, res))
-        for xi_pt, yi_pt in zip(xs, ys):
-            Zi += np.exp(-((Xi - xi_pt) ** 2 / (2 * hx ** 2) + (Yi - yi_pt) ** 2 / (2 * hy ** 2)))
+        kernel_x = np.exp(-(grid[None, :] - xs[:, None]) ** 2 / (2 * hx ** 2))
+        kernel_y = np.exp(-(grid[None, :] - ys[:, None]) ** 2 / (2 * hy ** 2))
+        Zi = kernel_y.T @ kernel_x
         Zi /= Zi.max()
         Zi = Zi ** 1.5
 
@@ -72,7 +72,7 @@ def render(
     ax.set_ylabel("WPM")
     ax.set_title(title)
 
-    apply_theme(ax, theme, themed_line=1)
+    apply_theme(ax, theme, themed_line=1, legend_outside=True)
 
     file_name = generate_file_name("race")
     plt.savefig(file_name)
@@ -8,8 +8,11 @@ from api.daily_quotes import get_daily_quote
 from api.users import get_profile, get_race
 from commands.daily.dailyleaderboard import display_daily_quote
 from config import DAILY_QUOTE_CHANNEL_ID, SITE_URL, TYPEGG_GUILD_ID, DAILY_QUOTE_ROLE_ID, SOURCE_DIR
+from database.bot import command_usage
 from database.bot.users import get_user
+from database.typegg import keystroke_data
 from database.typegg.daily_quotes import add_daily_quote, add_daily_results, get_missing_days, update_daily_quote_id
+from database.typegg.maintenance import MAINTENANCE_HOUR, INTEGRITY_CHECK_WEEKDAY, checkpoint, run_maintenance
 from graphs import daily as daily_graph
 from utils import dates
 from utils.colors import DEFAULT_THEME
@@ -49,15 +52,26 @@ class BackgroundTasks(commands.Cog):
         self.bot = bot
         self.tasks_loop.start()
         self.status_loop.start()
+        self.command_usage_loop.start()
 
     def cog_unload(self):
         self.tasks_loop.cancel()
+        self.command_usage_loop.cancel()
+        command_usage.flush()
 
     @tasks.loop(count=1)
     async def status_loop(self):
         await self.bot.wait_until_ready()
         await self.bot.change_presence(activity=get_status(dates.now()))
 
+    @tasks.loop(seconds=command_usage.FLUSH_INTERVAL)
+    async def command_usage_loop(self):
+        # Failed counts are kept for the next flush, so the loop is kept running instead of stopping on the error
+        try:
+            await command_usage.flush_async()
+        except Exception as e:
+            log_error("Command Usage Flush", e)
+
     @tasks.loop(minutes=1)
     async def tasks_loop(self):
         now = dates.now()
@@ -73,6 +87,15 @@ class BackgroundTasks(commands.Cog):
             await daily_quote_ping(self.bot)
             await import_daily_quotes()
 
+        elif now.hour == MAINTENANCE_HOUR and now.minute == 30:
+            await run_maintenance(check_integrity=now.weekday() == INTEGRITY_CHECK_WEEKDAY)
+
+        elif now.minute == 30:
+            await checkpoint("PASSIVE")
+
+        if keystroke_data.legacy_table:
+            await keystroke_data.move_legacy_keystroke_data()
+
     @tasks_loop.error
     async def tasks_loop_error(self, error):
         log_error("Tasks Loop", error)
@@ -92,7 +115,7 @@ async def daily_quote_results(bot: commands.Bot):
 
     for score in daily_quote["leaderboard"][:10]:
         race = await get_race(score["userId"], score["raceNumber"], get_keystrokes=True)
-        keystroke_data = get_keystroke_data(race["keystrokeData"])
+        keystroke_data = get_keystroke_data(race["keystrokeData"], race_id=race["raceId"])
         score["keystroke_wpm"] = keystroke_data.keystrokeWpm
         score_list.append(score)
 
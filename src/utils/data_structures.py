@@ -1,4 +1,7 @@
+import asyncio
 from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Hashable, Iterable
 
 
 class ScaledCounter(Counter):
@@ -12,3 +15,98 @@ class ScaledCounter(Counter):
         return ScaledCounter({key: value * factor for key, value in self.items()})
 
     __rmul__ = __mul__
+
+
+class DecayingTopSum:
+    """
+    Sum of the largest `limit` values, each weighted by decay ** rank (as in total pp).
+    Values are added and removed in O(log n), where the possible values are given up front.
+
+    Backed by a segment tree over the distinct values in descending order. Each node holds
+    its value count and its weighted sum as if its values were ranked from 0, so merging
+    two children is left_sum + decay ** left_count * right_sum.
+    """
+
+    def __init__(self, values: Iterable[float], limit: int, decay: float):
+        values = list(values)
+        self.keys = sorted(set(values), reverse=True)
+        self.positions = {key: i for i, key in enumerate(self.keys)}
+        self.limit = limit
+        self.count = 0
+
+        # decay ** n and the geometric sums of the first n weights, for up to every value present
+        self.powers = [1.0]
+        self.weight_sums = [0.0]
+        for _ in values:
+            self.weight_sums.append(self.weight_sums[-1] + self.powers[-1])
+            self.powers.append(self.powers[-1] * decay)
+
+        self.size = 1
+        while self.size < len(self.keys):
+            self.size *= 2
+        self.counts = [0] * (2 * self.size)
+        self.sums = [0.0] * (2 * self.size)
+
+    def __len__(self):
+        return self.count
+
+    def add(self, value: float):
+        self._update(value, 1)
+
+    def remove(self, value: float):
+        self._update(value, -1)
+
+    def _update(self, value: float, change: int):
+        position = self.positions[value]
+        node = self.size + position
+        self.counts[node] += change
+        self.sums[node] = value * self.weight_sums[self.counts[node]]
+        self.count += change
+
+        node //= 2
+        while node:
+            left, right = 2 * node, 2 * node + 1
+            self.counts[node] = self.counts[left] + self.counts[right]
+            self.sums[node] = self.sums[left] + self.powers[self.counts[left]] * self.sums[right]
+            node //= 2
+
+    @property
+    def total(self) -> float:
+        """The weighted sum of the largest `limit` values."""
+        remaining = self.limit
+        if self.counts[1] <= remaining:
+            return self.sums[1]
+
+        node = 1
+        total = 0.0
+        factor = 1.0
+        while node < self.size:
+            left = 2 * node
+            if self.counts[left] >= remaining:
+                node = left
+            else:
+                total += factor * self.sums[left]
+                factor *= self.powers[self.counts[left]]
+                remaining -= self.counts[left]
+                node = left + 1
+
+        return total + factor * self.keys[node - self.size] * self.weight_sums[remaining]
+
+
+class KeyedLocks:
+    """Asyncio locks by key, each dropped once no task holds or waits on it, so keys seen once don't pile up."""
+
+    def __init__(self):
+        self.locks: dict[Hashable, list] = {}  # Key -> [lock, tasks holding or waiting on it]
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable):
+        entry = self.locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self.locks[key]
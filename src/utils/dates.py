@@ -35,6 +35,20 @@ def epoch():
 
 # String & Date Conversion
 
+def to_epoch_ms(date: str | datetime) -> int:
+    """Convert an ISO 8601 string or datetime (UTC if naive) to integer milliseconds since the Unix epoch."""
+    if isinstance(date, str):
+        date = datetime.fromisoformat(date)
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return (date - epoch()) // timedelta(milliseconds=1)
+
+
+def from_epoch_ms(timestamp_ms: int) -> datetime:
+    """Convert milliseconds since the Unix epoch to a UTC datetime."""
+    return epoch() + timedelta(milliseconds=timestamp_ms)
+
+
 def normalize_datetime(date_string: str) -> str:
     """Normalize an RFC-3339 'T' separator to the space-separated form the bot stores and parses."""
     if date_string and len(date_string) > 10 and date_string[10] == "T":
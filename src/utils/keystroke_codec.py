@@ -1,10 +1,11 @@
 """Keystroke codec decoder for compact format."""
 
+import re
 from typing import Tuple
 
 from utils.keystrokes import (
-    KeystrokeData, Keystroke, KeystrokeInsert, KeystrokeDelete,
-    KeystrokeReplace, KeystrokeComposition
+    KeystrokeData, Keystroke, KeystrokeInsert, KeystrokeDelete, KeystrokeReplace,
+    KeystrokeArrays, INSERT, DELETE, REPLACE, COMPOSITION
 )
 
 
@@ -98,37 +99,71 @@ def read_key_until_delimiter(runes: str, i: int) -> Tuple[str, int]:
     return runes[start:i], i
 
 
+def decode_legacy_keystroke_data(raw: dict) -> KeystrokeData:
+    """Decode keystroke data stored in the legacy dictionary format."""
+    keystrokes = []
+    for ks in raw.get("keystrokes", []):
+        action = ks["action"]
+        if "i" in action:
+            action_obj = KeystrokeInsert(i=action["i"], key=action["key"])
+        elif "dStart" in action:
+            action_obj = KeystrokeDelete(dStart=action["dStart"], dEnd=action["dEnd"])
+        elif "rStart" in action:
+            action_obj = KeystrokeReplace(
+                rStart=action["rStart"],
+                rEnd=action["rEnd"],
+                key=action.get("key", ""),
+                redundant=action.get("redundant")
+            )
+        else:
+            continue
+        keystrokes.append(Keystroke(
+            action=action_obj,
+            time=ks["time"],
+            timeDelta=ks["timeDelta"]
+        ))
+    return KeystrokeData(
+        text=raw["text"],
+        keystrokes=keystrokes,
+        isStickyStart=raw.get("isStickyStart", False)
+    )
+
+
 def decode_keystroke_data(raw: str) -> KeystrokeData:
     """Decode keystroke data from JSON (compact or legacy format)."""
+    if isinstance(raw, dict):
+        return decode_legacy_keystroke_data(raw)
+
+    return decode_keystroke_arrays(raw).to_keystroke_data()
+
 
-    # Legacy format (dict with text and keystrokes)
+# Plain "<delta><modifier?>+<key>|" inserts and "<delta><modifier?><|" backspaces make up nearly all
+# keystrokes, so they are matched in one step. Everything else falls through to the full tokenizer.
+match_simple_token = re.compile(r"([0-9]+)(?:[LRSCV]?\+([^|]+|\|)|[XM]?(<))\|?").match
+match_ascii_digits = re.compile(r"[0-9]*").match
+
+
+def read_digits(runes: str, i: int, n: int) -> int:
+    """Returns the index after a run of digit characters starting at i."""
+    i = match_ascii_digits(runes, i).end()
+    while i < n and runes[i].isdigit():
+        i += 1
+    return i
+
+
+def find_delimiter(runes: str, delimiter: str, i: int, n: int) -> int:
+    """Returns the index of the next delimiter at or after i, or the end of the string."""
+    index = runes.find(delimiter, i)
+    return n if index < 0 else max(index, i)
+
+
+def decode_keystroke_arrays(raw: list | dict) -> KeystrokeArrays:
+    """
+    Decode keystroke data into parallel arrays in a single scan.
+    Matches decode_keystroke_data exactly, without allocating objects per keystroke.
+    """
     if isinstance(raw, dict):
-        keystrokes = []
-        for ks in raw.get("keystrokes", []):
-            action = ks["action"]
-            if "i" in action:
-                action_obj = KeystrokeInsert(i=action["i"], key=action["key"])
-            elif "dStart" in action:
-                action_obj = KeystrokeDelete(dStart=action["dStart"], dEnd=action["dEnd"])
-            elif "rStart" in action:
-                action_obj = KeystrokeReplace(
-                    rStart=action["rStart"],
-                    rEnd=action["rEnd"],
-                    key=action.get("key", ""),
-                    redundant=action.get("redundant")
-                )
-            else:
-                continue
-            keystrokes.append(Keystroke(
-                action=action_obj,
-                time=ks["time"],
-                timeDelta=ks["timeDelta"]
-            ))
-        return KeystrokeData(
-            text=raw["text"],
-            keystrokes=keystrokes,
-            isStickyStart=raw.get("isStickyStart", False)
-        )
+        return KeystrokeArrays.from_keystroke_data(decode_legacy_keystroke_data(raw))
 
     # Compact format [version, text, stickyStart, keystrokesStr]
     if not isinstance(raw, list) or len(raw) < 4:
@@ -140,197 +175,215 @@ def decode_keystroke_data(raw: str) -> KeystrokeData:
 
     text = raw[1].replace('\r\n', '\n')
     sticky_start = raw[2] != 0
-    keystrokes_str = raw[3]
-
-    if not keystrokes_str:
-        return KeystrokeData(text=text, keystrokes=[], isStickyStart=sticky_start)
-
-    keystrokes = []
+    runes = raw[3]
+
+    arrays = KeystrokeArrays(text=text, isStickyStart=sticky_start)
+    if not runes:
+        return arrays
+
+    actions = arrays.actions
+    times = arrays.times
+    time_deltas = arrays.timeDeltas
+    starts = arrays.starts
+    ends = arrays.ends
+    key_ids = arrays.keyIds
+    keys = arrays.keys
+    redundant = arrays.redundant
+    key_lookup = {"": 0}
+
+    text_length = len(text)
     cumulative_time = 0
-    expected_next_pos = 0
+    # Text typed since the last completed word. The next insert position is always its length.
     input_val = ""
     completed_chars = 0
 
     i = 0
-    runes = keystrokes_str
-
-    while i < len(runes):
-        # Read timeDelta
-        time_delta_str = ""
-        while i < len(runes) and runes[i].isdigit():
-            time_delta_str += runes[i]
-            i += 1
-
-        if i >= len(runes):
-            break
-
-        try:
-            time_delta = int(time_delta_str)
-        except ValueError:
-            while i < len(runes) and not runes[i].isdigit():
-                i += 1
-            continue
-
-        cumulative_time += time_delta
-
-        # Check for modifier prefix
-        modifier = ""
-        delete_modifier = ""
-        if i < len(runes) and i + 1 < len(runes):
-            potential_mod = runes[i]
-            next_char = runes[i + 1]
-            if potential_mod in ('L', 'R', 'S', 'C', 'V') and next_char in ('+', '>'):
-                modifier = potential_mod
-                i += 1
-            elif potential_mod in ('X', 'M') and next_char in ('<', '-', '='):
-                delete_modifier = potential_mod
-                i += 1
-
-        action_code = runes[i]
-        i += 1
-
-        action = None
-
-        if action_code == '^':
-            # Composition
-            key_builder = ""
-            while i < len(runes) and runes[i] != ':':
-                key_builder += runes[i]
-                i += 1
-            i += 1  # skip ':'
-
-            steps_str = ""
-            while i < len(runes) and runes[i] != ':':
-                steps_str += runes[i]
-                i += 1
-            i += 1  # skip ':'
-
-            times_str = ""
-            while i < len(runes) and runes[i] != '|':
-                times_str += runes[i]
-                i += 1
-
-            steps = steps_str.split(',') if steps_str else []
-            step_times = []
-            if times_str:
-                step_times = [0] + [int(t) for t in times_str.split(',') if t]
-            elif steps:
-                step_times = [0]
+    n = len(runes)
+
+    while i < n:
+        token = match_simple_token(runes, i)
+
+        if token:
+            time_delta = int(token[1])
+            cumulative_time += time_delta
+            i = token.end()
+            position = len(input_val)
+            key = token[2]
+
+            if key is not None:
+                action_code, start, end, is_redundant = INSERT, position, -1, None
+                input_val += key
+            elif position > 0:
+                action_code, start, end, key, is_redundant = DELETE, position - 1, position, "", None
+                input_val = input_val[:-1]
+            else:
+                action_code, start, end, key, is_redundant = DELETE, 0, 0, "", None
 
-            action = KeystrokeComposition(i=expected_next_pos, key=key_builder, steps=steps, stepTimes=step_times)
-            input_val = insert_at(input_val, expected_next_pos, key_builder)
+        else:
+            # Read timeDelta
+            digits_end = read_digits(runes, i, n)
+            time_delta_str = runes[i:digits_end]
+            i = digits_end
 
-        elif action_code == '+':
-            if i >= len(runes):
-                break
-            key, i = read_key_until_delimiter(runes, i)
-            action = KeystrokeInsert(i=expected_next_pos, key=key)
-            input_val = insert_at(input_val, expected_next_pos, key)
-
-        elif action_code == '>':
-            pos_str = ""
-            while i < len(runes) and runes[i] != ',':
-                pos_str += runes[i]
-                i += 1
-            i += 1  # skip ','
-            pos = int(pos_str)
-            if i >= len(runes):
+            if i >= n:
                 break
-            key, i = read_key_until_delimiter(runes, i)
-            action = KeystrokeInsert(i=pos, key=key)
-            input_val = insert_at(input_val, pos, key)
-
-        elif action_code == '<':
-            d_start = expected_next_pos - 1
-            if d_start < 0:
-                action = KeystrokeDelete(dStart=0, dEnd=0)
-            else:
-                action = KeystrokeDelete(dStart=d_start, dEnd=d_start + 1)
-                input_val = delete_range(input_val, d_start, d_start + 1)
 
-        elif action_code == '-':
-            start_str = ""
-            while i < len(runes) and runes[i].isdigit():
-                start_str += runes[i]
-                i += 1
-            d_start = int(start_str)
-
-            if i < len(runes) and runes[i] == ',':
-                i += 1
-                end_str = ""
-                while i < len(runes) and runes[i].isdigit():
-                    end_str += runes[i]
+            try:
+                time_delta = int(time_delta_str)
+            except ValueError:
+                while i < n and not runes[i].isdigit():
                     i += 1
-                d_end = int(end_str)
-            else:
-                d_end = expected_next_pos
+                continue
 
-            action = KeystrokeDelete(dStart=d_start, dEnd=d_end)
-            input_val = delete_range(input_val, d_start, d_end)
+            cumulative_time += time_delta
+            expected_next_pos = len(input_val)
 
-        elif action_code == '=':
-            start_str = ""
-            while i < len(runes) and runes[i].isdigit():
-                start_str += runes[i]
-                i += 1
-            i += 1  # skip ','
-            r_start = int(start_str)
-
-            # Check for full format
-            look_ahead = i
-            while look_ahead < len(runes) and runes[look_ahead].isdigit():
-                look_ahead += 1
-
-            if look_ahead > i and look_ahead < len(runes) and runes[look_ahead] == ',':
-                end_str = ""
-                while i < len(runes) and runes[i].isdigit():
-                    end_str += runes[i]
+            # Check for modifier prefix
+            if i + 1 < n:
+                potential_mod = runes[i]
+                next_char = runes[i + 1]
+                if potential_mod in ('L', 'R', 'S', 'C', 'V') and next_char in ('+', '>'):
+                    i += 1
+                elif potential_mod in ('X', 'M') and next_char in ('<', '-', '='):
                     i += 1
-                i += 1  # skip ','
-                if i >= len(runes):
+
+            action_code = runes[i]
+            i += 1
+            end = -1
+            key = ""
+            is_redundant = None
+
+            if action_code == '^':
+                # Composition
+                key_end = find_delimiter(runes, ':', i, n)
+                key = runes[i:key_end]
+                i = key_end + 1  # skip ':'
+
+                steps_end = find_delimiter(runes, ':', i, n)
+                steps_str = runes[i:steps_end]
+                i = steps_end + 1  # skip ':'
+
+                times_end = find_delimiter(runes, '|', i, n)
+                times_str = runes[i:times_end]
+                i = times_end
+
+                steps = steps_str.split(',') if steps_str else []
+                step_times = []
+                if times_str:
+                    step_times = [0] + [int(t) for t in times_str.split(',') if t]
+                elif steps:
+                    step_times = [0]
+
+                action_code, start = COMPOSITION, expected_next_pos
+                arrays.compositions[len(actions)] = (steps, step_times)
+                input_val = insert_at(input_val, expected_next_pos, key)
+
+            elif action_code == '+':
+                if i >= n:
                     break
                 key, i = read_key_until_delimiter(runes, i)
-                r_end = int(end_str)
-            else:
-                if i >= len(runes):
+                action_code, start = INSERT, expected_next_pos
+                input_val = insert_at(input_val, expected_next_pos, key)
+
+            elif action_code == '>':
+                pos_end = find_delimiter(runes, ',', i, n)
+                pos_str = runes[i:pos_end]
+                i = pos_end + 1  # skip ','
+                pos = int(pos_str)
+                if i >= n:
                     break
                 key, i = read_key_until_delimiter(runes, i)
-                r_end = expected_next_pos
-
-            action = KeystrokeReplace(rStart=r_start, rEnd=r_end, key=key)
-            input_val = replace_range(input_val, r_start, r_end, key)
+                action_code, start = INSERT, pos
+                input_val = insert_at(input_val, pos, key)
+
+            elif action_code == '<':
+                d_start = expected_next_pos - 1
+                if d_start < 0:
+                    action_code, start, end = DELETE, 0, 0
+                else:
+                    action_code, start, end = DELETE, d_start, d_start + 1
+                    input_val = delete_range(input_val, d_start, d_start + 1)
+
+            elif action_code == '-':
+                start_end = read_digits(runes, i, n)
+                d_start = int(runes[i:start_end])
+                i = start_end
+
+                if i < n and runes[i] == ',':
+                    i += 1
+                    end_end = read_digits(runes, i, n)
+                    d_end = int(runes[i:end_end])
+                    i = end_end
+                else:
+                    d_end = expected_next_pos
+
+                action_code, start, end = DELETE, d_start, d_end
+                input_val = delete_range(input_val, d_start, d_end)
+
+            elif action_code == '=':
+                start_end = read_digits(runes, i, n)
+                start_str = runes[i:start_end]
+                i = start_end + 1  # skip ','
+                r_start = int(start_str)
+
+                # Check for full format
+                look_ahead = read_digits(runes, i, n) if i < n else i
+
+                if look_ahead > i and look_ahead < n and runes[look_ahead] == ',':
+                    end_str = runes[i:look_ahead]
+                    i = look_ahead + 1  # skip ','
+                    if i >= n:
+                        break
+                    key, i = read_key_until_delimiter(runes, i)
+                    r_end = int(end_str)
+                else:
+                    if i >= n:
+                        break
+                    key, i = read_key_until_delimiter(runes, i)
+                    r_end = expected_next_pos
+
+                action_code, start, end = REPLACE, r_start, r_end
+                input_val = replace_range(input_val, r_start, r_end, key)
+
+            elif action_code == '~':
+                pos_start = i
+                if i < n and runes[i] == '-':
+                    i += 1
+                i = read_digits(runes, i, n)
+                r_start = int(runes[pos_start:i])
+                action_code, is_redundant = REPLACE, True
+                if r_start < 0:
+                    start, end = 0, 0
+                else:
+                    key = input_val[r_start] if r_start < len(input_val) else ""
+                    start, end = r_start, r_start + 1
 
-        elif action_code == '~':
-            pos_str = ""
-            if i < len(runes) and runes[i] == '-':
-                pos_str += '-'
-                i += 1
-            while i < len(runes) and runes[i].isdigit():
-                pos_str += runes[i]
-                i += 1
-            r_start = int(pos_str)
-            if r_start < 0:
-                action = KeystrokeReplace(rStart=0, rEnd=0, key="", redundant=True)
             else:
-                key = input_val[r_start] if r_start < len(input_val) else ""
-                action = KeystrokeReplace(rStart=r_start, rEnd=r_start + 1, key=key, redundant=True)
-
-        else:
-            continue
-
-        keystrokes.append(Keystroke(
-            action=action,
-            time=cumulative_time,
-            timeDelta=time_delta
-        ))
-
-        input_val, completed_chars = simulate_word_completion(input_val, text, completed_chars)
-        expected_next_pos = len(input_val)
+                continue
 
-        if i < len(runes) and runes[i] == '|':
-            i += 1
+            if i < n and runes[i] == '|':
+                i += 1
 
-    return KeystrokeData(text=text, keystrokes=keystrokes, isStickyStart=sticky_start)
+        key_id = key_lookup.get(key)
+        if key_id is None:
+            key_id = key_lookup[key] = len(keys)
+            keys.append(key)
+
+        actions.append(action_code)
+        times.append(cumulative_time)
+        time_deltas.append(time_delta)
+        starts.append(start)
+        ends.append(end)
+        key_ids.append(key_id)
+        redundant.append(is_redundant)
+
+        # A word can only complete once the input holds a word break
+        if completed_chars < text_length and input_val and (
+            ' ' in input_val or '\n' in input_val or '⏎' in input_val
+        ):
+            input_val, completed_chars = simulate_word_completion(input_val, text, completed_chars)
+
+    return arrays
 
 
 class KeystrokeCodecError(ValueError):
@@ -0,0 +1,105 @@
+import json
+import zlib
+from collections import Counter
+
+import numpy as np
+
+from utils.errors import InvalidKeystrokeData
+from utils.keystrokes import KeystrokeResult, get_keystroke_data, split_words, normalize_enter
+
+PAUSE_BUCKET_SIZE = 25  # ms
+PAUSE_BUCKET_COUNT = 80  # Times past the last bucket are counted in it
+
+
+class KeystrokeJob:
+    """
+    A map-reduce job over stored keystroke data, run with database.typegg.keystroke_jobs.run_job.
+    Each worker maps its races into a fresh accumulator, and the partial accumulators are merged in race order.
+    Jobs are pickled into worker processes, so they must be defined at module level.
+    Bump the version when a job's output changes, so checkpointed results are recomputed.
+    """
+    name: str = None
+    version: int = 1
+
+    def initial(self):
+        """Returns an empty accumulator."""
+        raise NotImplementedError
+
+    def map(self, accumulator, result: KeystrokeResult):
+        """Adds a processed race to an accumulator."""
+        raise NotImplementedError
+
+    def merge(self, accumulator, other):
+        """Merges another accumulator into the first, and returns it."""
+        raise NotImplementedError
+
+
+class CharacterTypos(KeystrokeJob):
+    """Counts how many times each character was typed, and how many typos were made on it."""
+    name = "character_typos"
+
+    def initial(self):
+        return {"typed": Counter(), "typos": Counter()}
+
+    def map(self, accumulator, result: KeystrokeResult):
+        accumulator["typed"].update(result.text)
+        if not len(result.typoTable):
+            return
+
+        words = split_words(result.text)
+        for word_index, typo_index in result.typoTable.tolist():
+            word = words[word_index]
+            if typo_index < len(word):
+                accumulator["typos"][normalize_enter(word[typo_index])] += 1
+
+    def merge(self, accumulator, other):
+        accumulator["typed"] += other["typed"]
+        accumulator["typos"] += other["typos"]
+        return accumulator
+
+
+class PauseDistribution(KeystrokeJob):
+    """Counts the time before each typed character, in buckets of PAUSE_BUCKET_SIZE."""
+    name = "pause_distribution"
+
+    def initial(self):
+        return np.zeros(PAUSE_BUCKET_COUNT, dtype=np.int64)
+
+    def map(self, accumulator, result: KeystrokeResult):
+        # The first character starts the race, so it has no pause before it
+        times = np.asarray(result.rawCharacterTimes[1:])
+        buckets = np.minimum(times // PAUSE_BUCKET_SIZE, PAUSE_BUCKET_COUNT - 1).astype(np.int64)
+        accumulator += np.bincount(buckets[buckets >= 0], minlength=PAUSE_BUCKET_COUNT)
+
+    def merge(self, accumulator, other):
+        return accumulator + other
+
+
+JOBS = {job.name: job for job in [CharacterTypos(), PauseDistribution()]}
+
+
+def decode_keystroke_data(keystroke_data, compressed: int):
+    """Decodes a stored keystroke data blob."""
+    if compressed:
+        keystroke_data = zlib.decompress(keystroke_data)
+    return json.loads(keystroke_data)
+
+
+def process_chunk(job: KeystrokeJob, rows: list[tuple]):
+    """
+    Decodes and maps a chunk of (raceId, keystrokeData, compressed) rows into a new accumulator.
+    Runs in a worker process. Returns the accumulator and the number of races that couldn't be processed.
+    """
+    accumulator = job.initial()
+    failed = 0
+
+    for _, keystroke_data, compressed in rows:
+        try:
+            result = get_keystroke_data(decode_keystroke_data(keystroke_data, compressed))
+        except (InvalidKeystrokeData, ValueError, zlib.error):
+            failed += 1
+            continue
+
+        job.map(accumulator, result)
+
+    return accumulator, failed
@@ -1,13 +1,19 @@
 """Keystroke processing for raw WPM calculation."""
 
+import sys
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import List, Dict, Set, Optional, Union
 
+import numpy as np
+
 from utils.errors import InvalidKeystrokeData
 
 ATTRIBUTION_WINDOW = 7
 FAT_FINGER_THRESHOLD_MS = 7
 TRANSPOSITION_THRESHOLD_MS = 7
+PROCESSOR_VERSION = 1  # Bump when processing output changes, so cached results are recomputed
+KEYSTROKE_CACHE_BYTES = 64 * 1024 * 1024
 
 
 @dataclass
@@ -55,6 +61,89 @@ class KeystrokeData:
     isStickyStart: bool = False
 
 
+# Action codes for KeystrokeArrays
+INSERT, DELETE, REPLACE, COMPOSITION = range(4)
+
+
+@dataclass
+class KeystrokeArrays:
+    """Decoded keystrokes as parallel arrays indexed by keystroke ID, without per-keystroke objects."""
+    text: str
+    isStickyStart: bool = False
+    actions: List[int] = field(default_factory=list)
+    times: List[int] = field(default_factory=list)
+    timeDeltas: List[int] = field(default_factory=list)
+    starts: List[int] = field(default_factory=list)  # i, dStart or rStart
+    ends: List[int] = field(default_factory=list)  # dEnd or rEnd, -1 for inserts and compositions
+    keyIds: List[int] = field(default_factory=list)  # Index into keys, 0 for deletes
+    keys: List[str] = field(default_factory=lambda: [""])
+    redundant: List[Optional[bool]] = field(default_factory=list)
+    compositions: Dict[int, tuple[List[str], List[int]]] = field(default_factory=dict)  # ID -> (steps, stepTimes)
+
+    def __len__(self):
+        return len(self.actions)
+
+    def to_keystroke_data(self) -> KeystrokeData:
+        """Build the equivalent object representation."""
+        keys = self.keys
+        keystrokes = []
+
+        for ks_id, action_code in enumerate(self.actions):
+            start = self.starts[ks_id]
+            key = keys[self.keyIds[ks_id]]
+
+            if action_code == INSERT:
+                action = KeystrokeInsert(i=start, key=key)
+            elif action_code == DELETE:
+                action = KeystrokeDelete(dStart=start, dEnd=self.ends[ks_id])
+            elif action_code == REPLACE:
+                action = KeystrokeReplace(rStart=start, rEnd=self.ends[ks_id], key=key, redundant=self.redundant[ks_id])
+            else:
+                steps, step_times = self.compositions[ks_id]
+                action = KeystrokeComposition(i=start, key=key, steps=steps, stepTimes=step_times)
+
+            keystrokes.append(Keystroke(action=action, time=self.times[ks_id], timeDelta=self.timeDeltas[ks_id]))
+
+        return KeystrokeData(text=self.text, keystrokes=keystrokes, isStickyStart=self.isStickyStart)
+
+    @classmethod
+    def from_keystroke_data(cls, keystroke_data: KeystrokeData) -> "KeystrokeArrays":
+        arrays = cls(text=keystroke_data.text, isStickyStart=keystroke_data.isStickyStart)
+        key_ids = {"": 0}
+
+        for ks_id, keystroke in enumerate(keystroke_data.keystrokes):
+            action = keystroke.action
+            end = -1
+            key = ""
+            redundant = None
+
+            if isinstance(action, KeystrokeInsert):
+                action_code, start, key = INSERT, action.i, action.key
+            elif isinstance(action, KeystrokeDelete):
+                action_code, start, end = DELETE, action.dStart, action.dEnd
+            elif isinstance(action, KeystrokeReplace):
+                action_code, start, end, key = REPLACE, action.rStart, action.rEnd, action.key
+                redundant = action.redundant
+            else:
+                action_code, start, key = COMPOSITION, action.i, action.key
+                arrays.compositions[ks_id] = (action.steps, action.stepTimes)
+
+            key_id = key_ids.get(key)
+            if key_id is None:
+                key_id = key_ids[key] = len(arrays.keys)
+                arrays.keys.append(key)
+
+            arrays.actions.append(action_code)
+            arrays.times.append(keystroke.time)
+            arrays.timeDeltas.append(keystroke.timeDelta)
+            arrays.starts.append(start)
+            arrays.ends.append(end)
+            arrays.keyIds.append(key_id)
+            arrays.redundant.append(redundant)
+
+        return arrays
+
+
 @dataclass
 class KeystrokeTiming:
     ks_id: int
@@ -103,6 +192,28 @@ class ProcessResult:
     accuracy: float = 0.0
 
 
+@dataclass(slots=True)
+class KeystrokeResult:
+    """Array-backed equivalent of ProcessResult, produced by process_keystroke_arrays."""
+    text: str
+    rawCharacterTimes: np.ndarray
+    wpmCharacterTimes: np.ndarray
+    keystrokeWpm: np.ndarray
+    keystrokeRawWpm: np.ndarray
+    typoTable: np.ndarray  # Rows of (word_index, typo_index)
+    raw_wpm: float = 0.0
+    wpm: float = 0.0
+    accuracy: float = 0.0
+
+    @property
+    def typos(self) -> List[Typo]:
+        words = split_words(self.text)
+        return [
+            Typo(word_index=word_index, typo_index=typo_index, word=words[word_index].rstrip())
+            for word_index, typo_index in self.typoTable.tolist()
+        ]
+
+
 def normalize_enter(char: str) -> str:
     if char in ('⏎', '\r\n', '\r'):
         return '\n'
@@ -800,16 +911,600 @@ def process_keystroke_data(
     )
 
 
+def calculate_wpm_array(chars: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """Vectorized calculate_wpm."""
+    wpm = np.zeros(len(times))
+    positive = times > 0
+    wpm[positive] = (chars[positive] / 5) * (60000 / times[positive])
+    return wpm
+
+
+def process_keystroke_arrays(
+    arrays: KeystrokeArrays,
+    is_multiplayer: bool = False,
+    reaction_time: float = 0
+) -> KeystrokeResult:
+    """
+    Array-backed equivalent of process_keystroke_data, producing identical numbers.
+    Attribution state is kept in lists and tuples indexed by keystroke ID, and the
+    WPM curves are computed with cumulative sums once every word is complete.
+    """
+    if not arrays.text:
+        raise InvalidKeystrokeData
+
+    text = arrays.text.replace('\r\n', '\n')
+    words = split_words(text)
+    text_length = len(text)
+    word_count = len(words)
+
+    actions = arrays.actions
+    times = arrays.times
+    time_deltas = arrays.timeDeltas
+    starts = arrays.starts
+    ends = arrays.ends
+    key_ids = arrays.keyIds
+    keys = arrays.keys
+    redundant = arrays.redundant
+    compositions = arrays.compositions
+    keystroke_count = len(actions)
+
+    # Normalized lowercase characters, computed once instead of per comparison
+    text_chars = [normalize_enter(c).lower() for c in text]
+    normalized_keys = [normalize_enter(key).lower() for key in keys]
+    first_positions = {}
+    for i, c in enumerate(text):
+        first_positions.setdefault(normalize_enter(c), i)
+    key_first_positions = [first_positions.get(normalize_enter(key), -1) for key in keys]
+
+    raw_character_times: List[float] = []
+    wpm_character_times: List[float] = []
+    curve_start = 0
+
+    input_val = ""
+    word_index = 0
+    total_chars_before_word = 0
+    first_char_ime_adjustment = 0.0
+
+    char_pool: Dict[str, List[tuple[int, int]]] = {}  # char -> (ks_id, typed_at_pos)
+    char_pool_starts: Dict[str, int] = {}  # char -> index of the first entry that may be unused
+    position_keystrokes: Dict[int, List[tuple[int, int]]] = {}  # position -> (ks_id, time_delta)
+    post_correction_positions: Set[int] = set()
+    fat_finger_times: Dict[int, int] = {}
+
+    correct_chars = 0
+    penalties = 0
+    corrective = 0
+    destructive = 0
+
+    typo_rows: List[tuple[int, int]] = []
+    typo_flag = False
+
+    prev_was_insert = False
+    prev_insert_ks_id = -1
+    prev_insert_key_id = 0
+    prev_insert_pos = -1
+    tracking_sequence_pos = -1
+
+    used_raw_ids = bytearray(keystroke_count)
+    used_actual_ids = bytearray(keystroke_count)
+
+    input_val_contributors: List[int] = []
+    input_val_delays: List[List[int]] = []
+    pending_delays: List[int] = []
+
+    current_word = words[0] if word_count else ""
+
+    for keystroke_id in range(keystroke_count):
+        # Safety check: detect corrupt data where word never completes and buffer grows unbounded
+        if len(input_val_contributors) > 500:
+            raise InvalidKeystrokeData
+
+        action = actions[keystroke_id]
+        time_delta = time_deltas[keystroke_id]
+
+        if action == INSERT:
+            i = max(0, min(starts[keystroke_id], len(input_val)))
+            key_id = key_ids[keystroke_id]
+            typed_char = keys[key_id]
+            normalized_typed = normalized_keys[key_id]
+            absolute_pos = total_chars_before_word + i
+
+            # Fat-finger: wrong char immediately followed by correct char for PREV position
+            if prev_was_insert and time_delta <= FAT_FINGER_THRESHOLD_MS and 0 <= prev_insert_pos < text_length:
+                expected_prev = text_chars[prev_insert_pos]
+                if normalized_keys[prev_insert_key_id] != expected_prev and normalized_typed == expected_prev:
+                    char_pool.setdefault(expected_prev, []).append((keystroke_id, prev_insert_pos))
+                    prev_time_delta = fat_finger_times.get(prev_insert_ks_id, time_deltas[prev_insert_ks_id])
+                    fat_finger_times[keystroke_id] = prev_time_delta + time_delta
+
+            input_val = input_val[:i] + typed_char + input_val[i:]
+
+            if i >= len(input_val_contributors):
+                input_val_contributors.append(keystroke_id)
+                input_val_delays.append(pending_delays)
+            else:
+                existing_delays = input_val_delays[i] if i < len(input_val_delays) else []
+                input_val_contributors.insert(i, keystroke_id)
+                input_val_delays.insert(i, pending_delays + existing_delays)
+            pending_delays = []
+
+            position_keystrokes.setdefault(absolute_pos, []).append((keystroke_id, time_delta))
+
+            # Tracking sequence logic for char_pool
+            if typed_char:
+                if 0 <= absolute_pos < text_length and normalized_typed == text_chars[absolute_pos]:
+                    char_pool.setdefault(normalized_typed, []).append((keystroke_id, absolute_pos))
+                    tracking_sequence_pos = absolute_pos + 1
+                elif 0 <= tracking_sequence_pos < text_length and normalized_typed == text_chars[tracking_sequence_pos]:
+                    char_pool.setdefault(normalized_typed, []).append((keystroke_id, tracking_sequence_pos))
+                    tracking_sequence_pos += 1
+                else:
+                    match_pos = key_first_positions[key_id]
+                    tracking_sequence_pos = match_pos + 1 if match_pos >= 0 else -1
+
+            prev_was_insert = True
+            prev_insert_ks_id = keystroke_id
+            prev_insert_key_id = key_id
+            prev_insert_pos = absolute_pos
+
+        elif action == REPLACE:
+            r_start = max(0, min(starts[keystroke_id], len(input_val)))
+            r_end = max(0, min(ends[keystroke_id], len(input_val)))
+            key_id = key_ids[keystroke_id]
+            typed_char = keys[key_id]
+            absolute_pos = total_chars_before_word + r_start
+
+            if redundant[keystroke_id]:
+                # Redundant replace: add keystroke to delays BEFORE buffer update
+                if r_start < len(input_val_delays):
+                    input_val_delays[r_start].append(keystroke_id)
+                else:
+                    pending_delays.append(keystroke_id)
+                destructive += 1
+            else:
+                # Non-redundant: count corrective/destructive for deletion part
+                for del_pos in range(r_start, r_end):
+                    if del_pos < len(current_word) and input_val[del_pos] == current_word[del_pos]:
+                        destructive += 1
+                    else:
+                        corrective += 1
+                # Count for insertion part
+                if r_start < len(current_word) and typed_char == current_word[r_start]:
+                    corrective += 1
+                else:
+                    destructive += 1
+
+                preserved_ids: List[int] = []
+                for j in range(r_start, min(r_end, len(input_val_contributors))):
+                    if input_val_contributors[j] >= 0:
+                        preserved_ids.append(input_val_contributors[j])
+                    preserved_ids.extend(input_val_delays[j])
+
+                del input_val_contributors[r_start:r_end]
+                del input_val_delays[r_start:r_end]
+
+                while len(input_val_contributors) <= r_start:
+                    input_val_contributors.append(-1)
+                    input_val_delays.append([])
+                input_val_contributors[r_start:r_end] = [keystroke_id]
+                input_val_delays[r_start:r_end] = [preserved_ids + pending_delays]
+                pending_delays = []
+
+            if r_start <= r_end:
+                input_val = input_val[:r_start] + typed_char + input_val[r_end:]
+
+            if r_start <= r_end and typed_char:
+                position_keystrokes.setdefault(absolute_pos, []).append((keystroke_id, time_delta))
+
+                if 0 <= absolute_pos < text_length:
+                    post_correction_positions.add(absolute_pos)
+
+                normalized_typed = normalized_keys[key_id]
+
+                if prev_was_insert and time_delta <= FAT_FINGER_THRESHOLD_MS and 0 <= prev_insert_pos < text_length:
+                    expected_prev = text_chars[prev_insert_pos]
+                    if normalized_keys[prev_insert_key_id] != expected_prev and normalized_typed == expected_prev:
+                        char_pool.setdefault(expected_prev, []).append((keystroke_id, prev_insert_pos))
+                        prev_time_delta = fat_finger_times.get(prev_insert_ks_id, time_deltas[prev_insert_ks_id])
+                        fat_finger_times[keystroke_id] = prev_time_delta + time_delta
+
+                if 0 <= absolute_pos < text_length and normalized_typed == text_chars[absolute_pos]:
+                    char_pool.setdefault(normalized_typed, []).append((keystroke_id, absolute_pos))
+                    tracking_sequence_pos = absolute_pos + 1
+                elif 0 <= tracking_sequence_pos < text_length and normalized_typed == text_chars[tracking_sequence_pos]:
+                    char_pool.setdefault(normalized_typed, []).append((keystroke_id, tracking_sequence_pos))
+                    tracking_sequence_pos += 1
+                else:
+                    match_pos = key_first_positions[key_id]
+                    tracking_sequence_pos = match_pos + 1 if match_pos >= 0 else -1
+
+                prev_was_insert = True
+                prev_insert_ks_id = keystroke_id
+                prev_insert_key_id = key_id
+                prev_insert_pos = absolute_pos
+            else:
+                prev_was_insert = False
+
+        elif action == DELETE:
+            d_start = max(0, min(starts[keystroke_id], len(input_val)))
+            d_end = max(0, min(ends[keystroke_id], len(input_val)))
+
+            if d_start > d_end:
+                d_start, d_end = d_end, d_start
+
+            for del_pos in range(d_start, d_end):
+                if del_pos < len(current_word) and input_val[del_pos] == current_word[del_pos]:
+                    destructive += 1
+                else:
+                    corrective += 1
+
+            input_val = input_val[:d_start] + input_val[d_end:]
+
+            preserved_ids: List[int] = []
+            for j in range(d_start, min(d_end, len(input_val_contributors))):
+                if input_val_contributors[j] >= 0:
+                    preserved_ids.append(input_val_contributors[j])
+                preserved_ids.extend(input_val_delays[j])
+
+            del input_val_contributors[d_start:d_end]
+            del input_val_delays[d_start:d_end]
+
+            if d_start < len(input_val_delays):
+                input_val_delays[d_start].append(keystroke_id)
+                input_val_delays[d_start].extend(preserved_ids)
+            else:
+                pending_delays.append(keystroke_id)
+                pending_delays.extend(preserved_ids)
+
+            tail_pos = total_chars_before_word + d_start
+            if 0 <= tail_pos < text_length:
+                post_correction_positions.add(tail_pos)
+
+            tracking_sequence_pos = -1
+            prev_was_insert = False
+
+        else:
+            typed_chars = keys[key_ids[keystroke_id]]
+            insert_pos = max(0, min(starts[keystroke_id], len(input_val)))
+            absolute_pos = total_chars_before_word + insert_pos
+
+            input_val = input_val[:insert_pos] + typed_chars + input_val[insert_pos:]
+
+            for idx, char in enumerate(typed_chars):
+                pos = absolute_pos + idx
+                char_pool.setdefault(normalize_enter(char).lower(), []).append((keystroke_id, pos))
+                position_keystrokes.setdefault(pos, []).append((keystroke_id, time_delta if idx == 0 else 0))
+
+                adj_i = insert_pos + idx
+                while len(input_val_contributors) <= adj_i:
+                    input_val_contributors.append(-1)
+                    input_val_delays.append([])
+                if idx == 0:
+                    input_val_contributors.insert(adj_i, keystroke_id)
+                    input_val_delays.insert(adj_i, pending_delays)
+                    pending_delays = []
+                else:
+                    input_val_contributors.insert(adj_i, -1)
+                    input_val_delays.insert(adj_i, [])
+
+            prev_was_insert = False
+
+        # Accuracy calc
+        has_typo = False
+        if current_word:
+            compare_len = min(len(input_val), len(current_word))
+            has_typo = input_val[:compare_len] != current_word[:compare_len]
+
+        if action != DELETE:
+            if has_typo:
+                penalties += 1
+            else:
+                correct_chars += 1
+
+        # Typo tracking: record when transitioning from correct to incorrect state on insert-type actions
+        if has_typo and not typo_flag and (action != DELETE and not (action == REPLACE and redundant[keystroke_id])):
+            typo_flag = True
+            typo_rows.append((word_index, total_chars_before_word + len(input_val) - 1))
+        elif not has_typo and typo_flag:
+            typo_flag = False
+
+        # Word completion
+        while (current_word and
+               len(input_val) >= len(current_word) and
+               input_val[:len(current_word)] == current_word and
+               word_index < word_count):
+
+            word_length = len(current_word)
+            attribution: List[int] = [-1] * word_length
+            raw_times: List[float] = [0.0] * word_length
+
+            for i in range(word_length):
+                absolute_pos = total_chars_before_word + i
+                expected_char = normalize_enter(current_word[i]).lower()
+
+                # Post-correction: use min time from keystrokes that typed the expected char
+                if absolute_pos in post_correction_positions:
+                    min_time = float('inf')
+                    min_ks_id = -1
+
+                    for ks_id, ks_time_delta in position_keystrokes.get(absolute_pos, ()):
+                        if used_raw_ids[ks_id] or ks_id in fat_finger_times:
+                            continue
+                        if normalized_keys[key_ids[ks_id]] == expected_char and ks_time_delta < min_time:
+                            min_time = ks_time_delta
+                            min_ks_id = ks_id
+
+                    if min_ks_id >= 0:
+                        used_raw_ids[min_ks_id] = 1
+                        attribution[i] = min_ks_id
+                        raw_times[i] = min_time
+                        continue
+
+                # Check for inversions (transpositions)
+                keystrokes_at_pos = position_keystrokes.get(absolute_pos)
+                if keystrokes_at_pos:
+                    prev_expected = text_chars[absolute_pos - 1] if 0 < absolute_pos <= text_length else ""
+                    next_expected = text_chars[absolute_pos + 1] if absolute_pos + 1 < text_length else ""
+
+                    min_time = float('inf')
+                    min_ks_id = -1
+
+                    for ks_id, ks_time_delta in keystrokes_at_pos:
+                        if used_raw_ids[ks_id] or ks_id in fat_finger_times:
+                            continue
+
+                        typed_normalized = normalized_keys[key_ids[ks_id]]
+                        is_valid = (typed_normalized == expected_char or
+                                    typed_normalized == prev_expected or
+                                    typed_normalized == next_expected)
+
+                        if is_valid and ks_time_delta < min_time:
+                            min_time = ks_time_delta
+                            min_ks_id = ks_id
+
+                    if min_ks_id >= 0:
+                        used_raw_ids[min_ks_id] = 1
+                        attribution[i] = min_ks_id
+                        raw_times[i] = min_time
+                        continue
+
+                # Char pool (left-to-right attribution), skipping the prefix of used entries
+                pool = char_pool.get(expected_char)
+                found_in_pool = False
+
+                if pool:
+                    pool_index = char_pool_starts.get(expected_char, 0)
+                    while pool_index < len(pool) and used_raw_ids[pool[pool_index][0]]:
+                        pool_index += 1
+                    char_pool_starts[expected_char] = pool_index
+
+                    for ks_id, typed_at_pos in pool[pool_index:]:
+                        if not used_raw_ids[ks_id] and abs(typed_at_pos - absolute_pos) <= ATTRIBUTION_WINDOW:
+                            used_raw_ids[ks_id] = 1
+                            attribution[i] = ks_id
+                            raw_times[i] = fat_finger_times.get(ks_id, time_deltas[ks_id])
+                            found_in_pool = True
+                            break
+
+                if not found_in_pool:
+                    contributor_id = input_val_contributors[i] if i < len(input_val_contributors) else -1
+                    if contributor_id >= 0 and not used_raw_ids[contributor_id]:
+                        used_raw_ids[contributor_id] = 1
+                        attribution[i] = contributor_id
+                        raw_times[i] = time_deltas[contributor_id]
+
+            # Transposition time combining
+            for i in range(word_length - 1, 0, -1):
+                ks_prev = attribution[i - 1]
+                ks_curr = attribution[i]
+
+                if ks_prev >= 0 and ks_curr >= 0 and ks_prev > ks_curr:
+                    if times[ks_prev] - times[ks_curr] <= TRANSPOSITION_THRESHOLD_MS:
+                        raw_times[i - 1] += raw_times[i]
+                        raw_times[i] = 0
+
+            # Actual WPM: contributor + delays
+            actual_times_for_word: List[float] = []
+            for i in range(word_length):
+                contributor_id = input_val_contributors[i] if i < len(input_val_contributors) else -1
+
+                actual_time = 0.0
+                if contributor_id >= 0 and not used_actual_ids[contributor_id]:
+                    used_actual_ids[contributor_id] = 1
+                    actual_time += time_deltas[contributor_id]
+
+                    # For the first character in solo mode with IME, subtract the first step time
+                    if not wpm_character_times and i == 0 and not is_multiplayer and actual_time > 0:
+                        if actions[contributor_id] == COMPOSITION:
+                            step_times = compositions[contributor_id][1]
+                            if len(step_times) > 1:
+                                actual_time -= step_times[1]
+                                first_char_ime_adjustment = step_times[1]
+
+                if i < len(input_val_delays):
+                    for delay_id in input_val_delays[i]:
+                        if not used_actual_ids[delay_id]:
+                            used_actual_ids[delay_id] = 1
+                            actual_time += time_deltas[delay_id]
+
+                actual_times_for_word.append(actual_time)
+
+            if not wpm_character_times and not is_multiplayer and actual_times_for_word[0] == 0.0:
+                curve_start = 1  # Solo with non-IME: skip first char
+
+            raw_character_times.extend(raw_times)
+            wpm_character_times.extend(actual_times_for_word)
+
+            input_val = input_val[word_length:]
+            input_val_contributors = input_val_contributors[word_length:]
+            input_val_delays = input_val_delays[word_length:]
+
+            total_chars_before_word += word_length
+            word_index += 1
+            tracking_sequence_pos = -1
+            current_word = words[word_index] if word_index < word_count else ""
+
+    if not (len(wpm_character_times) == len(raw_character_times) == text_length):
+        raise InvalidKeystrokeData
+
+    wpm_times = np.array(wpm_character_times, dtype=np.float64)
+    raw_times = np.array(raw_character_times, dtype=np.float64)
+
+    # Running totals from the first counted character, matching the per-character accumulation
+    wpm_totals = np.cumsum(wpm_times[curve_start:])
+    raw_totals = np.cumsum(raw_times[curve_start:])
+    chars = np.arange(curve_start, text_length) + (1 if is_multiplayer else 0)
+
+    if is_multiplayer and reaction_time > 0:
+        keystroke_wpm = calculate_wpm_array(chars, wpm_totals + reaction_time)
+        keystroke_raw_wpm = calculate_wpm_array(chars, raw_totals + reaction_time)
+    else:
+        keystroke_wpm = calculate_wpm_array(chars, wpm_totals)
+        keystroke_raw_wpm = calculate_wpm_array(chars, raw_totals)
+
+    # Attribute any keystrokes left in the buffer (e.g. a cascaded trailing space) to the last character
+    if len(keystroke_wpm):
+        additional_time = 0.0
+
+        for contributor_id in input_val_contributors:
+            if contributor_id >= 0 and not used_actual_ids[contributor_id]:
+                used_actual_ids[contributor_id] = 1
+                additional_time += time_deltas[contributor_id]
+
+        for delay_ids in input_val_delays + [pending_delays]:
+            for delay_id in delay_ids:
+                if not used_actual_ids[delay_id]:
+                    used_actual_ids[delay_id] = 1
+                    additional_time += time_deltas[delay_id]
+
+        if additional_time > 0:
+            wpm_times[-1] += additional_time
+            keystroke_wpm[-1] = calculate_wpm(text_length - 1, float(wpm_totals[-1]) + additional_time)
+
+    text_length = len(text) - 1
+    total_raw_time = float(raw_totals[-1]) if len(raw_totals) else 0.0
+
+    last_timestamp = times[-1] if keystroke_count else 0
+
+    total_time_for_wpm = last_timestamp
+    if not is_multiplayer:
+        total_time_for_wpm -= first_char_ime_adjustment
+
+    raw_wpm = calculate_wpm(text_length, total_raw_time) if total_raw_time > 0 else 0.0
+    wpm = calculate_wpm(text_length, total_time_for_wpm) if total_time_for_wpm > 0 else 0.0
+
+    denominator = correct_chars + corrective + penalties + destructive
+    accuracy = 100.0 * (correct_chars + corrective) / denominator if denominator > 0 else 0.0
+
+    return KeystrokeResult(
+        text=text,
+        rawCharacterTimes=raw_times,
+        wpmCharacterTimes=wpm_times,
+        keystrokeWpm=keystroke_wpm,
+        keystrokeRawWpm=keystroke_raw_wpm,
+        typoTable=np.array(typo_rows, dtype=np.int32).reshape(-1, 2),
+        raw_wpm=raw_wpm,
+        wpm=wpm,
+        accuracy=accuracy,
+    )
+
+
+def estimate_result_size(result: KeystrokeResult) -> int:
+    """Returns the approximate memory used by a processed result, in bytes."""
+    arrays = [
+        result.rawCharacterTimes, result.wpmCharacterTimes,
+        result.keystrokeWpm, result.keystrokeRawWpm, result.typoTable,
+    ]
+    return sys.getsizeof(result) + sys.getsizeof(result.text) + sum(a.nbytes + 112 for a in arrays)
+
+
+class KeystrokeCache:
+    """Least recently used cache of processed keystroke data, bounded by estimated size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[tuple, tuple[KeystrokeResult, int]] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple) -> Optional[KeystrokeResult]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+
+        return entry[0]
+
+    def add(self, key: tuple, result: KeystrokeResult):
+        # Results are shared between callers, so their arrays are made read-only
+        for array in (
+            result.rawCharacterTimes, result.wpmCharacterTimes,
+            result.keystrokeWpm, result.keystrokeRawWpm, result.typoTable,
+        ):
+            array.flags.writeable = False
+
+        size = estimate_result_size(result)
+        if size > self.max_bytes:
+            return
+
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[1]
+
+        self.entries[key] = (result, size)
+        self.size += size
+
+        while self.size > self.max_bytes:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+keystroke_cache = KeystrokeCache(KEYSTROKE_CACHE_BYTES)
+
+
 def get_keystroke_data(
     keystroke_data: list,
     is_multiplayer: bool = False,
     start_time: float = 0,
-) -> ProcessResult:
-    """Decode and process raw keystroke data into WPM metrics, timing data, and typos."""
-    from utils.keystroke_codec import decode_keystroke_data
+    race_id: Optional[str] = None,
+) -> KeystrokeResult:
+    """
+    Decode and process raw keystroke data into WPM metrics, timing data, and typos.
+    Passing the race ID caches the result, which is shared between callers and must not be modified.
+    """
+    from utils.keystroke_codec import decode_keystroke_arrays
+
+    if race_id is not None:
+        key = (race_id, PROCESSOR_VERSION, is_multiplayer, start_time)
+        if (cached := keystroke_cache.get(key)) is not None:
+            return cached
 
-    decoded_data = decode_keystroke_data(keystroke_data)
-    processed_data = process_keystroke_data(decoded_data, is_multiplayer, start_time)
+    decoded_data = decode_keystroke_arrays(keystroke_data)
+    processed_data = process_keystroke_arrays(decoded_data, is_multiplayer, start_time)
+
+    if race_id is not None:
+        keystroke_cache.add(key, processed_data)
 
     return processed_data
 
@@ -819,16 +1514,17 @@ def get_keystroke_wpm(delays: list[int], adjusted: bool = True):
     Returns a list of WPM over keystrokes given a list of ms delays.
     adjusted = True will always eliminate the first delay.
     """
+    delays = np.asarray(delays, dtype=float)
     keystroke_wpm = []
-    duration = 0
 
     if delays[0] == 0 or adjusted:
         delays = delays[1:]
         keystroke_wpm = [float("inf")]
 
-    for i, delay in enumerate(delays):
-        duration += delay
-        wpm = 12000 * (i + 1) / duration if duration else float("inf")
-        keystroke_wpm.append(wpm)
+    durations = np.cumsum(delays)
+    chars = np.arange(1, len(delays) + 1)
+
+    with np.errstate(divide="ignore"):
+        wpm = np.where(durations != 0, 12000 * chars / durations, float("inf"))
 
-    return keystroke_wpm
+    return keystroke_wpm + wpm.tolist()
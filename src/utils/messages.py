@@ -1,7 +1,7 @@
 import asyncio
 import os
 from dataclasses import dataclass, field
-from typing import Callable
+from typing import Callable, Awaitable
 
 from discord import Embed, ButtonStyle, File
 from discord.ui import View, Button as DiscordButton
@@ -14,6 +14,8 @@ from utils.colors import SUCCESS, WARNING
 from utils.strings import get_flag_title
 from utils.urls import profile_url
 
+MAX_PREFETCHES = 2  # Pages a message loads in the background at once, renders are left until a page is shown
+
 welcome_message = (
     f"### Hi there, I'm Eggert!\n"
     f"Run `{BOT_PREFIX}link` and follow the steps to start using commands.\n"
@@ -51,6 +53,8 @@ class Page:
         render (Callable): Function to render an image/file for the page.
         default (bool): Whether this is the default page to show initially.
         flag_title (bool): Whether this page should include flags in the title.
+        load (Callable): Async function returning the Page shown in place of this one,
+            called the first time the page is shown or prefetched.
     """
     title: str = None
     description: str = ""
@@ -62,6 +66,7 @@ class Page:
     render: Callable = None
     default: bool = False
     flag_title: bool = False
+    load: Callable[[], Awaitable["Page"]] = None
 
 
 class Message(View):
@@ -126,47 +131,20 @@ class Message(View):
         self.thumbnail = thumbnail
         self.jump_page = jump_page
 
-        self.embeds = []
-        self.cache = {}
+        self.embeds = {}  # Page index -> embed, built the first time a page is shown
+        self.cache = {}  # Page index -> rendered file name
+        self.tasks = {}  # Page index -> task loading and rendering the page
+        self.prefetch_limit = asyncio.Semaphore(MAX_PREFETCHES)
         self.paginated = any(not page.button_name for page in self.pages)
 
         # self.build_embeds()
 
     def build_embeds(self):
-        """Assembles the embed(s) for the message."""
+        """Sets the initial page and adds the message's buttons. Embeds are built as their pages are shown."""
         for i, page in enumerate(self.pages):
-            title = page.title if page.title else self.title
-            if page.flag_title:
-                title += get_flag_title(self.ctx.flags)
-            description = self.header + "\n" + page.description
-            footer = page.footer if page.footer else self.footer
             if page.default:
                 self.page_index = i
-            embed = Embed(
-                title=title,
-                description=description,
-                url=self.url,
-                color=page.color if page.color else self.color,
-            )
-            if page.fields:
-                for field in page.fields:
-                    embed.add_field(name=field.title, value=field.content, inline=field.inline)
-            if page.image_url:
-                embed.set_image(url=page.image_url)
-            if footer:
-                self.update_footer(embed, footer)
-            if self.footer_icon:
-                embed.set_footer(text=embed.footer.text, icon_url=self.footer_icon)
-            if self.profile:
-                self.add_profile(embed)
-            if self.paginated and self.page_count > 1:
-                self.update_footer(embed, f"Page {i + 1} of {self.page_count}")
-            if self.thumbnail:
-                embed.set_thumbnail(url=self.thumbnail)
-            self.embeds.append(embed)
-
-        if self.pages[self.page_index].render:
-            self.update_image()
+
         if self.page_count > 1:
             if self.paginated:
                 self.add_navigation_buttons()
@@ -174,6 +152,44 @@ class Message(View):
             else:
                 self.add_buttons()
 
+    def get_embed(self, index: int):
+        """Returns the embed for a loaded page, building it the first time."""
+        if index in self.embeds:
+            return self.embeds[index]
+
+        page = self.pages[index]
+        title = page.title if page.title else self.title
+        if page.flag_title:
+            title += get_flag_title(self.ctx.flags)
+        description = self.header + "\n" + page.description
+        footer = page.footer if page.footer else self.footer
+        embed = Embed(
+            title=title,
+            description=description,
+            url=self.url,
+            color=page.color if page.color else self.color,
+        )
+        if page.fields:
+            for field in page.fields:
+                embed.add_field(name=field.title, value=field.content, inline=field.inline)
+        if page.image_url:
+            embed.set_image(url=page.image_url)
+        if footer:
+            self.update_footer(embed, footer)
+        if self.footer_icon:
+            embed.set_footer(text=embed.footer.text, icon_url=self.footer_icon)
+        if self.profile:
+            self.add_profile(embed)
+        if self.paginated and self.page_count > 1:
+            self.update_footer(embed, f"Page {index + 1} of {self.page_count}")
+        if self.thumbnail:
+            embed.set_thumbnail(url=self.thumbnail)
+        if index in self.cache:
+            embed.set_image(url=f"attachment://{self.cache[index]}")
+
+        self.embeds[index] = embed
+        return embed
+
     def add_profile(self, embed):
         """Adds profile avatar and author section to the embed."""
         username = self.profile["username"]
@@ -271,8 +287,6 @@ class Message(View):
                 return await interaction.response.defer()
 
             self.page_index = index
-            if self.pages[self.page_index].render:
-                self.update_image()
             self.clear_items()
             self.add_buttons()
 
@@ -280,62 +294,107 @@ class Message(View):
 
         return callback
 
-    def update_image(self):
-        """Sets an image for the current page if a render() function is present."""
-        index = self.page_index
-        if index not in self.cache:
-            page = self.pages[index]
-            file_name = page.render()
-            self.cache[index] = file_name
+    async def prepare_page(self, index: int):
+        """Loads a page and renders its image, sharing the load with any prefetch already running."""
+        task = self.tasks.get(index)
+        if task is None or (task.done() and (task.cancelled() or task.exception())):
+            task = self.tasks[index] = asyncio.create_task(self._load_page(index))
 
-        self.embeds[index].set_image(url=f"attachment://{self.cache[index]}")
+        try:
+            await asyncio.shield(task)
+        except Exception:
+            self.tasks.pop(index, None)  # Retried the next time the page is shown
+            raise
+
+        page = self.pages[index]
+        if page.render and index not in self.cache:
+            self.cache[index] = page.render()
+
+    async def _load_page(self, index: int):
+        page = self.pages[index]
+        if page.load:
+            loaded = await page.load()
+            loaded.button_name = page.button_name
+            loaded.default = page.default
+            self.pages[index] = loaded
+            self.embeds.pop(index, None)  # Built from the placeholder, if it was shown before loading
+
+    def prefetch(self):
+        """
+        Loads the pages next to the current one in the background, a few at a time.
+        Only pages with a loader are prefetched, since renders run on the event loop and are left until clicked.
+        """
+        for index in (self.page_index + 1, self.page_index - 1):
+            if 0 <= index < self.page_count and index not in self.tasks and self.pages[index].load:
+                task = self.tasks[index] = asyncio.create_task(self._prefetch_page(index))
+                # A failed prefetch is retried when its page is shown, which reports the error
+                task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    async def _prefetch_page(self, index: int):
+        async with self.prefetch_limit:
+            await self._load_page(index)
 
     async def update_embed(self, interaction):
         """Updates the embed and buttons for a given page."""
         if self.ctx.author.id != interaction.user.id:
             return await interaction.response.defer()
 
+        # Read once, since another click can change the page while this one loads
+        index = self.page_index
+        await self.prepare_page(index)
+
+        if index != self.page_index:
+            return await interaction.response.defer()  # Superseded, the later click shows its own page
+
         kwargs = {
-            "embed": self.embeds[self.page_index],
+            "embed": self.get_embed(index),
             "view": self,
         }
-        if self.pages[self.page_index].render:
-            file_name = self.cache[self.page_index]
+        if self.pages[index].render:
+            file_name = self.cache[index]
             file = File(file_name, filename=os.path.basename(file_name))
             kwargs["attachments"] = [file]
         else:
             kwargs["attachments"] = []
         await interaction.response.edit_message(**kwargs)
+        self.prefetch()
 
     async def send(self):
         """Sends the constructed message with buttons and embeds."""
         self.build_embeds()
+        index = self.page_index
+        await self.prepare_page(index)
 
         kwargs = {
-            "embed": self.embeds[self.page_index],
+            "embed": self.get_embed(index),
             "view": self,
             "content": self.content,
         }
-        if self.pages[self.page_index].render:
-            file_name = self.cache[self.page_index]
+        if self.pages[index].render:
+            file_name = self.cache[index]
             file = File(file_name, filename=os.path.basename(file_name))
             kwargs["files"] = [file]
         self.message = await self.ctx.send(**kwargs)
 
+        if self.page_count > 1:
+            self.prefetch()
+
     async def edit(self, page_index: int = None):
         """Edits the current message with updated page data."""
         if page_index is not None:
             self.page_index = page_index
 
-        self.embeds = []
+        self.embeds = {}
         self.build_embeds()
+        index = self.page_index
+        await self.prepare_page(index)
 
         kwargs = {
-            "embed": self.embeds[self.page_index],
+            "embed": self.get_embed(index),
             "view": self,
         }
-        if self.pages[self.page_index].render:
-            file_name = self.cache[self.page_index]
+        if self.pages[index].render:
+            file_name = self.cache[index]
             file = File(file_name, filename=os.path.basename(file_name))
             kwargs["attachments"] = [file]
         else:
@@ -354,6 +413,8 @@ class Message(View):
 
     async def on_timeout(self):
         await super().on_timeout()
+        for task in self.tasks.values():
+            task.cancel()
         try:
             if len(self.pages) > 1:
                 await self.message.edit(view=None)
@@ -1,11 +1,17 @@
+import asyncio
 import json
-from bisect import bisect_left
+import os
+
+import numpy as np
 
 from api.leaders import get_leaders
-from config import SOURCE_DIR
+from config import DATA_DIR
 from utils.logging import log
 
-DATA_FILE = SOURCE_DIR / "data" / "pp_nwpm.json"
+DATA_FILE = DATA_DIR / "pp_nwpm.json"
+LEADER_SORTS = ["totalPp", "nWpm", "quotesTyped"]
+LEADER_PAGES = 10
+MAX_CONCURRENT_REQUESTS = 5
 
 try:
     with open(DATA_FILE, "r") as f:
@@ -15,41 +21,96 @@ except FileNotFoundError:
     with open(DATA_FILE, "w") as f:
         f.write("[]")
 
-nwpm_data = []  # Local copy of [pp, nWPM] data
+
+class NwpmModel:
+    """Piecewise linear model over monotonic [pp, nWPM] points, extrapolated from the outermost segments."""
+
+    def __init__(self, points: list):
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.pp_values = points[:, 0]
+        self.nwpm_values = points[:, 1]
+
+    def __len__(self):
+        return len(self.pp_values)
+
+    def predict(self, total_pp) -> np.ndarray:
+        pp_values, nwpm_values = self.pp_values, self.nwpm_values
+        total_pp = np.asarray(total_pp, dtype=float)
+        nwpm = np.interp(total_pp, pp_values, nwpm_values)
+
+        if len(pp_values) < 2:
+            return nwpm
+
+        for outside, (i, j) in [
+            (total_pp < pp_values[0], (0, 1)),
+            (total_pp > pp_values[-1], (-2, -1)),
+        ]:
+            if not outside.any():
+                continue
+
+            if pp_values[j] == pp_values[i]:
+                nwpm[outside] = 0.5 * (nwpm_values[i] + nwpm_values[j])
+            else:
+                t = (total_pp[outside] - pp_values[i]) / (pp_values[j] - pp_values[i])
+                nwpm[outside] = nwpm_values[i] + t * (nwpm_values[j] - nwpm_values[i])
+
+        return nwpm
+
+
+_model = NwpmModel([])  # Replaced as a whole whenever the points are reloaded
 _initialized = False  # Track if model has been initialized
+_update_lock = asyncio.Lock()
 
 
-async def update_nwpm_data():
-    """Update the pp nWPM point data used for calculating nWPM."""
-    log("Updating pp nWPM points")
+async def fetch_leader_points():
+    """Fetch every leaderboard page concurrently, returning one point per user."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
 
-    with open(DATA_FILE, "r") as f:
-        raw = f.read().strip() or "[]"
-        data = json.loads(raw)
+    async def fetch_page(sort: str, page: int):
+        async with semaphore:
+            return await get_leaders(per_page=100, page=page, sort=sort)
 
-    for sort in ["totalPp", "nWpm", "quotesTyped"]:
-        log(f"Fetching leaders (sort = {sort})")
-        for i in range(10):
-            log(f"Page {i + 1} / 10")
-            leaders = await get_leaders(per_page=100, page=i + 1, sort=sort)
-            for leader in leaders["users"]:
-                if leader["stats"]["quotesTyped"] < 125:
-                    continue
+    log(f"Fetching {len(LEADER_SORTS) * LEADER_PAGES} leaderboard pages")
+    results = await asyncio.gather(*[
+        fetch_page(sort, page)
+        for sort in LEADER_SORTS
+        for page in range(1, LEADER_PAGES + 1)
+    ])
 
-                data.append([leader["stats"]["nWpm"], leader["stats"]["totalPp"]])
+    points = {}
+    for leaders in results:
+        for leader in leaders["users"]:
+            if leader["stats"]["quotesTyped"] < 125:
+                continue
 
-    log("Cleaning data")
-    clean_data = clean_nwpm_data(data)
+            points[leader["userId"]] = [leader["stats"]["nWpm"], leader["stats"]["totalPp"]]
 
-    with open(DATA_FILE, "w") as f:
-        json.dump(clean_data, f)
+    return list(points.values())
+
+
+async def update_nwpm_data():
+    """Update the pp nWPM point data used for calculating nWPM."""
+    global _model
+
+    async with _update_lock:
+        log("Updating pp nWPM points")
+        data = await fetch_leader_points()
 
-    log("Finished updating pp nWPM points")
+        log("Cleaning data")
+        clean_data = clean_nwpm_data(data)
+
+        temp_file = DATA_FILE.with_suffix(".tmp")
+        with open(temp_file, "w") as f:
+            json.dump(clean_data, f)
+        os.replace(temp_file, DATA_FILE)
+
+        _model = NwpmModel(clean_data)
+        log("Finished updating pp nWPM points")
 
 
 def clean_nwpm_data(data: list):
     """Remove points that violate monotonicity (higher pp should always = higher nWPM)."""
-    data.sort(key=lambda x: x[0])
+    data.sort(key=lambda x: (x[0], -x[1]))
     clean = []
     max_nwpm = float("-inf")
 
@@ -62,12 +123,12 @@ def clean_nwpm_data(data: list):
 
 
 def load_local_data():
-    """Load the JSON data to a local variable."""
-    global nwpm_data
+    """Load the JSON data into the model, cleaned again in case it was saved before cleaning dropped equal pp values."""
+    global _model
 
     with open(DATA_FILE, "r") as f:
         raw = f.read().strip()
-        nwpm_data = json.loads(raw)
+        _model = NwpmModel(clean_nwpm_data(json.loads(raw)))
 
 
 async def initialize_nwpm_model():
@@ -79,41 +140,19 @@ async def initialize_nwpm_model():
 
     load_local_data()
 
-    if not nwpm_data:
+    if not len(_model):
         log("nWPM data is empty. Fetching data from leaderboards...")
         await update_nwpm_data()
-        load_local_data()
 
     _initialized = True
     log("nWPM model initialized")
 
 
-def _interpolate(x, x0, y0, x1, y1):
-    """Simple linear interpolation."""
-    if x1 == x0:
-        return 0.5 * (y0 + y1)
-    t = (x - x0) / (x1 - x0)
-    return y0 + t * (y1 - y0)
+def calculate_nwpm_many(total_pp) -> np.ndarray:
+    """Estimate nWPM for an array of pp values using linear interpolation."""
+    return _model.predict(total_pp)
 
 
 def calculate_nwpm(total_pp: float):
     """Estimate nWPM from a given PP value using linear interpolation."""
-    pp_values, _ = zip(*nwpm_data)
-    idx = bisect_left(pp_values, total_pp)
-
-    # Below range -> extrapolate from first two points
-    if idx == 0:
-        pp0, nw0 = nwpm_data[0]
-        pp1, nw1 = nwpm_data[1]
-
-    # Above range -> extrapolate from last two points
-    elif idx >= len(nwpm_data):
-        pp0, nw0 = nwpm_data[-2]
-        pp1, nw1 = nwpm_data[-1]
-
-    # Inside range -> interpolate between neighbors
-    else:
-        pp0, nw0 = nwpm_data[idx - 1]
-        pp1, nw1 = nwpm_data[idx]
-
-    return _interpolate(total_pp, pp0, nw0, pp1, nw1)
+    return float(_model.predict([total_pp])[0])
@@ -1,5 +1,12 @@
+import heapq
 import math
 
+import numpy as np
+
+TOTAL_PP_ENTRIES = 250  # Quote bests counted towards total pp
+TOTAL_PP_DECAY = 0.97  # Weight multiplier per rank
+TOTAL_PP_WEIGHTS = [TOTAL_PP_DECAY ** i for i in range(TOTAL_PP_ENTRIES)]
+
 
 def calculate_total_pp(quote_bests: list[dict] | list[float]):
     """Returns the total performance given a list of quote bests or pp values."""
@@ -7,11 +14,11 @@ def calculate_total_pp(quote_bests: list[dict] | list[float]):
         return 0
 
     if isinstance(quote_bests[0], float):
-        quote_bests.sort(reverse=True)
-        return sum(math.floor(v) * (0.97 ** i) for i, v in enumerate(quote_bests[:250]))
+        values = heapq.nlargest(TOTAL_PP_ENTRIES, quote_bests)
     else:
-        quote_bests.sort(key=lambda x: -x["pp"])
-        return sum(math.floor(q["pp"]) * (0.97 ** i) for i, q in enumerate(quote_bests[:250]))
+        values = [q["pp"] for q in heapq.nlargest(TOTAL_PP_ENTRIES, quote_bests, key=lambda x: x["pp"])]
+
+    return sum(math.floor(v) * weight for v, weight in zip(values, TOTAL_PP_WEIGHTS))
 
 
 def calculate_quote_bests(race_list: list[dict]):
@@ -61,3 +68,65 @@ def get_pauseless_delays(raw_delays: int):
             pauseless_delays.append(average)
 
     return pauseless_delays
+
+
+def rows_to_arrays(rows: list, columns: list[str]):
+    """Returns a dictionary of column to float array given rows, with missing values as NaN."""
+    return {
+        column: np.array([row[column] for row in rows], dtype=float)
+        for column in columns
+    }
+
+
+def describe(values: np.ndarray):
+    """Returns the average, median, quartiles and standard deviation of an array."""
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    return {
+        "average": values.mean(),
+        "median": median,
+        "q1": q1,
+        "q3": q3,
+        "std": values.std(),
+    }
+
+
+def bucket_counts(values: np.ndarray, step: float, weights: np.ndarray = None):
+    """Returns a dictionary of bucket (values floored to a multiple of step) to count or summed weight."""
+    buckets = np.floor(values / step) * step
+    keys, inverse = np.unique(buckets, return_inverse=True)
+    if weights is None:
+        counts = np.bincount(inverse, minlength=len(keys))
+    else:
+        counts = np.zeros(len(keys), dtype=weights.dtype)
+        np.add.at(counts, inverse, weights)
+
+    return {float(key): count.item() for key, count in zip(keys, counts)}
+
+
+def percentile_ranks(sorted_values: np.ndarray, values):
+    """Returns the fraction of sorted_values less than or equal to each value."""
+    return np.searchsorted(sorted_values, values, side="right") / len(sorted_values)
+
+
+def weighted_median(values: np.ndarray, weights: np.ndarray):
+    """Returns the value at which the cumulative weight of the sorted values reaches half."""
+    order = np.argsort(values)
+    cumulative = np.cumsum(weights[order]) / weights.sum()
+    return values[order][np.searchsorted(cumulative, 0.5)]
+
+
+def max_positive_run(values: np.ndarray):
+    """
+    Returns the largest sum of a run of consecutive positive values, with the run's first and last index.
+    Ties go to the earliest run. Returns (0, None, None) if no value is positive.
+    """
+    positive = values > 0
+    if not positive.any():
+        return 0, None, None
+
+    starts = np.flatnonzero(positive & ~np.concatenate([[False], positive[:-1]]))
+    ends = np.flatnonzero(positive & ~np.concatenate([positive[1:], [False]]))
+    sums = np.add.reduceat(np.where(positive, values, 0), starts)
+    best = np.argmax(sums)
+
+    return sums[best].item(), starts[best], ends[best]
@@ -133,6 +133,15 @@ def format_big_number(number, _):
     return int(number)
 
 
+def format_file_size(size: int):
+    """Format a size in bytes with a binary unit suffix (e.g., 1536 -> 1.5 KB)."""
+    for unit in ["B", "KB", "MB"]:
+        if size < 1024:
+            return f"{size:,} B" if unit == "B" else f"{size:,.1f} {unit}"
+        size /= 1024
+    return f"{size:,.1f} GB"
+
+
 def parse_number(value):
     """Parse a string into int or float, supporting commas and K/M suffixes."""
     s = str(value).strip().replace(",", "").lower()
@@ -348,7 +357,7 @@ def quote_display(
     display_racers_users: bool = False,
     display_submitted_by: bool = False,
     display_text: bool = True,
-    text_highlight: str = None,
+    text_highlight: str | tuple[int, int] = None,
 ):
     """Format a quote dictionary into a rich display string for Discord embeds."""
     text = quote["text"]
@@ -456,15 +465,20 @@ def apply_rich_text(text: str, formatting: dict[str, list[tuple[int, int]]]):
     return "".join(final)
 
 
-def highlight_text(text: str, text_highlight: str, max_chars: int = 120):
-    """Finds a query match in a text and highlights the matched section."""
-    query_length = len(text_highlight)
-    chars = max_chars - query_length
-    query_index = text.lower().find(text_highlight.lower())
+def highlight_text(text: str, text_highlight: str | tuple[int, int], max_chars: int = 120):
+    """Finds a query match in a text, or takes its (start, end) offsets, and highlights the matched section."""
+    if isinstance(text_highlight, tuple):
+        query_index, query_end = text_highlight
+    else:
+        query_index = text.lower().find(text_highlight.lower())
+        query_end = query_index + len(text_highlight)
 
     if query_index == -1:
         return text
 
+    query_length = query_end - query_index
+    chars = max_chars - query_length
+
     start_index = query_index
     end_index = query_index + query_length
 
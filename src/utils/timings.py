@@ -0,0 +1,79 @@
+import zlib
+
+import numpy as np
+
+from utils.errors import InvalidKeystrokeData
+from utils.keystroke_jobs import decode_keystroke_data
+from utils.keystrokes import get_keystroke_data
+
+WORD_SEPARATORS = " \n"
+
+
+def get_word_spans(text: str):
+    """Returns the (start, end) index of each word in a text, separated by spaces and newlines."""
+    spans = []
+    start = None
+
+    for i, char in enumerate(text + " "):
+        if char in WORD_SEPARATORS:
+            if start is not None:
+                spans.append((start, i))
+                start = None
+        elif start is None:
+            start = i
+
+    return spans
+
+
+def merge_timing(index: dict, key: str, times: np.ndarray):
+    """Adds an array of times to the (count, total, squares, best) statistics of a key."""
+    if not len(times):
+        return
+
+    stats = index.get(key)
+    if stats is None:
+        index[key] = [len(times), float(times.sum()), float((times ** 2).sum()), float(times.min())]
+    else:
+        stats[0] += len(times)
+        stats[1] += float(times.sum())
+        stats[2] += float((times ** 2).sum())
+        stats[3] = min(stats[3], float(times.min()))
+
+
+def extract_timings(text: str, delays: np.ndarray, bigrams: dict, words: dict):
+    """
+    Merges the bigram and word timings of races on a text into the given indexes.
+    Delays hold one row of character times per race. A bigram's time is the delay before its second character,
+    and a word's time is the sum of its characters' delays, skipped when it starts the race untimed.
+    """
+    for i in range(1, len(text)):
+        merge_timing(bigrams, text[i - 1:i + 1], delays[:, i])
+
+    for start, end in get_word_spans(text):
+        times = delays[:, start:end].sum(axis=1)
+        if start == 0:
+            times = times[delays[:, 0] != 0]
+        merge_timing(words, text[start:end], times)
+
+
+def get_chunk_timings(rows: list[tuple]):
+    """
+    Decodes a chunk of (raceId, keystrokeData, compressed) rows into bigram and word timing indexes.
+    Runs in a worker process. Races are grouped by text, so each text's statistics are computed at once.
+    """
+    texts = {}
+
+    for _, keystroke_data, compressed in rows:
+        try:
+            result = get_keystroke_data(decode_keystroke_data(keystroke_data, compressed))
+        except (InvalidKeystrokeData, ValueError, zlib.error):
+            continue
+
+        if len(result.wpmCharacterTimes) == len(result.text):
+            texts.setdefault(result.text, []).append(result.wpmCharacterTimes)
+
+    bigrams, words = {}, {}
+    for text, delay_list in texts.items():
+        extract_timings(text, np.array(delay_list, dtype=float), bigrams, words)
+
+    return bigrams, words